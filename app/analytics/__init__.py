@@ -0,0 +1,3 @@
+"""
+Analytics package initialization
+"""
\ No newline at end of file
@@ -0,0 +1,456 @@
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, List, Tuple, Union
+
+import numpy as np
+
+from app.analytics.forecasting import history_matrix, hour_of_week
+from app.analytics.series_cache import MeterSeriesCache
+
+# Column of each metric in the (..., 2) reading arrays
+CONSUMPTION, PRODUCTION = 0, 1
+METRIC_NAMES = ('consumptionKWh', 'productionKWh')
+KINDS = ('spike', 'zero_read', 'production_dropoff')
+
+
+@dataclass(frozen=True)
+class AnomalyConfig:
+    """
+    Thresholds of the meter anomaly detector.
+
+    Every meter keeps a robust baseline (level and mean absolute deviation)
+    per local hour of the day and metric, updated with an exponentially
+    weighted rate after Huber-style clipping, so spikes barely move it.
+
+    Attributes:
+        span_days: Span of the exponential weighting, in observations of a slot (days)
+        warmup_days: Observations of a slot before it is used to flag readings
+        clip: Readings are clipped to ``level +/- clip * scale`` before updating the baseline
+        spike_threshold: A reading this many scales above its slot's level is a spike
+        min_spike_kwh: ... and at least this far above it
+        min_scale: Floor of the scale, so flat baselines do not flag rounding noise
+        zero_kwh: Consumption at or below this is a zero-read
+        zero_run_hours: Consecutive zero-reads reported as a stuck or disconnected meter
+        min_production_kwh: Slots whose production level is below this are not daylight
+        dropoff_ratio: Daylight production below this fraction of its level is a drop-off
+        dropoff_run_hours: Consecutive daylight drop-off hours reported (nights are skipped)
+        utc_offset_hours: Offset of local time from UTC, for the hour of the day
+    """
+    span_days: float = 14.0
+    warmup_days: int = 7
+    clip: float = 3.0
+    spike_threshold: float = 10.0
+    min_spike_kwh: float = 0.5
+    min_scale: float = 0.01
+    zero_kwh: float = 1e-6
+    zero_run_hours: int = 6
+    min_production_kwh: float = 0.05
+    dropoff_ratio: float = 0.3
+    dropoff_run_hours: int = 16
+    utc_offset_hours: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        return 2.0 / (self.span_days + 1.0)
+
+
+@dataclass
+class Anomaly:
+    """One flagged reading, or the start of a flagged run of readings"""
+    meter_id: str
+    kind: str
+    metric: str
+    timestamp: np.datetime64
+    value: float
+    expected: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "metric": self.metric,
+            "timestamp": str(self.timestamp),
+            "value": round(self.value, 4),
+            "expected": round(self.expected, 4),
+        }
+
+
+def _flags(level: np.ndarray, scale: np.ndarray, count: np.ndarray, x: np.ndarray, config: AnomalyConfig) -> Dict:
+    """
+    Anomaly conditions of readings against their slots' baselines, before the baselines are updated.
+
+    Args:
+        level, scale, count: Baselines of the readings' slots, shape (..., 2)
+        x: Consumption/production readings, shape (..., 2), NaN where missing
+        config: Thresholds
+
+    Returns:
+        Boolean arrays: 'spike' (..., 2); 'zero', 'zero_reset', 'drop', 'drop_reset' (...). Runs grow
+        on 'zero'/'drop', restart on the resets and are left as they are otherwise (missing readings, nights)
+    """
+    warm = count >= config.warmup_days
+    excess = x - level
+    spike = warm & (excess > config.spike_threshold * np.maximum(scale, config.min_scale))
+    spike &= excess >= config.min_spike_kwh
+    consumption, production = x[..., CONSUMPTION], x[..., PRODUCTION]
+    zero = consumption <= config.zero_kwh
+    daylight = warm[..., PRODUCTION] & (level[..., PRODUCTION] >= config.min_production_kwh)
+    daylight &= np.isfinite(production)
+    drop = daylight & (production < config.dropoff_ratio * level[..., PRODUCTION])
+    return {
+        "spike": spike,
+        "zero": zero,
+        "zero_reset": np.isfinite(consumption) & ~zero,
+        "drop": drop,
+        "drop_reset": daylight & ~drop,
+    }
+
+
+def _update(
+    level: np.ndarray,
+    scale: np.ndarray,
+    count: np.ndarray,
+    x: np.ndarray,
+    config: AnomalyConfig,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Fold readings into their slots' baselines: O(1) per reading, elementwise over any batch shape.
+
+    Warm slots clip the reading to ``level +/- clip * scale`` and move by ``config.rate``;
+    cold slots take plain running means. Missing readings and zero consumption
+    (an outage, flagged separately) leave the baseline unchanged.
+    """
+    use = np.isfinite(x)
+    use[..., CONSUMPTION] &= x[..., CONSUMPTION] > config.zero_kwh
+    warm = count >= config.warmup_days
+    rate = np.where(warm, config.rate, 1.0 / (count + 1))
+    width = config.clip * np.maximum(scale, config.min_scale)
+    value = np.where(warm, np.clip(x, level - width, level + width), x)
+    deviation = np.where(count > 0, np.abs(value - level), 0.0)
+    level = np.where(use, level + rate * (value - level), level)
+    scale = np.where(use, scale + rate * (deviation - scale), scale)
+    return level, scale, count + use
+
+
+def _runs(
+    active: np.ndarray,
+    reset: np.ndarray,
+    threshold: int,
+    run: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Run lengths of many rows at once, matching the streaming counters.
+
+    Args:
+        active: Hours that extend a run, shape (rows, hours)
+        reset: Hours that end a run
+        threshold: Run length reported
+        run: Run length carried into the first hour, shape (rows,)
+
+    Returns:
+        Row and column of every hour where a run reaches ``threshold``, the column its run
+        started at (-1: the carried run), and the final run length and start column of every row
+    """
+    rows, hours = active.shape
+    cum = np.cumsum(active, axis=1)
+    last_reset = np.maximum.accumulate(np.where(reset, np.arange(hours), -1), axis=1)
+    # Actives up to the last reset, so ``cum - base`` counts the current run
+    base = np.where(last_reset >= 0, np.take_along_axis(cum, np.maximum(last_reset, 0), axis=1), 0)
+    carried = (last_reset < 0) & (run[:, None] > 0)
+    length = cum - base + np.where(last_reset < 0, run[:, None], 0)
+
+    # A run starts at its row's (base + 1)-th active hour, unless it was carried in
+    positions = np.flatnonzero(active.ravel())
+    offsets = np.concatenate([[0], np.cumsum(active.sum(axis=1))[:-1]]).astype(np.int64)
+
+    def run_start(row: np.ndarray, column: np.ndarray) -> np.ndarray:
+        rank = np.minimum(offsets[row] + base[row, column], max(len(positions) - 1, 0))
+        first = positions[rank] - row * hours if len(positions) else np.full(len(row), -1)
+        return np.where(carried[row, column], -1, first)
+
+    row, column = np.nonzero(active & (length == threshold))
+    every, last = np.arange(rows), np.full(rows, hours - 1)
+    final_run = length[:, -1]
+    final_start = np.where(final_run > 0, run_start(every, last), -1)
+    return row, column, run_start(row, column), final_run, final_start
+
+
+class MeterAnomalyDetector:
+    """
+    Streaming detector of one meter.
+
+    ``update`` checks a reading against its slot's baseline and then folds
+    it in, in constant time. The same state is produced for many meters at
+    once by ``AnomalyMonitor.backfill``, so a backfilled meter continues
+    streaming where the batch stopped.
+    """
+
+    def __init__(self, meter_id: Union[int, str], config: AnomalyConfig):
+        self.meter_id = str(meter_id)
+        self.config = config
+        self.level = np.zeros((24, 2))
+        self.scale = np.zeros((24, 2))
+        self.count = np.zeros((24, 2), dtype=np.int64)
+        self.zero_run, self.zero_start = 0, None
+        self.drop_run, self.drop_start = 0, None
+        self.last_timestamp: Optional[np.datetime64] = None
+        self.events = deque(maxlen=200)
+
+    def update(self, timestamp: np.datetime64, consumption: float, production: float) -> List[Anomaly]:
+        """
+        Check one reading and update the baselines.
+
+        Args:
+            timestamp: datetime64 time of the reading
+            consumption: kWh consumed in the reading's interval
+            production: kWh produced
+
+        Returns:
+            Anomalies raised by this reading
+        """
+        config = self.config
+        timestamp = np.datetime64(timestamp, 's')
+        slot = int(hour_of_week(np.array([timestamp]), config.utc_offset_hours)[0] % 24)
+        x = np.array([consumption, production], dtype=np.float64)
+        level, scale, count = self.level[slot], self.scale[slot], self.count[slot]
+        flags = _flags(level, scale, count, x, config)
+
+        events = [
+            Anomaly(self.meter_id, 'spike', METRIC_NAMES[m], timestamp, float(x[m]), float(level[m]))
+            for m in np.flatnonzero(flags['spike'])
+        ]
+        if flags['zero']:
+            if not self.zero_run:
+                self.zero_start = timestamp
+            self.zero_run += 1
+            if self.zero_run == config.zero_run_hours:
+                expected = float(level[CONSUMPTION])
+                events.append(Anomaly(self.meter_id, 'zero_read', 'consumptionKWh', self.zero_start, 0.0, expected))
+        elif flags['zero_reset']:
+            self.zero_run, self.zero_start = 0, None
+        if flags['drop']:
+            if not self.drop_run:
+                self.drop_start = timestamp
+            self.drop_run += 1
+            if self.drop_run == config.dropoff_run_hours:
+                events.append(Anomaly(
+                    self.meter_id, 'production_dropoff', 'productionKWh', self.drop_start,
+                    float(x[PRODUCTION]), float(level[PRODUCTION])
+                ))
+        elif flags['drop_reset']:
+            self.drop_run, self.drop_start = 0, None
+
+        self.level[slot], self.scale[slot], self.count[slot] = _update(level, scale, count, x, config)
+        self.last_timestamp = timestamp
+        self.events.extend(events)
+        return events
+
+
+def detect_batch(
+    times: np.ndarray,
+    readings: np.ndarray,
+    detectors: List[MeterAnomalyDetector],
+) -> List[List[Anomaly]]:
+    """
+    Run many meters' detectors over an hourly grid at once (backfill).
+
+    The grid is processed one day at a time: every hour of a day is a
+    different slot, so each step updates all (meters x 24) baselines with
+    one vectorized ``_update``. Runs are counted afterwards over the whole
+    window with cumulative sums. The results and the final detector states
+    match feeding the same hours to ``update`` one by one.
+
+    Args:
+        times: datetime64 hourly grid, shape (hours,)
+        readings: Consumption/production kWh, shape (meters, hours, 2), NaN where missing
+        detectors: Detector of every row, updated in place
+
+    Returns:
+        Anomalies of every row, in time order
+    """
+    if not detectors or not len(times):
+        return [[] for _ in detectors]
+    config = detectors[0].config
+    meters, hours = readings.shape[:2]
+    days = -(-hours // 24)
+    padded = np.full((meters, days * 24, 2), np.nan)
+    padded[:, :hours] = readings
+    grid = times.astype('datetime64[s]')[0] + np.arange(days * 24) * np.timedelta64(3600, 's')
+    # Column j of every day is slot order[j]
+    order = hour_of_week(grid[:24], config.utc_offset_hours) % 24
+
+    level = np.stack([d.level[order] for d in detectors])
+    scale = np.stack([d.scale[order] for d in detectors])
+    count = np.stack([d.count[order] for d in detectors])
+    expected = np.empty_like(padded)
+    flags = {key: np.zeros((meters, days * 24) + ((2,) if key == 'spike' else ()), dtype=bool)
+             for key in ('spike', 'zero', 'zero_reset', 'drop', 'drop_reset')}
+    for day in range(days):
+        window = slice(day * 24, day * 24 + 24)
+        x = padded[:, window]
+        for key, value in _flags(level, scale, count, x, config).items():
+            flags[key][:, window] = value
+        expected[:, window] = level
+        level, scale, count = _update(level, scale, count, x, config)
+
+    # (column, kind) of every anomaly orders them like the streaming detector raises them
+    raised: List[List[Tuple[int, int, Anomaly]]] = [[] for _ in detectors]
+    row, column, metric = np.nonzero(flags['spike'])
+    for r, c, m in zip(row, column, metric):
+        anomaly = Anomaly(
+            detectors[r].meter_id, 'spike', METRIC_NAMES[m], grid[c], float(padded[r, c, m]), float(expected[r, c, m])
+        )
+        raised[r].append((c, 0, anomaly))
+
+    runs = (
+        ('zero_read', 'zero', CONSUMPTION, config.zero_run_hours),
+        ('production_dropoff', 'drop', PRODUCTION, config.dropoff_run_hours),
+    )
+    for kind_index, (kind, key, m, threshold) in enumerate(runs, start=1):
+        run = np.array([getattr(d, f'{key}_run') for d in detectors])
+        row, column, starts, final_run, final_start = _runs(flags[key], flags[f'{key}_reset'], threshold, run)
+        for r, c, s in zip(row, column, starts):
+            detector = detectors[r]
+            began = grid[s] if s >= 0 else getattr(detector, f'{key}_start')
+            value = 0.0 if m == CONSUMPTION else float(padded[r, c, m])
+            raised[r].append((c, kind_index, Anomaly(
+                detector.meter_id, kind, METRIC_NAMES[m], began, value, float(expected[r, c, m])
+            )))
+        for r, detector in enumerate(detectors):
+            if final_run[r] and final_start[r] >= 0:
+                setattr(detector, f'{key}_start', grid[final_start[r]])
+            elif not final_run[r]:
+                setattr(detector, f'{key}_start', None)
+            setattr(detector, f'{key}_run', int(final_run[r]))
+
+    events = []
+    for r, detector in enumerate(detectors):
+        detector.level[order], detector.scale[order], detector.count[order] = level[r], scale[r], count[r]
+        found = [anomaly for _, _, anomaly in sorted(raised[r], key=lambda item: item[:2])]
+        detector.events.extend(found)
+        events.append(found)
+    return events
+
+
+class AnomalyMonitor:
+    """
+    Anomaly detectors of many meters, fed from the meter series cache.
+
+    A meter seen for the first time is backfilled from its cached hourly
+    history in one vectorized batch; afterwards only readings newer than the
+    last one checked are streamed through its detector.
+    """
+
+    def __init__(self, config: Optional[AnomalyConfig] = None, backfill_days: int = 60):
+        """
+        Initialize the monitor.
+
+        Args:
+            config: Detector thresholds
+            backfill_days: Hours of history checked when a meter is first seen, in days
+        """
+        self.config = config or AnomalyConfig()
+        self.backfill_days = backfill_days
+        self._lock = threading.Lock()
+        self._detectors: Dict[str, MeterAnomalyDetector] = {}
+
+    def detector(self, meter_id: Union[int, str]) -> MeterAnomalyDetector:
+        meter_id = str(meter_id)
+        if meter_id not in self._detectors:
+            self._detectors[meter_id] = MeterAnomalyDetector(meter_id, self.config)
+        return self._detectors[meter_id]
+
+    def observe(self, meter_id: Union[int, str], timestamp, consumption: float, production: float) -> List[Anomaly]:
+        """Stream one reading of a meter (see ``MeterAnomalyDetector.update``)"""
+        with self._lock:
+            return self.detector(meter_id).update(timestamp, consumption, production)
+
+    def backfill(
+        self,
+        meter_ids: List[Union[int, str]],
+        times: np.ndarray,
+        consumption: np.ndarray,
+        production: np.ndarray,
+    ) -> Dict[str, List[Anomaly]]:
+        """
+        Check many meters' hourly histories at once.
+
+        Args:
+            meter_ids: Meters of the rows
+            times: datetime64 hourly grid, shape (hours,)
+            consumption: kWh per hour, shape (meters, hours), NaN where missing
+            production: kWh per hour, same shape
+
+        Returns:
+            Anomalies of every meter
+        """
+        with self._lock:
+            detectors = [self.detector(meter_id) for meter_id in meter_ids]
+            events = detect_batch(times, np.stack([consumption, production], axis=-1), detectors)
+            return {detector.meter_id: found for detector, found in zip(detectors, events)}
+
+    def scan(self, cache: MeterSeriesCache, meter_ids: List[Union[int, str]]) -> Dict[str, List[Anomaly]]:
+        """
+        Check the cached readings of meters not checked yet.
+
+        Args:
+            cache: Cache holding the meter series (refreshed by the caller)
+            meter_ids: Meters to check
+
+        Returns:
+            New anomalies of every meter
+        """
+        meter_ids = [str(m) for m in meter_ids]
+        with self._lock:
+            new = [m for m in meter_ids if self.detector(m).last_timestamp is None and len(cache.get(m).timestamps)]
+        found: Dict[str, List[Anomaly]] = {m: [] for m in meter_ids}
+        if new:
+            history = history_matrix(cache, new, days=self.backfill_days)
+            end = history['times'][-1] + np.timedelta64(3600, 's')
+            production = history_matrix(cache, new, days=self.backfill_days, end=end, metric='productionKWh')
+            found.update(self.backfill(new, history['times'], history['loads'], production['loads']))
+            with self._lock:
+                for meter_id in new:
+                    self.detector(meter_id).last_timestamp = cache.get(meter_id).last_timestamp
+
+        for meter_id in meter_ids:
+            if meter_id in new:
+                continue
+            series = cache.get(meter_id)
+            last = self.detector(meter_id).last_timestamp
+            fresh = np.flatnonzero(series.timestamps > last) if last is not None else np.arange(len(series.timestamps))
+            for i in fresh:
+                found[meter_id].extend(self.observe(
+                    meter_id, series.timestamps[i],
+                    series.values['consumptionKWh'][i], series.values['productionKWh'][i]
+                ))
+        return found
+
+    def summary(self, meter_id: Union[int, str], limit: int = 10) -> Dict[str, Any]:
+        """
+        Health of one meter: anomaly counts by kind, the latest anomalies and open runs.
+
+        Args:
+            meter_id: ID of the meter
+            limit: Latest anomalies listed
+
+        Returns:
+            Dict with 'checked_until', 'counts', 'latest' and 'ongoing'
+        """
+        with self._lock:
+            detector = self.detector(meter_id)
+            events = list(detector.events)
+            ongoing = []
+            if detector.zero_run >= self.config.zero_run_hours:
+                ongoing.append({"kind": "zero_read", "since": str(detector.zero_start), "hours": detector.zero_run})
+            if detector.drop_run >= self.config.dropoff_run_hours:
+                ongoing.append({
+                    "kind": "production_dropoff", "since": str(detector.drop_start), "hours": detector.drop_run
+                })
+            return {
+                "meter_id": detector.meter_id,
+                "checked_until": str(detector.last_timestamp) if detector.last_timestamp is not None else None,
+                "counts": {kind: sum(e.kind == kind for e in events) for kind in KINDS},
+                "latest": [e.to_dict() for e in events[-limit:]],
+                "ongoing": ongoing,
+            }
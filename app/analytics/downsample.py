@@ -0,0 +1,112 @@
+from typing import Tuple
+
+import numpy as np
+
+# Above this many points per output point, LTTB runs on a min-max pre-selection
+PRESELECT_RATIO = 4
+
+
+def _as_float(x: np.ndarray) -> np.ndarray:
+    """X values as float64 offsets from the first one (datetime64 in its own unit)"""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype(np.int64)
+    x = x.astype(np.float64)
+    return x - x[0] if len(x) else x
+
+
+def minmax_indices(y: np.ndarray, n_buckets: int) -> np.ndarray:
+    """
+    Indices of the min and max of ``y`` in each of ``n_buckets`` equal index buckets.
+
+    Keeps every spike and dip of the series (its envelope) with at most
+    ``2 * n_buckets + 2`` points; first and last points are always kept.
+
+    Args:
+        y: Values of the series
+        n_buckets: Number of buckets
+
+    Returns:
+        Sorted indices into ``y``
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= 2 * n_buckets + 2 or n_buckets < 1:
+        return np.arange(n)
+    size = -(-n // n_buckets)
+    buckets = -(-n // size)
+    # Pad with the last value so every bucket has the same length
+    padded = np.concatenate([y, np.full(buckets * size - n, y[-1])]).reshape(buckets, size)
+    base = np.arange(buckets) * size
+    indices = np.concatenate([[0, n - 1], base + padded.argmin(axis=1), base + padded.argmax(axis=1)])
+    return np.unique(np.minimum(indices, n - 1))
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices selected by Largest-Triangle-Three-Buckets.
+
+    The interior points are split into ``n_out - 2`` buckets; from each, the
+    point forming the largest triangle with the previously selected point and
+    the mean of the next bucket is kept. Bucket means and triangle areas are
+    NumPy operations, so the Python loop is O(n_out), not O(len(x)).
+
+    Args:
+        x: X values (numbers or datetime64), increasing
+        y: Values of the series
+        n_out: Number of points to keep (at least 3)
+
+    Returns:
+        Sorted indices into ``x``/``y``
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = _as_float(x)
+    y = np.asarray(y, dtype=np.float64)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    sizes = np.diff(edges)
+    # Mean of each bucket, followed by the last point as the final "next bucket"
+    mean_x = np.append(np.add.reduceat(x[:-1], edges[:-1]) / sizes, x[-1])
+    mean_y = np.append(np.add.reduceat(y[:-1], edges[:-1]) / sizes, y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - mean_x[i + 1]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (mean_y[i + 1] - ay))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+
+def downsample(x: np.ndarray, y: np.ndarray, max_points: int, method: str = 'lttb') -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reduce a series to at most ``max_points`` points for plotting.
+
+    Args:
+        x: X values (numbers or datetime64), increasing
+        y: Values of the series
+        max_points: Point budget
+        method: 'lttb' (keeps the visual shape) or 'minmax' (keeps the envelope)
+
+    Returns:
+        The kept x and y values
+    """
+    x, y = np.asarray(x), np.asarray(y)
+    if len(y) <= max_points:
+        return x, y
+    if method == 'minmax':
+        indices = minmax_indices(y, max(1, (max_points - 2) // 2))
+    elif method == 'lttb':
+        indices = np.arange(len(y))
+        if len(y) > PRESELECT_RATIO * max_points:
+            # MinMaxLTTB: the envelope keeps the extremes LTTB would pick, at a fraction of the loop
+            indices = minmax_indices(y, PRESELECT_RATIO * max_points // 2)
+        indices = indices[lttb_indices(x[indices], y[indices], max_points)]
+    else:
+        raise ValueError("Method must be 'lttb' or 'minmax'")
+    return x[indices], y[indices]
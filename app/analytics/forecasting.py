@@ -0,0 +1,236 @@
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, List, Union
+
+import numpy as np
+
+from app.analytics.series_cache import MeterSeriesCache
+from app.analytics.solar import hourly_index
+
+HOURS_PER_WEEK = 168
+# Annual harmonics are only fitted on windows at least this long
+MIN_ANNUAL_DAYS = 300
+# Peak load above which a three-phase connection is suggested
+SINGLE_PHASE_MAX_KW = 7.0
+
+
+def hour_of_week(times: np.ndarray, utc_offset_hours: float = 0.0) -> np.ndarray:
+    """Hour of the week (0 = Monday 00:00 local) of every timestamp"""
+    local = (np.asarray(times, dtype='datetime64[s]') + np.timedelta64(int(utc_offset_hours * 3600), 's'))
+    hours = local.astype('datetime64[h]').astype(np.int64)
+    # 1970-01-01 was a Thursday, 72 hours after Monday 00:00
+    return (hours + 72) % HOURS_PER_WEEK
+
+
+@dataclass
+class LoadForecast:
+    """Hourly load forecast of many meters over one time index"""
+    meter_ids: List[str]
+    times: np.ndarray
+    hourly: np.ndarray
+    peak_ratio: Optional[np.ndarray] = None
+
+    @property
+    def annual_kwh(self) -> np.ndarray:
+        return self.hourly.sum(axis=1)
+
+    @property
+    def peak_kw(self) -> np.ndarray:
+        """
+        Expected highest hourly mean power. The forecast is an expectation,
+        so its own maximum is scaled by how far each meter's historical peak
+        exceeded its fitted peak.
+        """
+        peak = self.hourly.max(axis=1)
+        return peak * self.peak_ratio if self.peak_ratio is not None else peak
+
+    def summary(self, meter_id: Union[int, str]) -> Dict[str, Any]:
+        """Yearly energy, mean/peak/p95 load and suggested connection type of one meter"""
+        row = self.meter_ids.index(str(meter_id))
+        hourly = self.hourly[row]
+        peak = float(self.peak_kw[row])
+        return {
+            "forecast_start": str(self.times[0]),
+            "annual_kwh": round(float(hourly.sum()), 1),
+            "average_kw": round(float(hourly.mean()), 3),
+            "p95_kw": round(float(np.percentile(hourly, 95)), 3),
+            "peak_kw": round(peak, 3),
+            "suggested_connection_type": "single-phase" if peak <= SINGLE_PHASE_MAX_KW else "three-phase",
+        }
+
+
+class LoadForecaster:
+    """
+    Seasonal-profile + ridge regression load model, fitted for many meters at once.
+
+    The design matrix has one indicator per hour of the week (the weekly
+    profile) plus annual Fourier terms (when the history spans most of a
+    year). All meters share it, so fitting M meters is a single
+    (features x features) solve against an (hours x M) right-hand side and
+    forecasting is one matrix product. Targets are centred on each meter's
+    mean, so the penalty shrinks towards a flat profile at that level; gaps
+    in a meter's history are filled from its own weekly profile first.
+    """
+
+    def __init__(
+        self,
+        *,
+        alpha: float = 1e-4,
+        annual_harmonics: int = 3,
+        utc_offset_hours: float = 0.0,
+        chunk_size: int = 1024,
+    ):
+        """
+        Initialize the forecaster.
+
+        Args:
+            alpha: Ridge penalty per hour of history
+            annual_harmonics: Sine/cosine pairs of the yearly cycle
+            utc_offset_hours: Offset of local time from UTC, for the weekly profile
+            chunk_size: Meters filled and fitted per batch, bounding memory
+        """
+        self.alpha = alpha
+        self.chunk_size = chunk_size
+        self.annual_harmonics = annual_harmonics
+        self.utc_offset_hours = utc_offset_hours
+        self.harmonics = 0
+        self.coef: Optional[np.ndarray] = None
+        self.level: Optional[np.ndarray] = None
+        self.peak_ratio: Optional[np.ndarray] = None
+        self.meter_ids: List[str] = []
+
+    def _design(self, times: np.ndarray) -> np.ndarray:
+        """Features of every hour, shape (hours, 168 + 2 * harmonics)"""
+        x = np.zeros((len(times), HOURS_PER_WEEK + 2 * self.harmonics))
+        x[np.arange(len(times)), hour_of_week(times, self.utc_offset_hours)] = 1.0
+        if self.harmonics:
+            days = np.asarray(times, dtype='datetime64[s]').astype(np.int64) / 86400.0
+            angle = 2 * np.pi * days[:, None] / 365.25 * np.arange(1, self.harmonics + 1)
+            x[:, HOURS_PER_WEEK::2] = np.sin(angle)
+            x[:, HOURS_PER_WEEK + 1::2] = np.cos(angle)
+        return x
+
+    def fit(self, times: np.ndarray, loads: np.ndarray, meter_ids: Optional[List[Union[int, str]]] = None):
+        """
+        Fit every meter's model.
+
+        Args:
+            times: datetime64 hourly index, shape (hours,)
+            loads: kWh per hour, shape (meters, hours), NaN where missing
+            meter_ids: IDs of the meters, in row order
+
+        Returns:
+            self
+        """
+        loads = np.atleast_2d(loads)
+        span_days = (times[-1] - times[0]).astype('timedelta64[D]').astype(np.int64) if len(times) else 0
+        self.harmonics = self.annual_harmonics if span_days >= MIN_ANNUAL_DAYS else 0
+        week = np.zeros((len(times), HOURS_PER_WEEK))
+        week[np.arange(len(times)), hour_of_week(times, self.utc_offset_hours)] = 1.0
+        x = self._design(times)
+        gram = x.T @ x + self.alpha * len(times) * np.eye(x.shape[1])
+
+        levels, coefs, peak_ratios = [], [], []
+        for lo in range(0, len(loads), self.chunk_size):
+            chunk = np.asarray(loads[lo:lo + self.chunk_size], dtype=np.float64)
+            mask = np.isfinite(chunk)
+            # Fill gaps with the meter's own hour-of-week mean (its overall mean where a slot is never seen)
+            sums = np.where(mask, chunk, 0.0) @ week
+            counts = mask.astype(np.float64) @ week
+            overall = sums.sum(axis=1, keepdims=True) / np.maximum(counts.sum(axis=1, keepdims=True), 1)
+            profile = np.where(counts > 0, sums / np.maximum(counts, 1), overall)
+            filled = np.where(mask, chunk, profile @ week.T)
+            # Shrink towards the meter's mean level rather than towards zero
+            level = filled.mean(axis=1)
+            coef = np.linalg.solve(gram, x.T @ (filled - level[:, None]).T)
+            fitted_peak = (x @ coef + level).max(axis=0)
+            observed_peak = np.where(mask, chunk, 0.0).max(axis=1)
+            levels.append(level)
+            coefs.append(coef)
+            ratio = observed_peak / np.maximum(fitted_peak, 1e-12)
+            peak_ratios.append(np.where(fitted_peak > 0, np.maximum(ratio, 1.0), 1.0))
+
+        self.level = np.concatenate(levels) if levels else np.zeros(0)
+        self.coef = np.concatenate(coefs, axis=1) if coefs else np.zeros((x.shape[1], 0))
+        self.peak_ratio = np.concatenate(peak_ratios) if peak_ratios else np.zeros(0)
+        self.meter_ids = [str(m) for m in (meter_ids if meter_ids is not None else range(len(loads)))]
+        return self
+
+    def predict(self, times: np.ndarray, dtype=np.float64) -> np.ndarray:
+        """Forecast kWh per hour of every fitted meter, shape (meters, hours)"""
+        if self.coef is None:
+            raise ValueError("Forecaster is not fitted")
+        x = self._design(times)
+        out = np.empty((len(self.level), len(times)), dtype=dtype)
+        for lo in range(0, len(self.level), self.chunk_size):
+            hi = lo + self.chunk_size
+            out[lo:hi] = np.maximum(x @ self.coef[:, lo:hi] + self.level[lo:hi], 0.0).T
+        return out
+
+    def forecast(self, start: Union[str, np.datetime64], hours: int = 8760) -> LoadForecast:
+        """Forecast ``hours`` hours from ``start`` for every fitted meter"""
+        times = hourly_index(start, hours)
+        return LoadForecast(self.meter_ids, times, self.predict(times, dtype=np.float32), self.peak_ratio)
+
+
+def history_matrix(
+    cache: MeterSeriesCache,
+    meter_ids: List[Union[int, str]],
+    *,
+    days: int = 365,
+    end: Union[str, np.datetime64, None] = None,
+    metric: str = 'consumptionKWh',
+) -> Dict[str, Any]:
+    """
+    Align cached meter histories on one hourly grid.
+
+    Args:
+        cache: Cache holding the meter series (meter datasets are keyed by meter ID)
+        meter_ids: Meters to align
+        days: Length of the window
+        end: Exclusive end of the window (default: after the latest cached reading)
+        metric: Metric aligned, one of METRICS
+
+    Returns:
+        Dict with 'times' (hours,), 'loads' (meters, hours) with NaN where a meter has no reading,
+        and 'meter_ids' of the rows
+    """
+    levels = [cache.get(meter_id).pyramids[metric].levels['hour'] for meter_id in meter_ids]
+    if end is None:
+        latest = [level.start[-1] for level in levels if len(level)]
+        end = max(latest) + np.timedelta64(3600, 's') if latest else np.datetime64('today', 'h')
+    end = np.datetime64(end, 'h')
+    times = hourly_index(end - np.timedelta64(days * 24, 'h'), days * 24)
+    loads = np.full((len(meter_ids), len(times)), np.nan)
+    for row, level in enumerate(levels):
+        lo, hi = np.searchsorted(level.start, [times[0], times[-1] + np.timedelta64(3600, 's')])
+        if hi > lo:
+            columns = ((level.start[lo:hi] - times[0]) // np.timedelta64(3600, 's')).astype(np.int64)
+            loads[row, columns] = level.total[lo:hi]
+    return {"times": times, "loads": loads, "meter_ids": [str(m) for m in meter_ids]}
+
+
+def forecast_meters(
+    cache: MeterSeriesCache,
+    meter_ids: List[Union[int, str]],
+    *,
+    days: int = 365,
+    hours: int = 8760,
+    forecaster: Optional[LoadForecaster] = None,
+) -> LoadForecast:
+    """
+    Forecast the hourly load of many meters from their cached histories, in one batch.
+
+    Args:
+        cache: Cache holding the meter series
+        meter_ids: Meters to forecast
+        days: History window fitted
+        hours: Hours forecast, starting right after the window
+        forecaster: Forecaster to fit (default: LoadForecaster())
+
+    Returns:
+        The forecast of every meter
+    """
+    history = history_matrix(cache, meter_ids, days=days)
+    forecaster = forecaster or LoadForecaster()
+    forecaster.fit(history["times"], history["loads"], history["meter_ids"])
+    return forecaster.forecast(history["times"][-1] + np.timedelta64(3600, 's'), hours)
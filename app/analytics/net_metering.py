@@ -0,0 +1,335 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, List, Tuple, Union
+
+import numpy as np
+
+from app.analytics.series_cache import MeterSeries, MeterSeriesCache
+from app.analytics.solar import PVSystem, hourly_index, pv_production, synthetic_clearness
+from app.analytics.tariffs import NET_METERING_RULES, TARIFFS, NetMeteringRule, Tariff, bill_savings
+from app.utils.logging_config import get_logger
+from app.world_engine_apis.meter_client import MeterClient
+
+logger = get_logger('NetMetering')
+
+# Yearly consumption assumed for a household without meter history
+DEFAULT_ANNUAL_KWH = 6000.0
+# Location of meters created without one (see MeterClient.create_meter)
+DEFAULT_LOCATION = (37.7749, -122.4194)
+
+
+@dataclass
+class NetMeteringResult:
+    """
+    Yearly totals of a batch of households (one entry per household), plus
+    the hourly series when they were kept.
+    """
+    consumption_kwh: np.ndarray
+    production_kwh: np.ndarray
+    import_kwh: np.ndarray
+    export_kwh: np.ndarray
+    hourly_import: Optional[np.ndarray] = None
+    hourly_export: Optional[np.ndarray] = None
+
+    @property
+    def self_consumed_kwh(self) -> np.ndarray:
+        return self.production_kwh - self.export_kwh
+
+    @property
+    def production_load_factor(self) -> np.ndarray:
+        """Production relative to consumption, the ratio stored on the meter"""
+        return np.round(self.production_kwh / np.maximum(self.consumption_kwh, 1e-9), 4)
+
+
+def _month_hour(times: np.ndarray) -> np.ndarray:
+    """Month (0-11) * 24 + UTC hour of day of every timestamp"""
+    month = times.astype('datetime64[M]').astype(np.int64) % 12
+    hour = (times - times.astype('datetime64[D]')).astype('timedelta64[h]').astype(np.int64)
+    return month * 24 + hour
+
+
+def typical_load_profile(
+    times: np.ndarray,
+    longitude: float = 0.0,
+    annual_kwh: float = DEFAULT_ANNUAL_KWH
+) -> np.ndarray:
+    """
+    Synthetic residential load: morning and evening peaks in local solar
+    time, slightly higher in winter, scaled to ``annual_kwh`` per year.
+
+    Args:
+        times: datetime64 UTC start of every hour
+        longitude: Longitude of the household, to place the peaks in local time
+        annual_kwh: Yearly consumption
+
+    Returns:
+        kWh consumed in every hour
+    """
+    utc_hours = (times - times.astype('datetime64[D]')).astype('timedelta64[h]').astype(np.float64)
+    local = (utc_hours + 0.5 + longitude / 15.0) % 24
+    daily = 0.5 + 0.6 * np.exp(-((local - 8) / 1.5) ** 2) + 1.0 * np.exp(-((local - 20) / 2.5) ** 2)
+    day_of_year = (times.astype('datetime64[D]') - times.astype('datetime64[Y]')).astype(np.float64)
+    seasonal = 1 + 0.15 * np.cos(2 * np.pi * (day_of_year - 15) / 365)
+    profile = daily * seasonal
+    return profile * annual_kwh / (profile.mean() * 8760)
+
+
+def load_from_history(series: MeterSeries, times: np.ndarray, longitude: float = 0.0) -> np.ndarray:
+    """
+    Hourly load for ``times`` from a meter's history: the mean kWh of the
+    same month and hour of day, falling back to the hour of day over the
+    whole history for months without readings, and to the typical profile
+    when there is no history at all.
+
+    Args:
+        series: Cached series of the meter
+        times: datetime64 UTC start of every hour
+        longitude: Longitude of the household, for the fallback profile
+
+    Returns:
+        kWh consumed in every hour
+    """
+    hourly = series.pyramids['consumptionKWh'].query(resolution='hour', percentiles=())
+    if not len(hourly['start']) or not hourly['sum'].any():
+        return typical_load_profile(times, longitude)
+    keys = _month_hour(hourly['start'])
+    totals = np.bincount(keys, hourly['sum'], minlength=12 * 24)
+    counts = np.bincount(keys, minlength=12 * 24)
+    by_hour = np.bincount(keys % 24, hourly['sum'], minlength=24) / np.maximum(np.bincount(keys % 24, minlength=24), 1)
+    profile = np.where(counts > 0, totals / np.maximum(counts, 1), np.tile(by_hour, 12))
+    return profile[_month_hour(times)]
+
+
+def simulate_net_metering(load: np.ndarray, production: np.ndarray, *, keep_hourly: bool = False) -> NetMeteringResult:
+    """
+    Hourly import/export of households under net metering.
+
+    Args:
+        load: kWh consumed, shape (households, hours)
+        production: kWh produced, same shape
+        keep_hourly: Keep the hourly import/export arrays in the result
+
+    Returns:
+        Yearly totals per household (and the hourly series when kept)
+    """
+    net = load - production
+    imported = np.maximum(net, 0.0)
+    exported = np.maximum(-net, 0.0)
+    return NetMeteringResult(
+        consumption_kwh=load.sum(axis=1),
+        production_kwh=production.sum(axis=1),
+        import_kwh=imported.sum(axis=1),
+        export_kwh=exported.sum(axis=1),
+        hourly_import=imported if keep_hourly else None,
+        hourly_export=exported if keep_hourly else None,
+    )
+
+
+class NetMeteringSimulator:
+    """
+    Simulates PV systems against household load for a whole fleet and
+    stores the resulting production load factor on each meter.
+
+    Households are processed in chunks so memory stays bounded however
+    large the fleet is; within a chunk everything is one (households, 8760)
+    NumPy computation.
+    """
+
+    def __init__(
+        self,
+        meter_client: Optional[MeterClient] = None,
+        series_cache: Optional[MeterSeriesCache] = None,
+        *,
+        chunk_size: int = 2048,
+        max_workers: int = 8,
+    ):
+        """
+        Initialize the simulator.
+
+        Args:
+            meter_client: Client used to read meter locations and update load factors
+            series_cache: Cache of meter histories (meter datasets are keyed by meter ID)
+            chunk_size: Households simulated per NumPy batch
+            max_workers: Concurrent meter updates
+        """
+        self.meter_client = meter_client or MeterClient()
+        self.series_cache = series_cache or MeterSeriesCache(self.meter_client)
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+
+    def meter_location(self, meter_id: Union[int, str, None]) -> Tuple[float, float]:
+        """Latitude and longitude of a meter (the default location if it has none)"""
+        if meter_id is None:
+            return DEFAULT_LOCATION
+        meter = self.meter_client.get_meter_by_id(meter_id, projection="location").get('data') or {}
+        if meter.get('latitude') is None or meter.get('longitude') is None:
+            return DEFAULT_LOCATION
+        return float(meter['latitude']), float(meter['longitude'])
+
+    def household_load(self, meter_id: Union[int, str], times: np.ndarray, longitude: float = 0.0) -> np.ndarray:
+        """Hourly load of a meter from its cached history (typical profile if it has none)"""
+        series = self.series_cache.get(meter_id)
+        if not len(series.timestamps):
+            try:
+                series = self.series_cache.refresh(meter_id)
+            except Exception as e:
+                logger.info("No history for meter %s, using the typical profile: %s", meter_id, e)
+        return load_from_history(series, times, longitude)
+
+    def simulate(
+        self,
+        households: List[Tuple[Union[int, str], PVSystem]],
+        *,
+        start: Union[str, np.datetime64, None] = None,
+        loads: Optional[np.ndarray] = None,
+        clearness: Union[float, np.ndarray, None] = None,
+        keep_hourly: bool = False,
+    ) -> NetMeteringResult:
+        """
+        Simulate a year of net metering for many households.
+
+        Args:
+            households: ``(meter_id, system)`` pairs
+            start: First hour of the simulated year (default: start of the current year)
+            loads: Hourly load per household, shape (households, 8760); built from history when omitted
+            clearness: Sky clearness, scalar or per hour (default: synthetic weather)
+            keep_hourly: Keep the hourly import/export arrays
+
+        Returns:
+            Totals per household, in the order of ``households``
+        """
+        times = hourly_index(start if start is not None else np.datetime64('today', 'Y'))
+        if clearness is None:
+            clearness = synthetic_clearness(times)
+        results = []
+        for lo in range(0, len(households), self.chunk_size):
+            chunk = households[lo:lo + self.chunk_size]
+            systems = [system for _, system in chunk]
+            if loads is not None:
+                load = loads[lo:lo + len(chunk)]
+            else:
+                load = np.stack([
+                    self.household_load(meter_id, times, system.longitude) for meter_id, system in chunk
+                ])
+            results.append(simulate_net_metering(load, pv_production(systems, times, clearness),
+                                                 keep_hourly=keep_hourly))
+        if not results:
+            return simulate_net_metering(np.zeros((0, len(times))), np.zeros((0, len(times))))
+
+        def join(name: str) -> Optional[np.ndarray]:
+            parts = [getattr(r, name) for r in results]
+            return None if parts[0] is None else np.concatenate(parts)
+        return NetMeteringResult(**{name: join(name) for name in NetMeteringResult.__dataclass_fields__})
+
+    def apply(
+        self,
+        households: List[Tuple[Union[int, str], PVSystem]],
+        **kwargs
+    ) -> Dict[str, Union[float, Exception]]:
+        """
+        Simulate households and store their production load factor on their meters.
+
+        Args:
+            households: ``(meter_id, system)`` pairs
+            **kwargs: Passed to ``simulate``
+
+        Returns:
+            Meter ID -> stored production load factor, or the exception that failed its update
+        """
+        result = self.simulate(households, **kwargs)
+
+        def update_one(entry: Tuple[Union[int, str], float]) -> Union[float, Exception]:
+            meter_id, factor = entry
+            try:
+                self.meter_client.update_meter(meter_id, {"productionLoadFactor": factor})
+                return factor
+            except Exception as e:
+                logger.warning("Updating the production load factor of meter %s failed: %s", meter_id, e)
+                return e
+
+        entries = [(meter_id, float(f)) for (meter_id, _), f in zip(households, result.production_load_factor)]
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='net-metering') as pool:
+            updates = list(pool.map(update_one, entries))
+        return {str(meter_id): outcome for (meter_id, _), outcome in zip(entries, updates)}
+
+    def apply_purchase(self, meter_id: Union[int, str], capacity_kw: float, **system) -> Dict[str, Any]:
+        """
+        Simulate a purchased system on a household's meter and store its production load factor.
+
+        Args:
+            meter_id: Meter of the household
+            capacity_kw: Capacity of the purchased system
+            **system: Other PVSystem fields (tilt_deg, azimuth_deg, performance_ratio)
+
+        Returns:
+            Yearly consumption, production, import, export and the stored production load factor
+        """
+        latitude, longitude = self.meter_location(meter_id)
+        pv = PVSystem(capacity_kw=capacity_kw, latitude=latitude, longitude=longitude, **system)
+        result = self.simulate([(meter_id, pv)])
+        factor = float(result.production_load_factor[0])
+        self.meter_client.update_meter(meter_id, {"productionLoadFactor": factor})
+        logger.info("Meter %s: %.1f kWp system, production load factor %.4f", meter_id, capacity_kw, factor)
+        return {
+            "consumption_kwh": round(float(result.consumption_kwh[0]), 1),
+            "production_kwh": round(float(result.production_kwh[0]), 1),
+            "import_kwh": round(float(result.import_kwh[0]), 1),
+            "export_kwh": round(float(result.export_kwh[0]), 1),
+            "production_load_factor": factor,
+        }
+
+    def bill_impact(
+        self,
+        meter_id: Union[int, str, None],
+        candidates: Dict[str, float],
+        *,
+        prices: Optional[Dict[str, float]] = None,
+        tariff: Union[str, Tariff] = 'tou',
+        rule: Union[str, NetMeteringRule] = 'net_metering',
+        start: Union[str, np.datetime64, None] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Yearly bill impact of candidate systems for one household, all evaluated in one batch.
+
+        Args:
+            meter_id: Meter of the household (None: typical household at the default location)
+            candidates: Candidate ID (e.g. catalog item ID) -> capacity in kW
+            prices: Candidate ID -> purchase price, for the simple payback
+            tariff: TARIFFS preset name or a tariff
+            rule: NET_METERING_RULES preset name or a rule
+            start: First hour of the simulated year (default: start of the current year)
+
+        Returns:
+            Candidate ID -> bill before/after, yearly savings, import/export and payback years
+        """
+        if not candidates:
+            return {}
+        tariff = TARIFFS[tariff] if isinstance(tariff, str) else tariff
+        rule = NET_METERING_RULES[rule] if isinstance(rule, str) else rule
+        times = hourly_index(start if start is not None else np.datetime64('today', 'Y'))
+        latitude, longitude = self.meter_location(meter_id)
+        if meter_id is None:
+            load = typical_load_profile(times, longitude)
+        else:
+            load = self.household_load(meter_id, times, longitude)
+        ids = list(candidates)
+        systems = [PVSystem(capacity_kw=candidates[i], latitude=latitude, longitude=longitude) for i in ids]
+        production = pv_production(systems, times, synthetic_clearness(times))
+        result = bill_savings(load[None, :], production, times, tariff, rule)
+
+        impact = {}
+        for j, candidate in enumerate(ids):
+            savings = float(result['savings'][0, j])
+            price = (prices or {}).get(candidate)
+            impact[candidate] = {
+                "capacity_kw": candidates[candidate],
+                "yearly_bill_before": round(float(result['bill_before'][0]), 2),
+                "yearly_bill_after": round(float(result['bill_after'][0, j]), 2),
+                "yearly_savings": round(savings, 2),
+                "monthly_savings": round(savings / 12, 2),
+                "production_kwh": round(float(production[j].sum()), 1),
+                "import_kwh": round(float(result['import_kwh'][0, j]), 1),
+                "export_kwh": round(float(result['export_kwh'][0, j]), 1),
+                "payback_years": round(price / savings, 1) if price and savings > 0 else None,
+            }
+        return impact
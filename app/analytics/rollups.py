@@ -0,0 +1,317 @@
+from typing import Dict, Any, Optional, List, Sequence, Union
+
+import numpy as np
+
+# Resolutions of the pyramid, finest first, as numpy datetime64 units
+LEVELS: List[str] = ['hour', 'day', 'month']
+_UNITS = {'hour': 'h', 'day': 'D', 'month': 'M'}
+# Levels keeping a histogram per bucket. Meter datasets hold one reading per
+# hour, so an hourly histogram would cost 129 counters per reading while its
+# percentiles are just the reading itself.
+HISTOGRAM_LEVELS = ('day', 'month')
+
+# Log-spaced histogram shared by every bucket, so histograms merge by addition.
+# Bin 0 holds values below HIST_MIN (zero readings); the relative width of
+# the other bins (and so the percentile error) is 10 ** (1 / BINS_PER_DECADE).
+HIST_MIN = 1e-4
+HIST_DECADES = 8
+BINS_PER_DECADE = 16
+HIST_BINS = 1 + HIST_DECADES * BINS_PER_DECADE
+HIST_DTYPE = np.uint32
+_EDGES = HIST_MIN * 10 ** (np.arange(HIST_DECADES * BINS_PER_DECADE + 1) / BINS_PER_DECADE)
+
+
+def histogram_bins(values: np.ndarray) -> np.ndarray:
+    """Histogram bin of every value"""
+    bins = np.searchsorted(_EDGES, np.abs(values), side='right')
+    return np.minimum(bins, HIST_BINS - 1)
+
+
+def parse_timestamps(timestamps: Sequence[str]) -> np.ndarray:
+    """Parse ISO-8601 timestamps (``2027-02-18T18:52:07.488Z``) to datetime64[s]"""
+    return np.array([t.rstrip('Z') for t in timestamps], dtype='datetime64[ms]').astype('datetime64[s]')
+
+
+class RollupLevel:
+    """
+    Aggregates of a series at one resolution, one row per non-empty bucket.
+
+    Every statistic is mergeable (count, sum, min, max, histogram), so a
+    coarser level is built from a finer one and new readings are merged
+    into existing buckets without revisiting the raw points. A level built
+    with ``histogram=False`` keeps no histogram (``hist`` is None).
+    """
+
+    def __init__(self, unit: str, start=None, count=None, total=None, low=None, high=None, hist=None, *,
+                 histogram: bool = True):
+        self.unit = unit
+        self.start = np.asarray(start if start is not None else [], dtype='datetime64[s]')
+        self.count = np.asarray(count if count is not None else [], dtype=np.int64)
+        self.total = np.asarray(total if total is not None else [], dtype=np.float64)
+        self.low = np.asarray(low if low is not None else [], dtype=np.float64)
+        self.high = np.asarray(high if high is not None else [], dtype=np.float64)
+        self.hist = None
+        if histogram:
+            hist = hist if hist is not None else np.zeros((len(self.start), HIST_BINS))
+            self.hist = np.asarray(hist, dtype=HIST_DTYPE)
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    @classmethod
+    def from_points(cls, unit: str, timestamps: np.ndarray, values: np.ndarray, *,
+                    histogram: bool = True) -> 'RollupLevel':
+        """
+        Aggregate raw points into buckets.
+
+        Args:
+            unit: numpy datetime64 unit of the buckets ('h', 'D' or 'M')
+            timestamps: datetime64 timestamps of the points
+            values: Values of the points
+            histogram: Whether to keep a histogram per bucket
+
+        Returns:
+            The level
+        """
+        if len(values) == 0:
+            return cls(unit, histogram=histogram)
+        keys = timestamps.astype(f'datetime64[{unit}]')
+        order = np.argsort(keys, kind='stable')
+        keys, values = keys[order], np.asarray(values, dtype=np.float64)[order]
+        starts, first = np.unique(keys, return_index=True)
+        hist = None
+        if histogram:
+            hist = np.zeros((len(starts), HIST_BINS), dtype=HIST_DTYPE)
+            rows = np.repeat(np.arange(len(starts)), np.diff(np.append(first, len(keys))))
+            np.add.at(hist, (rows, histogram_bins(values)), 1)
+        return cls(
+            unit,
+            starts.astype('datetime64[s]'),
+            np.diff(np.append(first, len(keys))),
+            np.add.reduceat(values, first),
+            np.minimum.reduceat(values, first),
+            np.maximum.reduceat(values, first),
+            hist,
+            histogram=histogram,
+        )
+
+    def coarsen(self, unit: str) -> 'RollupLevel':
+        """Merge this level's buckets into the coarser buckets of ``unit``"""
+        return self._regroup(unit, self.start, self.count, self.total, self.low, self.high, self.hist)
+
+    def merge(self, other: 'RollupLevel') -> 'RollupLevel':
+        """
+        Merge the buckets of another level of the same unit into this one.
+
+        New data normally only touches the last bucket, so when ``other``
+        starts at or after this level's last bucket only that tail is
+        re-aggregated; out-of-order data falls back to a full regroup.
+        """
+        if len(other) == 0:
+            return self
+        if len(self) == 0:
+            return other
+        keep = len(self) - 1 if other.start[0] >= self.start[-1] else 0
+        histogram = self.hist is not None
+        tail = self._regroup(
+            self.unit,
+            np.concatenate([self.start[keep:], other.start]),
+            np.concatenate([self.count[keep:], other.count]),
+            np.concatenate([self.total[keep:], other.total]),
+            np.concatenate([self.low[keep:], other.low]),
+            np.concatenate([self.high[keep:], other.high]),
+            np.concatenate([self.hist[keep:], other.hist]) if histogram else None,
+        )
+        return RollupLevel(
+            self.unit,
+            np.concatenate([self.start[:keep], tail.start]),
+            np.concatenate([self.count[:keep], tail.count]),
+            np.concatenate([self.total[:keep], tail.total]),
+            np.concatenate([self.low[:keep], tail.low]),
+            np.concatenate([self.high[:keep], tail.high]),
+            np.concatenate([self.hist[:keep], tail.hist]) if histogram else None,
+            histogram=histogram,
+        )
+
+    @classmethod
+    def _regroup(cls, unit, start, count, total, low, high, hist) -> 'RollupLevel':
+        keys = start.astype(f'datetime64[{unit}]')
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        starts, first = np.unique(keys, return_index=True)
+        return cls(
+            unit,
+            starts.astype('datetime64[s]'),
+            np.add.reduceat(count[order], first),
+            np.add.reduceat(total[order], first),
+            np.minimum.reduceat(low[order], first),
+            np.maximum.reduceat(high[order], first),
+            np.add.reduceat(hist[order], first, axis=0) if hist is not None else None,
+            histogram=hist is not None,
+        )
+
+    def percentile(self, q: float, rows: slice = slice(None)) -> np.ndarray:
+        """
+        Approximate a percentile of every bucket from its histogram.
+
+        Args:
+            q: Percentile in [0, 100]
+            rows: Buckets to compute it for
+
+        Returns:
+            One value per bucket, clipped to the bucket's exact min/max. Without a
+            histogram it is only known for single-reading buckets (NaN elsewhere).
+        """
+        if self.hist is None:
+            return np.where(self.count[rows] == 1, self.low[rows], np.nan)
+        hist = self.hist[rows]
+        if len(hist) == 0:
+            return np.empty(0)
+        cumulative = np.cumsum(hist, axis=1)
+        target = np.maximum(1, np.ceil(cumulative[:, -1] * q / 100.0))
+        bins = (cumulative < target[:, None]).sum(axis=1)
+        # Geometric centre of the bin; the zero bin maps to 0
+        upper = _EDGES[np.minimum(bins, len(_EDGES) - 1)]
+        lower = np.where(bins > 0, _EDGES[np.maximum(bins - 1, 0)], 0.0)
+        estimate = np.where(bins > 0, np.sqrt(lower * upper), 0.0)
+        return np.clip(estimate, self.low[rows], self.high[rows])
+
+    def to_arrays(self, prefix: str) -> Dict[str, np.ndarray]:
+        """Arrays to persist this level under ``prefix``"""
+        arrays = {
+            f'{prefix}start': self.start.astype(np.int64),
+            f'{prefix}count': self.count,
+            f'{prefix}total': self.total,
+            f'{prefix}low': self.low,
+            f'{prefix}high': self.high,
+        }
+        if self.hist is not None:
+            arrays[f'{prefix}hist'] = self.hist
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, unit: str, arrays: Any, prefix: str, *, histogram: bool = True) -> 'RollupLevel':
+        """Restore a level persisted by ``to_arrays``"""
+        return cls(
+            unit,
+            arrays[f'{prefix}start'].astype('datetime64[s]'),
+            arrays[f'{prefix}count'],
+            arrays[f'{prefix}total'],
+            arrays[f'{prefix}low'],
+            arrays[f'{prefix}high'],
+            arrays[f'{prefix}hist'] if histogram else None,
+            histogram=histogram,
+        )
+
+
+class RollupPyramid:
+    """
+    Hourly, daily and monthly rollups of one series, maintained incrementally.
+
+    Each level is built from the level below it (the first histogram level
+    from the raw readings), and ``append`` only merges the aggregates of the
+    new readings into the trailing buckets, so a range query at any
+    resolution reads O(buckets returned) instead of O(raw points). Readings
+    older than the last bucket are merged too, at the cost of a full regroup.
+    """
+
+    def __init__(self, levels: Optional[Dict[str, RollupLevel]] = None):
+        self.levels: Dict[str, RollupLevel] = levels or {
+            name: RollupLevel(_UNITS[name], histogram=name in HISTOGRAM_LEVELS) for name in LEVELS
+        }
+
+    @classmethod
+    def from_points(cls, timestamps: np.ndarray, values: np.ndarray) -> 'RollupPyramid':
+        """Build the pyramid of a raw series"""
+        pyramid = cls()
+        pyramid.append(timestamps, values)
+        return pyramid
+
+    def append(self, timestamps: np.ndarray, values: np.ndarray) -> None:
+        """
+        Merge new raw readings into every level.
+
+        Args:
+            timestamps: datetime64 timestamps of the readings
+            values: Values of the readings
+        """
+        if len(values) == 0:
+            return
+        timestamps = np.asarray(timestamps, dtype='datetime64[s]')
+        partial = None
+        for name in LEVELS:
+            histogram = name in HISTOGRAM_LEVELS
+            if partial is None or (histogram and partial.hist is None):
+                partial = RollupLevel.from_points(_UNITS[name], timestamps, values, histogram=histogram)
+            else:
+                partial = partial.coarsen(_UNITS[name])
+            self.levels[name] = self.levels[name].merge(partial)
+
+    def choose_level(self, start: np.datetime64, end: np.datetime64, max_points: int) -> str:
+        """Finest level with at most ``max_points`` buckets in ``[start, end)``"""
+        for name in LEVELS:
+            level = self.levels[name]
+            lo, hi = np.searchsorted(level.start, [start, end])
+            if hi - lo <= max_points:
+                return name
+        return LEVELS[-1]
+
+    def query(
+        self,
+        start: Optional[Union[str, np.datetime64]] = None,
+        end: Optional[Union[str, np.datetime64]] = None,
+        *,
+        resolution: str = 'auto',
+        max_points: int = 500,
+        percentiles: Sequence[float] = (50, 95),
+    ) -> Dict[str, np.ndarray]:
+        """
+        Get the buckets of a time range at one resolution.
+
+        Args:
+            start: Inclusive start (default: beginning of the series)
+            end: Exclusive end (default: end of the series)
+            resolution: 'hour', 'day', 'month' or 'auto' (finest with <= max_points buckets)
+            max_points: Bucket budget of the 'auto' resolution
+            percentiles: Percentiles to estimate per bucket
+
+        Returns:
+            Dict with 'resolution', 'start', 'count', 'sum', 'min', 'max', 'mean' and 'p<q>' arrays
+        """
+        start = np.datetime64(start, 's') if start is not None else np.datetime64('0001-01-01', 's')
+        end = np.datetime64(end, 's') if end is not None else np.datetime64('9999-01-01', 's')
+        if resolution == 'auto':
+            resolution = self.choose_level(start, end, max_points)
+        if resolution not in self.levels:
+            raise ValueError(f"Resolution must be one of {LEVELS + ['auto']}")
+
+        level = self.levels[resolution]
+        lo, hi = np.searchsorted(level.start, [start, end])
+        rows = slice(lo, hi)
+        result = {
+            'resolution': resolution,
+            'start': level.start[rows],
+            'count': level.count[rows],
+            'sum': level.total[rows],
+            'min': level.low[rows],
+            'max': level.high[rows],
+            'mean': level.total[rows] / np.maximum(level.count[rows], 1),
+        }
+        for q in percentiles:
+            result[f'p{q:g}'] = level.percentile(q, rows)
+        return result
+
+    def to_arrays(self, prefix: str = '') -> Dict[str, np.ndarray]:
+        """Arrays to persist the pyramid (e.g. with ``np.savez_compressed``)"""
+        arrays = {}
+        for name in LEVELS:
+            arrays.update(self.levels[name].to_arrays(f'{prefix}{name}_'))
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays: Any, prefix: str = '') -> 'RollupPyramid':
+        """Restore a pyramid persisted by ``to_arrays``"""
+        return cls({
+            name: RollupLevel.from_arrays(_UNITS[name], arrays, f'{prefix}{name}_', histogram=name in HISTOGRAM_LEVELS)
+            for name in LEVELS
+        })
@@ -0,0 +1,180 @@
+import os
+import tempfile
+import threading
+from typing import Dict, Any, Optional, List, Union
+
+import numpy as np
+
+from app.analytics.rollups import RollupPyramid, parse_timestamps
+from app.world_engine_apis.meter_client import MeterClient
+
+# Reading fields kept from a meter dataset
+METRICS: List[str] = ['consumptionKWh', 'productionKWh']
+
+
+class MeterSeries:
+    """Raw readings of one meter dataset plus the rollup pyramid of every metric"""
+
+    def __init__(self, timestamps: np.ndarray, values: Dict[str, np.ndarray], pyramids: Dict[str, RollupPyramid]):
+        self.timestamps = timestamps
+        self.values = values
+        self.pyramids = pyramids
+
+    @classmethod
+    def empty(cls) -> 'MeterSeries':
+        return cls(
+            np.empty(0, dtype='datetime64[s]'),
+            {metric: np.empty(0) for metric in METRICS},
+            {metric: RollupPyramid() for metric in METRICS},
+        )
+
+    @property
+    def last_timestamp(self) -> Optional[np.datetime64]:
+        return self.timestamps[-1] if len(self.timestamps) else None
+
+    def append(self, readings: List[Dict[str, Any]]) -> int:
+        """
+        Add the readings whose timestamp is not cached yet, updating the pyramids.
+
+        Readings older than the last cached one (late arrivals) are inserted in
+        time order and merged into their past buckets. Streaming consumers such
+        as ``AnomalyMonitor`` only look at readings newer than the last one they
+        saw, so they skip late readings.
+
+        Args:
+            readings: Readings of a meter dataset (``timestamp`` + metric fields)
+
+        Returns:
+            Number of readings added
+        """
+        if not readings:
+            return 0
+        # Sorted, one reading per timestamp, skipping the timestamps already cached
+        timestamps, rows = np.unique(parse_timestamps([r['timestamp'] for r in readings]), return_index=True)
+        at = np.searchsorted(self.timestamps, timestamps)
+        inside = at < len(self.timestamps)
+        cached = np.zeros(len(timestamps), dtype=bool)
+        cached[inside] = self.timestamps[at[inside]] == timestamps[inside]
+        if cached.all():
+            return 0
+        timestamps, rows = timestamps[~cached], rows[~cached]
+        late = self.last_timestamp is not None and timestamps[0] < self.last_timestamp
+        order = np.argsort(np.concatenate([self.timestamps, timestamps]), kind='stable') if late else slice(None)
+        self.timestamps = np.concatenate([self.timestamps, timestamps])[order]
+        for metric in METRICS:
+            values = np.array([float(readings[row].get(metric) or 0.0) for row in rows])
+            self.values[metric] = np.concatenate([self.values[metric], values])[order]
+            self.pyramids[metric].append(timestamps, values)
+        return len(timestamps)
+
+
+class MeterSeriesCache:
+    """
+    On-disk cache of meter dataset series with their rollup pyramids.
+
+    Each dataset is stored as one compressed ``.npz`` file holding the raw
+    readings and the hourly/daily/monthly rollups side by side. ``refresh``
+    fetches the dataset and only folds readings not cached yet into both.
+    """
+
+    def __init__(self, client: Optional[MeterClient] = None, directory: str = 'series_cache'):
+        """
+        Initialize the cache.
+
+        Args:
+            client: Client used to fetch meter datasets
+            directory: Directory the series files are written to
+        """
+        self.client = client or MeterClient()
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._series: Dict[str, MeterSeries] = {}
+
+    def _path(self, dataset_id: str) -> str:
+        return os.path.join(self.directory, f'{dataset_id}.npz')
+
+    def _load(self, dataset_id: str) -> MeterSeries:
+        path = self._path(dataset_id)
+        if not os.path.exists(path):
+            return MeterSeries.empty()
+        with np.load(path) as arrays:
+            return MeterSeries(
+                arrays['timestamps'].astype('datetime64[s]'),
+                {metric: arrays[f'raw_{metric}'] for metric in METRICS},
+                {metric: RollupPyramid.from_arrays(arrays, f'{metric}_') for metric in METRICS},
+            )
+
+    def _persist(self, dataset_id: str, series: MeterSeries) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        arrays = {'timestamps': series.timestamps.astype(np.int64)}
+        for metric in METRICS:
+            arrays[f'raw_{metric}'] = series.values[metric]
+            arrays.update(series.pyramids[metric].to_arrays(f'{metric}_'))
+        with tempfile.NamedTemporaryFile(dir=self.directory, suffix='.npz', delete=False) as tmp:
+            np.savez_compressed(tmp, **arrays)
+        os.replace(tmp.name, self._path(dataset_id))
+
+    def get(self, dataset_id: Union[int, str]) -> MeterSeries:
+        """
+        Get the cached series of a dataset (empty if it was never refreshed).
+
+        Args:
+            dataset_id: ID of the meter dataset
+
+        Returns:
+            The cached MeterSeries
+        """
+        dataset_id = str(dataset_id)
+        with self._lock:
+            series = self._series.get(dataset_id)
+            if series is None:
+                series = self._series[dataset_id] = self._load(dataset_id)
+            return series
+
+    def ingest(self, dataset_id: Union[int, str], readings: List[Dict[str, Any]]) -> int:
+        """
+        Fold readings into a dataset's cached series and pyramids.
+
+        Args:
+            dataset_id: ID of the meter dataset
+            readings: Readings as returned by ``get_meter_historical_data``
+
+        Returns:
+            Number of new readings
+        """
+        series = self.get(dataset_id)
+        with self._lock:
+            added = series.append(readings)
+            if added:
+                self._persist(str(dataset_id), series)
+        return added
+
+    def refresh(self, dataset_id: Union[int, str]) -> MeterSeries:
+        """
+        Fetch a dataset and fold its new readings into the cache.
+
+        Args:
+            dataset_id: ID of the meter dataset
+
+        Returns:
+            The updated MeterSeries
+        """
+        response = self.client.get_meter_historical_data(dataset_id)
+        self.ingest(dataset_id, response.get('data') or [])
+        return self.get(dataset_id)
+
+    def query(self, dataset_id: Union[int, str], metric: str = 'consumptionKWh', **kwargs) -> Dict[str, np.ndarray]:
+        """
+        Query the rollups of a cached dataset (see ``RollupPyramid.query``).
+
+        Args:
+            dataset_id: ID of the meter dataset
+            metric: One of METRICS
+            **kwargs: start, end, resolution, max_points, percentiles
+
+        Returns:
+            Buckets of the requested range and resolution
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Metric must be one of {METRICS}")
+        return self.get(dataset_id).pyramids[metric].query(**kwargs)
@@ -0,0 +1,194 @@
+import re
+from dataclasses import dataclass
+from typing import Optional, Sequence, Union
+
+import numpy as np
+
+from app.beckn_apis.beckn_models import Item
+
+SOLAR_CONSTANT = 1367.0  # W/m2
+
+_KW = re.compile(r'(\d+(?:\.\d+)?)\s*(k)?wp?\b', re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class PVSystem:
+    """
+    A rooftop PV system.
+
+    Attributes:
+        capacity_kw: DC nameplate capacity
+        latitude: Latitude in degrees
+        longitude: Longitude in degrees
+        tilt_deg: Panel tilt from horizontal
+        azimuth_deg: Panel azimuth from south, west positive (default: facing the equator)
+        performance_ratio: Fraction of the nameplate yield left after inverter, wiring, soiling and heat losses
+    """
+    capacity_kw: float
+    latitude: float
+    longitude: float
+    tilt_deg: float = 20.0
+    azimuth_deg: Optional[float] = None
+    performance_ratio: float = 0.8
+
+    @property
+    def facing(self) -> float:
+        """Azimuth from south in degrees, resolving the default"""
+        if self.azimuth_deg is not None:
+            return self.azimuth_deg
+        return 0.0 if self.latitude >= 0 else 180.0
+
+
+def capacity_kw(item: Item) -> Optional[float]:
+    """
+    Capacity of a catalog/order item in kW, from a capacity tag or its name (e.g. "5 kW Rooftop Kit").
+
+    Args:
+        item: The item
+
+    Returns:
+        The capacity, or None if the item does not state one
+    """
+    tags = item.tag_values()
+    candidates = [str(v) for k, v in tags.items() if 'capacity' in k.lower() or k.lower() in ('kw', 'kwp', 'size')]
+    for text in candidates + [item.name or '', item.descriptor.short_desc or '']:
+        match = _KW.search(text)
+        if match:
+            value = float(match.group(1))
+            return value if match.group(2) else value / 1000
+    # A bare number in a capacity tag is taken as kW
+    for text in candidates:
+        try:
+            return float(text)
+        except ValueError:
+            continue
+    return None
+
+
+def hourly_index(start: Union[str, np.datetime64], hours: int = 8760) -> np.ndarray:
+    """UTC start of ``hours`` consecutive hours as datetime64[s]"""
+    return np.datetime64(start, 'h').astype('datetime64[s]') + np.arange(hours) * np.timedelta64(3600, 's')
+
+
+def synthetic_clearness(times: np.ndarray, mean: float = 0.75, spread: float = 0.2, seed: int = 0) -> np.ndarray:
+    """
+    Synthetic daily sky clearness (fraction of clear-sky irradiance) for every hour.
+
+    Days follow an AR(1) process so cloudy and sunny spells last a few days;
+    the same seed gives the same weather, so fleet runs are reproducible.
+
+    Args:
+        times: datetime64 hours
+        mean: Mean clearness
+        spread: Standard deviation of the daily clearness
+        seed: Seed of the weather
+
+    Returns:
+        Clearness in [0.1, 1] for every hour
+    """
+    days = times.astype('datetime64[D]')
+    first = days.min() if len(days) else np.datetime64('1970-01-01')
+    day_index = (days - first).astype(np.int64)
+    n_days = int(day_index.max()) + 1 if len(days) else 0
+    noise = np.random.default_rng(seed).normal(0.0, spread * np.sqrt(1 - 0.6 ** 2), n_days)
+    daily = np.empty(n_days)
+    state = 0.0
+    for i in range(n_days):
+        state = 0.6 * state + noise[i]
+        daily[i] = state
+    return np.clip(mean + daily, 0.1, 1.0)[day_index]
+
+
+def _broadcast(values: Union[float, Sequence[float], np.ndarray]) -> np.ndarray:
+    """Per-system parameter as a column, so it broadcasts against (systems, hours)"""
+    return np.atleast_1d(np.asarray(values, dtype=np.float64))[:, None]
+
+
+def pv_production(
+    systems: Sequence[PVSystem],
+    times: np.ndarray,
+    clearness: Union[float, np.ndarray] = 1.0,
+    albedo: float = 0.2,
+) -> np.ndarray:
+    """
+    Hourly AC energy of many PV systems at once.
+
+    Sun position follows the NOAA approximation, clear-sky irradiance the
+    Haurwitz model scaled by ``clearness``, the diffuse split the Erbs
+    correlation, and plane-of-array irradiance the isotropic-sky model.
+    Every step is evaluated on a (geometries, hours) array; systems sharing a
+    geometry (location rounded to ~1 km, tilt, azimuth, losses) share one
+    per-kWp profile, so a fleet in one city costs a handful of rows.
+
+    Args:
+        systems: The systems
+        times: datetime64 UTC start of every hour
+        clearness: Fraction of clear-sky irradiance, scalar or per hour
+        albedo: Ground reflectance
+
+    Returns:
+        kWh produced by every system in every hour, shape (len(systems), len(times))
+    """
+    if not systems:
+        return np.zeros((0, len(times)))
+    geometry = np.array([
+        (round(s.latitude, 2), round(s.longitude, 2), s.tilt_deg, s.facing, s.performance_ratio) for s in systems
+    ])
+    geometry, inverse = np.unique(geometry, axis=0, return_inverse=True)
+    per_kw = _yield_per_kw(geometry, np.asarray(times, dtype='datetime64[s]'), clearness, albedo)
+    return _broadcast([s.capacity_kw for s in systems]) * per_kw[inverse.ravel()]
+
+
+def _yield_per_kw(
+    geometry: np.ndarray,
+    times: np.ndarray,
+    clearness: Union[float, np.ndarray],
+    albedo: float
+) -> np.ndarray:
+    """Hourly kWh per kWp of every (latitude, longitude, tilt, facing, performance ratio) row"""
+    lat = np.radians(geometry[:, 0:1])
+    lon = geometry[:, 1:2]
+    tilt = np.radians(geometry[:, 2:3])
+    facing = np.radians(geometry[:, 3:4])
+    ratio = geometry[:, 4:5]
+
+    # Sun position at the middle of each hour
+    middle = times + np.timedelta64(1800, 's')
+    day_of_year = (middle.astype('datetime64[D]') - middle.astype('datetime64[Y]')).astype(np.int64)
+    utc_minutes = (middle - middle.astype('datetime64[D]')).astype(np.int64) / 60.0
+    gamma = 2 * np.pi / 365 * (day_of_year + (utc_minutes / 60 - 12) / 24)
+    eqtime = 229.18 * (0.000075 + 0.001868 * np.cos(gamma) - 0.032077 * np.sin(gamma)
+                       - 0.014615 * np.cos(2 * gamma) - 0.040849 * np.sin(2 * gamma))
+    decl = (0.006918 - 0.399912 * np.cos(gamma) + 0.070257 * np.sin(gamma) - 0.006758 * np.cos(2 * gamma)
+            + 0.000907 * np.sin(2 * gamma) - 0.002697 * np.cos(3 * gamma) + 0.00148 * np.sin(3 * gamma))
+    hour_angle = np.radians((utc_minutes + eqtime + 4 * lon) / 4 - 180)
+
+    sin_decl, cos_decl = np.sin(decl), np.cos(decl)
+    sin_lat, cos_lat = np.sin(lat), np.cos(lat)
+    cos_ha = np.cos(hour_angle)
+    cos_zenith = sin_lat * sin_decl + cos_lat * cos_decl * cos_ha
+    up = cos_zenith > 0.01
+    cos_z = np.where(up, cos_zenith, 1.0)
+
+    # Global horizontal irradiance and its beam/diffuse split
+    ghi = np.where(up, 1098.0 * cos_z * np.exp(-0.057 / cos_z), 0.0) * clearness
+    kt = np.clip(ghi / (SOLAR_CONSTANT * cos_z), 0.0, 1.0)
+    diffuse_fraction = np.select(
+        [kt <= 0.22, kt <= 0.8],
+        [1.0 - 0.09 * kt, 0.9511 - 0.1604 * kt + 4.388 * kt ** 2 - 16.638 * kt ** 3 + 12.336 * kt ** 4],
+        0.165
+    )
+    dhi = ghi * diffuse_fraction
+    dni = np.where(up, (ghi - dhi) / cos_z, 0.0)
+
+    # Angle of incidence on the tilted plane (Duffie & Beckman)
+    sin_tilt, cos_tilt = np.sin(tilt), np.cos(tilt)
+    cos_aoi = (sin_decl * sin_lat * cos_tilt
+               - sin_decl * cos_lat * sin_tilt * np.cos(facing)
+               + cos_decl * cos_lat * cos_tilt * cos_ha
+               + cos_decl * sin_lat * sin_tilt * np.cos(facing) * cos_ha
+               + cos_decl * sin_tilt * np.sin(facing) * np.sin(hour_angle))
+    poa = dni * np.maximum(cos_aoi, 0.0) + dhi * (1 + cos_tilt) / 2 + ghi * albedo * (1 - cos_tilt) / 2
+
+    # kW per kWp at 1000 W/m2, clipped at the inverter; one hour -> kWh
+    return np.minimum(poa / 1000.0 * ratio, 1.0)
@@ -0,0 +1,269 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, List, Tuple, FrozenSet
+
+import numpy as np
+
+from app.beckn_apis.beckn_models import Catalog
+
+_NUMBER = re.compile(r'-?\d+(?:\.\d+)?')
+_LIST_SEPARATORS = re.compile(r'\s*[,;|/]\s*')
+
+# Numeric household facts, in column order
+NUMERIC_FACTS: Tuple[str, ...] = ('capacity_kw', 'annual_income', 'install_day', 'system_cost')
+# Set-valued household facts
+CATEGORICAL_FACTS: Tuple[str, ...] = ('location', 'property_type')
+
+# Eligibility tag code -> (fact, bound): 'min'/'max' bound a numeric fact, 'in' lists allowed values
+CRITERIA: Dict[str, Tuple[str, str]] = {
+    'min_system_capacity_kw': ('capacity_kw', 'min'),
+    'max_system_capacity_kw': ('capacity_kw', 'max'),
+    'min_capacity_kw': ('capacity_kw', 'min'),
+    'max_capacity_kw': ('capacity_kw', 'max'),
+    'min_household_income_usd': ('annual_income', 'min'),
+    'max_household_income_usd': ('annual_income', 'max'),
+    'max_annual_income_usd': ('annual_income', 'max'),
+    'income_limit_usd': ('annual_income', 'max'),
+    'min_system_cost_usd': ('system_cost', 'min'),
+    'installed_after': ('install_day', 'min'),
+    'install_date_from': ('install_day', 'min'),
+    'installed_before': ('install_day', 'max'),
+    'install_date_to': ('install_day', 'max'),
+    'application_deadline': ('install_day', 'max'),
+    'eligible_states': ('location', 'in'),
+    'eligible_cities': ('location', 'in'),
+    'eligible_pincodes': ('location', 'in'),
+    'eligible_locations': ('location', 'in'),
+    'property_type': ('property_type', 'in'),
+    'eligible_property_types': ('property_type', 'in'),
+}
+
+# Amount tag codes
+FIXED_AMOUNT = ('subsidy_amount_usd', 'fixed_subsidy_usd')
+PER_KW_AMOUNT = ('subsidy_per_kw_usd', 'subsidy_usd_per_kw')
+PERCENT_AMOUNT = ('subsidy_percent', 'subsidy_percentage')
+MAX_AMOUNT = ('max_subsidy_amount_usd', 'max_subsidy_usd')
+
+
+def _number(value: Any) -> float:
+    """First number of a tag value ("$1,500" -> 1500, "4KW" -> 4), NaN if there is none"""
+    match = _NUMBER.search(str(value).replace(',', '')) if value is not None else None
+    return float(match.group()) if match else np.nan
+
+
+def _day(value: Any) -> float:
+    """Days since 1970-01-01 of an ISO date tag value, NaN if it is not one"""
+    try:
+        return float(np.datetime64(str(value).strip()[:10], 'D').astype(np.int64))
+    except ValueError:
+        return np.nan
+
+
+def _tokens(value: Any) -> FrozenSet[str]:
+    """Normalized members of a list tag value ("CA, NY" -> {'ca', 'ny'})"""
+    return frozenset(t.lower() for t in _LIST_SEPARATORS.split(str(value or '').strip()) if t)
+
+
+def _first(tags: Dict[str, Any], codes: Tuple[str, ...]) -> float:
+    for code in codes:
+        if code in tags:
+            return _number(tags[code])
+    return np.nan
+
+
+@dataclass
+class HouseholdProfile:
+    """
+    What is known about a household when matching subsidies; None where unknown.
+
+    Attributes:
+        capacity_kw: Capacity of the PV system bought
+        annual_income: Yearly household income in USD
+        install_date: Installation date (ISO)
+        system_cost: Price paid for the system in USD
+        location: State, city and pincode of the household
+        property_type: e.g. "Residential"
+    """
+    capacity_kw: Optional[float] = None
+    annual_income: Optional[float] = None
+    install_date: Optional[str] = None
+    system_cost: Optional[float] = None
+    location: List[str] = field(default_factory=list)
+    property_type: Optional[str] = None
+
+    def numeric(self) -> np.ndarray:
+        """Numeric facts in NUMERIC_FACTS order, NaN where unknown"""
+        values = (self.capacity_kw, self.annual_income, None, self.system_cost)
+        row = np.array([np.nan if v is None else float(v) for v in values])
+        row[NUMERIC_FACTS.index('install_day')] = _day(self.install_date) if self.install_date else np.nan
+        return row
+
+    def categorical(self) -> Dict[str, FrozenSet[str]]:
+        return {
+            'location': frozenset(token for value in self.location for token in _tokens(value)),
+            'property_type': _tokens(self.property_type),
+        }
+
+
+class SubsidyRules:
+    """
+    Eligibility criteria of every scheme of a subsidy catalog, compiled to arrays.
+
+    Numeric criteria become (schemes x facts) lower/upper bound matrices and
+    list criteria an index from each allowed value to the boolean mask of the
+    schemes allowing it, so matching a household against every scheme is a
+    few vectorized comparisons plus one dict lookup per household value.
+    A criterion on a fact the household does not know does not exclude the
+    scheme; it is reported as unverified instead.
+    """
+
+    def __init__(self, schemes: List[Dict[str, Any]], tags: List[Dict[str, Any]]):
+        """
+        Compile the criteria of the schemes.
+
+        Args:
+            schemes: provider_id/item_id/fulfillment_id/name/currency of every scheme
+            tags: Flattened tag values of every scheme, in the same order
+        """
+        n = len(schemes)
+        self.schemes = schemes
+        self.lower = np.full((n, len(NUMERIC_FACTS)), -np.inf)
+        self.upper = np.full((n, len(NUMERIC_FACTS)), np.inf)
+        self.restricted = {fact: np.zeros(n, dtype=bool) for fact in CATEGORICAL_FACTS}
+        self.allowed: Dict[str, Dict[str, np.ndarray]] = {fact: {} for fact in CATEGORICAL_FACTS}
+        self.fixed = np.array([_first(t, FIXED_AMOUNT) for t in tags]).reshape(n)
+        self.per_kw = np.array([_first(t, PER_KW_AMOUNT) for t in tags]).reshape(n)
+        self.percent = np.array([_first(t, PERCENT_AMOUNT) for t in tags]).reshape(n)
+        self.cap = np.array([_first(t, MAX_AMOUNT) for t in tags]).reshape(n)
+        self.criteria: List[List[str]] = [[] for _ in range(n)]
+
+        for row, values in enumerate(tags):
+            for code, value in values.items():
+                if code not in CRITERIA:
+                    continue
+                fact, bound = CRITERIA[code]
+                if bound == 'in':
+                    allowed = _tokens(value)
+                    if not allowed:
+                        continue
+                    self.restricted[fact][row] = True
+                    for token in allowed:
+                        self.allowed[fact].setdefault(token, np.zeros(n, dtype=bool))[row] = True
+                else:
+                    column = NUMERIC_FACTS.index(fact)
+                    limit = _day(value) if fact == 'install_day' else _number(value)
+                    if np.isnan(limit):
+                        continue
+                    if bound == 'min':
+                        self.lower[row, column] = max(self.lower[row, column], limit)
+                    else:
+                        self.upper[row, column] = min(self.upper[row, column], limit)
+                self.criteria[row].append(code)
+        self.bounded = np.isfinite(self.lower) | np.isfinite(self.upper)
+
+    @classmethod
+    def from_catalogs(cls, catalogs: List[Catalog]) -> 'SubsidyRules':
+        """Compile every item of subsidy catalogs"""
+        schemes, tags = [], []
+        for catalog in catalogs:
+            for provider, item in catalog.items():
+                values = item.tag_values()
+                schemes.append({
+                    "provider_id": provider.id,
+                    "item_id": item.id,
+                    "fulfillment_id": item.fulfillment_ids[0] if item.fulfillment_ids else None,
+                    "name": item.name,
+                    "subsidy_type": values.get('subsidy_type'),
+                    "application_mode": values.get('application_mode'),
+                    "currency": item.price.currency or 'USD',
+                })
+                tags.append(values)
+        return cls(schemes, tags)
+
+    def __len__(self) -> int:
+        return len(self.schemes)
+
+    def evaluate(self, household: HouseholdProfile) -> Dict[str, np.ndarray]:
+        """
+        Match a household against every scheme in one pass.
+
+        Args:
+            household: The household
+
+        Returns:
+            'eligible' and 'unverified' masks (schemes,), the facts left unverified per scheme
+            'unknown' (schemes, facts) and the 'amount' estimated for every scheme
+        """
+        x = household.numeric()
+        known = np.isfinite(x)
+        failed = known & ((x < self.lower) | (x > self.upper))
+        unknown = ~known & self.bounded
+        eligible = ~failed.any(axis=1)
+        categorical_unknown = []
+        for fact, values in household.categorical().items():
+            restricted = self.restricted[fact]
+            if not values:
+                categorical_unknown.append(restricted)
+                continue
+            match = np.zeros(len(self), dtype=bool)
+            for value in values:
+                mask = self.allowed[fact].get(value)
+                if mask is not None:
+                    match |= mask
+            eligible &= ~restricted | match
+            categorical_unknown.append(np.zeros(len(self), dtype=bool))
+        unknown = np.concatenate([unknown, np.stack(categorical_unknown, axis=1)], axis=1)
+        return {
+            "eligible": eligible,
+            "unverified": unknown.any(axis=1),
+            "unknown": unknown,
+            "amount": self.estimate(household),
+        }
+
+    def estimate(self, household: HouseholdProfile) -> np.ndarray:
+        """
+        Estimated amount of every scheme: fixed + per-kW x capacity + percent x cost, capped by the
+        scheme's maximum and the system cost. A scheme stating only a maximum is estimated at it.
+        """
+        capacity, cost = household.capacity_kw, household.system_cost
+        parts = np.stack([
+            self.fixed,
+            self.per_kw * (capacity if capacity is not None else np.nan),
+            self.percent / 100.0 * (cost if cost is not None else np.nan),
+        ])
+        stated = np.isfinite(parts).any(axis=0)
+        amount = np.where(stated, np.nansum(parts, axis=0), self.cap)
+        amount = np.fmin(amount, self.cap)
+        if cost is not None:
+            amount = np.fmin(amount, cost)
+        return amount
+
+    def match(self, household: HouseholdProfile) -> Dict[str, Any]:
+        """
+        Eligible schemes of a household with their estimated amounts, best first.
+
+        Args:
+            household: The household
+
+        Returns:
+            Dict with 'eligible_subsidies' (scheme fields, 'estimated_amount', 'max_amount' and the
+            'unverified' facts that could still exclude it) and 'ineligible_count'
+        """
+        result = self.evaluate(household)
+        facts = NUMERIC_FACTS + CATEGORICAL_FACTS
+        rows = np.flatnonzero(result["eligible"])
+        rows = rows[np.argsort(-np.nan_to_num(result["amount"][rows], nan=0.0), kind='stable')]
+        eligible = []
+        for row in rows:
+            amount, cap = result["amount"][row], self.cap[row]
+            eligible.append({
+                **self.schemes[row],
+                "estimated_amount": round(float(amount), 2) if np.isfinite(amount) else None,
+                "max_amount": round(float(cap), 2) if np.isfinite(cap) else None,
+                "criteria": self.criteria[row],
+                "unverified": [facts[i] for i in np.flatnonzero(result["unknown"][row])],
+            })
+        return {
+            "eligible_subsidies": eligible,
+            "ineligible_count": int(len(self) - len(rows)),
+        }
@@ -0,0 +1,287 @@
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+
+
+def _local_hours(times: np.ndarray, utc_offset_hours: float) -> np.ndarray:
+    """Local time of every timestamp as datetime64[h]"""
+    return (times.astype('datetime64[s]') + np.timedelta64(int(utc_offset_hours * 3600), 's')).astype('datetime64[h]')
+
+
+@dataclass(frozen=True)
+class FlatTariff:
+    """
+    One energy rate at all times.
+
+    Attributes:
+        rate: Price per kWh
+        fixed_monthly: Fixed charge per month
+    """
+    rate: float
+    fixed_monthly: float = 0.0
+
+    def period_index(self, times: np.ndarray) -> np.ndarray:
+        """Price period of every hour (always 0)"""
+        return np.zeros(len(times), dtype=np.int64)
+
+    @property
+    def period_rates(self) -> np.ndarray:
+        """Retail value of a kWh in each period, used to credit netted exports"""
+        return np.array([self.rate])
+
+    def energy_charge(self, kwh: np.ndarray) -> np.ndarray:
+        """Charge of the kWh consumed per (month, period), shape (..., months, periods) -> (..., months)"""
+        return kwh.sum(axis=-1) * self.rate
+
+
+@dataclass(frozen=True)
+class TieredTariff:
+    """
+    Increasing block rates on the monthly consumption.
+
+    Attributes:
+        tiers: ``(monthly kWh up to which the rate applies, rate)`` pairs, the last limit None
+        fixed_monthly: Fixed charge per month
+    """
+    tiers: Tuple[Tuple[Optional[float], float], ...]
+    fixed_monthly: float = 0.0
+
+    def period_index(self, times: np.ndarray) -> np.ndarray:
+        return np.zeros(len(times), dtype=np.int64)
+
+    @property
+    def period_rates(self) -> np.ndarray:
+        # Netting within a month displaces the last (dearest) tier bought; exports beyond the
+        # month's imports are credited at the first tier, the least a later month's kWh can cost
+        return np.array([self.tiers[0][1]])
+
+    def energy_charge(self, kwh: np.ndarray) -> np.ndarray:
+        monthly = kwh.sum(axis=-1)[..., None]
+        upper = np.array([np.inf if limit is None else limit for limit, _ in self.tiers])
+        lower = np.concatenate([[0.0], upper[:-1]])
+        rates = np.array([rate for _, rate in self.tiers])
+        return (np.clip(monthly - lower, 0.0, upper - lower) * rates).sum(axis=-1)
+
+
+@dataclass(frozen=True)
+class TimeOfUseTariff:
+    """
+    Energy rates by time of day.
+
+    Attributes:
+        rates: Price per kWh of every period
+        hour_periods: Period of each local hour of the day (24 entries)
+        weekend_period: Period applied all day on weekends (None: same as weekdays)
+        utc_offset_hours: Offset of local time from UTC, to map meter timestamps to local hours
+        fixed_monthly: Fixed charge per month
+    """
+    rates: Tuple[float, ...]
+    hour_periods: Tuple[int, ...]
+    weekend_period: Optional[int] = None
+    utc_offset_hours: float = 0.0
+    fixed_monthly: float = 0.0
+
+    def period_index(self, times: np.ndarray) -> np.ndarray:
+        local = _local_hours(times, self.utc_offset_hours)
+        hour_of_day = (local - local.astype('datetime64[D]')).astype(np.int64)
+        periods = np.asarray(self.hour_periods, dtype=np.int64)[hour_of_day]
+        if self.weekend_period is not None:
+            # 1970-01-01 was a Thursday
+            weekday = (local.astype('datetime64[D]').astype(np.int64) + 3) % 7
+            periods = np.where(weekday >= 5, self.weekend_period, periods)
+        return periods
+
+    @property
+    def period_rates(self) -> np.ndarray:
+        return np.asarray(self.rates, dtype=np.float64)
+
+    def energy_charge(self, kwh: np.ndarray) -> np.ndarray:
+        return (kwh * self.period_rates).sum(axis=-1)
+
+
+Tariff = Union[FlatTariff, TieredTariff, TimeOfUseTariff]
+
+
+@dataclass(frozen=True)
+class NetMeteringRule:
+    """
+    How exported energy is credited.
+
+    Attributes:
+        mode: 'net_metering' nets exports against imports per month and price
+            period, crediting the excess at the retail rate of its period;
+            'net_billing' bills every imported kWh and credits exports at ``export_rate``
+        export_rate: Credit per exported kWh under net billing
+        carry_over: Unused credit rolls over to the following months of the year (else it is forfeited monthly)
+        true_up_rate: Paid per kWh of yearly net surplus (exports above imports) under net metering, out of
+            the credit left unused that year; the rest of that credit is forfeited at the true-up
+    """
+    mode: str = 'net_metering'
+    export_rate: float = 0.0
+    carry_over: bool = True
+    true_up_rate: float = 0.0
+
+    def __post_init__(self):
+        if self.mode not in ('net_metering', 'net_billing'):
+            raise ValueError("Mode must be 'net_metering' or 'net_billing'")
+
+
+# San Francisco style defaults (USD), matching the simulator's meter locations
+TARIFFS: Dict[str, Tariff] = {
+    'flat': FlatTariff(rate=0.32, fixed_monthly=10.0),
+    'tiered': TieredTariff(tiers=((300.0, 0.30), (None, 0.38)), fixed_monthly=10.0),
+    # Peak 16:00-21:00 local on weekdays
+    'tou': TimeOfUseTariff(
+        rates=(0.33, 0.45),
+        hour_periods=tuple(1 if 16 <= h < 21 else 0 for h in range(24)),
+        weekend_period=0,
+        utc_offset_hours=-8.0,
+        fixed_monthly=10.0
+    ),
+}
+
+# Billing months between two net metering true-ups
+TRUE_UP_MONTHS = 12
+
+NET_METERING_RULES: Dict[str, NetMeteringRule] = {
+    'net_metering': NetMeteringRule(mode='net_metering', true_up_rate=0.04),
+    'net_billing': NetMeteringRule(mode='net_billing', export_rate=0.08),
+}
+
+
+class BillingCalendar:
+    """
+    Month/period layout of an hourly time index, shared by every bill over it.
+
+    Hourly arrays are reduced to (month, period) totals with one matrix
+    product against a one-hot layout, so billing N households costs one
+    (N, hours) x (hours, months * periods) BLAS call.
+    """
+
+    def __init__(self, times: np.ndarray, tariff: Tariff):
+        times = np.asarray(times, dtype='datetime64[s]')
+        local = _local_hours(times, getattr(tariff, 'utc_offset_hours', 0.0)).astype('datetime64[M]')
+        months, month_index = np.unique(local, return_inverse=True)
+        periods = tariff.period_index(times)
+        self.months = months
+        self.n_periods = len(tariff.period_rates)
+        self._layout = np.zeros((len(times), len(months) * self.n_periods))
+        self._layout[np.arange(len(times)), month_index.ravel() * self.n_periods + periods] = 1.0
+
+    def totals(self, hourly: np.ndarray) -> np.ndarray:
+        """(..., hours) -> (..., months, periods) sums"""
+        out = hourly.reshape(-1, hourly.shape[-1]) @ self._layout
+        return out.reshape(hourly.shape[:-1] + (len(self.months), self.n_periods))
+
+
+def monthly_bills(
+    imports: np.ndarray,
+    exports: Optional[np.ndarray],
+    calendar: BillingCalendar,
+    tariff: Tariff,
+    rule: NetMeteringRule,
+    export_credit: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Bills of many households (or household x system pairs) over a billing calendar.
+
+    Args:
+        imports: Imported kWh, shape (..., hours)
+        exports: Exported kWh, same shape (None: no exports)
+        calendar: Layout of the hours
+        tariff: The tariff
+        rule: How exports are credited
+        export_credit: Hourly export credit per kWh under net billing (default: ``rule.export_rate``)
+
+    Returns:
+        Monthly bills (..., months) and the total surplus payment of the true-ups (...)
+    """
+    imported = calendar.totals(imports)
+    if exports is None:
+        energy = tariff.energy_charge(imported)
+        return tariff.fixed_monthly + energy, np.zeros(energy.shape[:-1])
+
+    exported = calendar.totals(exports)
+    if rule.mode == 'net_metering':
+        net = imported - exported
+        energy = tariff.energy_charge(np.maximum(net, 0.0)) - (np.maximum(-net, 0.0) * tariff.period_rates).sum(axis=-1)
+        true_up_rate = rule.true_up_rate
+    else:
+        if export_credit is not None:
+            credit = calendar.totals(exports * export_credit).sum(axis=-1)
+        else:
+            credit = exported.sum(axis=-1) * rule.export_rate
+        energy = tariff.energy_charge(imported) - credit
+        true_up_rate = 0.0
+    surplus_kwh = (exported - imported).sum(axis=-1)
+
+    # Credits offset energy charges of this and (with carry over) later months of the year, never the
+    # fixed charge. At each true-up the yearly surplus is paid out of the credit left unused, so a kWh
+    # whose credit already offset a bill is not paid again, and the remaining credit is forfeited.
+    n_months = energy.shape[-1]
+    bills = np.empty_like(energy)
+    payout = np.zeros(energy.shape[:-1])
+    bank = np.zeros_like(payout)
+    unused = np.zeros_like(payout)
+    surplus = np.zeros_like(payout)
+    for m in range(n_months):
+        due = energy[..., m] - bank
+        bills[..., m] = tariff.fixed_monthly + np.maximum(due, 0.0)
+        surplus += surplus_kwh[..., m]
+        true_up = (m + 1) % TRUE_UP_MONTHS == 0 or m + 1 == n_months
+        if rule.carry_over and not true_up:
+            bank = np.maximum(-due, 0.0)
+            continue
+        unused += np.maximum(-due, 0.0)
+        bank = np.zeros_like(bank)
+        if true_up:
+            payout += np.minimum(np.maximum(surplus, 0.0) * true_up_rate, unused)
+            unused = np.zeros_like(unused)
+            surplus = np.zeros_like(surplus)
+    return bills, payout
+
+
+def bill_savings(
+    load: np.ndarray,
+    production: np.ndarray,
+    times: np.ndarray,
+    tariff: Tariff,
+    rule: NetMeteringRule,
+    *,
+    chunk_size: int = 256,
+) -> Dict[str, np.ndarray]:
+    """
+    Yearly bill with and without solar for every household x candidate system.
+
+    Args:
+        load: Hourly kWh consumed, shape (households, hours)
+        production: Hourly kWh produced by each candidate system, shape (systems, hours),
+            or per household (households, systems, hours)
+        times: datetime64 UTC start of every hour
+        tariff: The tariff
+        rule: How exports are credited
+        chunk_size: Households billed per batch, bounding memory
+
+    Returns:
+        'bill_before' (households,), 'bill_after', 'savings', 'import_kwh' and 'export_kwh' (households, systems)
+    """
+    calendar = BillingCalendar(times, tariff)
+    before, _ = monthly_bills(load, None, calendar, tariff, rule)
+    result = {
+        'bill_before': before.sum(axis=-1),
+        'bill_after': [], 'import_kwh': [], 'export_kwh': [],
+    }
+    for lo in range(0, len(load), chunk_size):
+        chunk_load = load[lo:lo + chunk_size, None, :]
+        chunk_production = production if production.ndim == 2 else production[lo:lo + chunk_size]
+        net = chunk_load - chunk_production
+        imports, exports = np.maximum(net, 0.0), np.maximum(-net, 0.0)
+        bills, payout = monthly_bills(imports, exports, calendar, tariff, rule)
+        result['bill_after'].append(bills.sum(axis=-1) - payout)
+        result['import_kwh'].append(imports.sum(axis=-1))
+        result['export_kwh'].append(exports.sum(axis=-1))
+    for key in ('bill_after', 'import_kwh', 'export_kwh'):
+        result[key] = np.concatenate(result[key]) if result[key] else np.zeros((0, len(production)))
+    result['savings'] = result['bill_before'][:, None] - result['bill_after']
+    return result
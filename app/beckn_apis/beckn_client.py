@@ -1,10 +1,22 @@
 import os
+import json
 import time
 import uuid
-from typing import Dict, Any, Optional, Literal
+from functools import partial
+from typing import Dict, Any, Optional, Literal, Callable, Iterator, Tuple
 
 import requests
 
+from app.beckn_apis import callback_receiver
+from app.beckn_apis.catalog_stream import iter_catalog_items
+from app.utils import json_codec
+from app.utils.circuit_breaker import get_endpoint_guard
+from app.utils.http_compression import configure_session, encode_body, get_transfer_stats
+from app.utils.http2_transport import use_http2
+from app.utils.latency import latency_tracker, hedged_call
+from app.utils.retry import call_with_retry, get_retry_policy
+from app.utils.single_flight import single_flight
+
 
 class BAPClient:
     """
@@ -22,6 +34,12 @@ class BAPClient:
     DEFAULT_CITY_CODE = "NANP:628"
     DEFAULT_TIMEOUT = 100
     DEFAULT_VERSION = "1.1.0"
+    # Circuit breaker / bulkhead shared by every client of the BAP endpoint
+    ENDPOINT = "beckn_bap"
+    # Actions that are safe to send twice, so they may be hedged
+    HEDGED_ACTIONS = ("search", "status")
+    # Actions whose identical concurrent requests are collapsed into one
+    COALESCED_ACTIONS = ("search", "status")
 
     # Domain configurations
     DOMAINS = {
@@ -49,6 +67,10 @@ class BAPClient:
         bpp_id: Optional[str] = None,
         bpp_uri: Optional[str] = None,
         session: Optional[requests.Session] = None,
+        hedge: bool = False,
+        http2: bool = False,
+        callback_url: Optional[str] = None,
+        callback_registry: Optional[callback_receiver.CallbackRegistry] = None,
     ):
         """
         Initialize the BAP client with configuration.
@@ -62,6 +84,11 @@ class BAPClient:
         bpp_id      Target BPP network identifier
         bpp_uri     Target BPP URI
         session     Optional pre-configured requests.Session
+        hedge       Fire a duplicate search/status after the observed p95 latency
+        http2       Multiplex requests over the shared HTTP/2 connections
+        callback_url       Public URL of the callback receiver; when set it is sent as
+                           ``bap_uri`` and each call awaits its on_* callback(s)
+        callback_registry  Registry the receiver resolves callbacks into (the shared one by default)
         """
         if domain not in self.DOMAINS:
             raise ValueError(f"Domain must be one of {list(self.DOMAINS.keys())}")
@@ -70,10 +97,14 @@ class BAPClient:
         self.domain_config = self.DOMAINS[domain]
         self.base_url = base_url or self.DEFAULT_BASE_URL
         self.bap_id = bap_id or self.DEFAULT_BAP_ID
-        self.bap_uri = bap_uri or self.DEFAULT_BAP_URI
+        self.bap_uri = callback_url or bap_uri or self.DEFAULT_BAP_URI
         self.bpp_id = bpp_id or self.DEFAULT_BPP_ID
         self.bpp_uri = bpp_uri or self.DEFAULT_BPP_URI
-        self.session = session or requests.Session()
+        self.session = configure_session(session or requests.Session())
+        self.hedge = hedge
+        self.callback_registry = (callback_registry or callback_receiver.callback_registry) if callback_url else None
+        if http2:
+            use_http2(self.session)
 
     def _create_context(
         self,
@@ -81,6 +112,8 @@ class BAPClient:
         *,
         country_code: Optional[str] = None,
         city_code: Optional[str] = None,
+        transaction_id: Optional[str] = None,
+        message_id: Optional[str] = None,
         extra_context: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
         """
@@ -91,6 +124,8 @@ class BAPClient:
         action         The action being performed (e.g., 'search', 'select')
         country_code   ISO-3166 alpha-3 country code
         city_code      City code
+        transaction_id Transaction ID to reuse (a new one is minted if omitted)
+        message_id     Message ID to reuse (a new one is minted if omitted)
         extra_context  Additional context fields to merge
 
         Returns
@@ -113,8 +148,8 @@ class BAPClient:
             "bap_uri": self.bap_uri,
             "bpp_id": self.bpp_id,
             "bpp_uri": self.bpp_uri,
-            "transaction_id": str(uuid.uuid4()),
-            "message_id": str(uuid.uuid4()),
+            "transaction_id": transaction_id or str(uuid.uuid4()),
+            "message_id": message_id or str(uuid.uuid4()),
             "timestamp": str(now),
         }
 
@@ -123,9 +158,97 @@ class BAPClient:
 
         return context
 
-    def search(self) -> Dict[str, Any]:
+    def _post(self, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        POST a Beckn payload and return the parsed JSON response.
+
+        The timeout adapts to the observed p99 latency of the action,
+        idempotent actions are hedged after the observed p95 when enabled, and
+        transient failures are retried according to the action's retry policy
+        and identical concurrent searches / status polls are coalesced.
+        With a callback receiver the BAP only has to ACK the request (hedging
+        is off) and the call returns once its on_* callback(s) arrived.
+
+        Parameters
+        ----------
+        url        Fully-qualified action URL
+        payload    Request body with ``context`` and ``message``
+
+        Returns
+        -------
+        Parsed JSON response (``dict``). Raises ``requests.HTTPError`` on non-2xx
+        and ``EndpointUnavailableError`` while the BAP endpoint is degraded.
+        """
+        action = payload["context"]["action"]
+        key = f"{self.domain}.{action}"
+        timeout = latency_tracker.timeout_for(key, self.DEFAULT_TIMEOUT)
+        if self.callback_registry is not None:
+            timeout = min(timeout, callback_receiver.ACK_TIMEOUT)
+        send = partial(self._send, url, payload, key, timeout)
+        if self.hedge and self.callback_registry is None and action in self.HEDGED_ACTIONS:
+            delay = latency_tracker.hedge_delay(key)
+            if delay is not None:
+                send = partial(hedged_call, send, delay)
+        # A retry re-sends the same message_id; confirm is only retried if it never left
+        send = partial(call_with_retry, send, get_retry_policy(action), name=key)
+        if self.callback_registry is not None:
+            send = partial(callback_receiver.await_callback, send, payload["context"], self.callback_registry)
+        if action in self.COALESCED_ACTIONS:
+            # Identical concurrent searches / status polls share one upstream call, whichever
+            # transaction they belong to; each caller gets the response under its own ids
+            context = payload["context"]
+            message = json.dumps(payload["message"], sort_keys=True)
+            flight_key = f"{url}|{context['domain']}|{message}"
+            return self._restamp(single_flight.do(flight_key, send, group=key), context)
+        return send()
+
+    @staticmethod
+    def _restamp(response: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy a (possibly shared) response with the caller's transaction_id and message_id in every context"""
+        ids = {"transaction_id": context["transaction_id"], "message_id": context["message_id"]}
+        response = dict(response)
+        if isinstance(response.get("context"), dict):
+            response["context"] = {**response["context"], **ids}
+        if isinstance(response.get("responses"), list):
+            response["responses"] = [
+                {**item, "context": {**(item.get("context") or {}), **ids}} if isinstance(item, dict) else item
+                for item in response["responses"]
+            ]
+        return response
+
+    def _send(self, url: str, payload: Dict[str, Any], key: str, timeout: float) -> Dict[str, Any]:
+        """Send one POST attempt and record its latency under ``key``"""
+        body, headers = encode_body(self.ENDPOINT, json_codec.dumps(payload))
+        headers["Content-Type"] = "application/json"
+        with get_endpoint_guard(self.ENDPOINT):
+            start = time.perf_counter()
+            try:
+                resp = self.session.post(
+                    url,
+                    data=body,
+                    headers=headers,
+                    timeout=timeout
+                )
+            finally:
+                latency_tracker.record(key, time.perf_counter() - start)
+            resp.raise_for_status()
+        get_transfer_stats(self.ENDPOINT).record_response(resp)
+        return json_codec.loads(resp.content)
+
+    def search(
+        self,
+        *,
+        transaction_id: Optional[str] = None,
+        message_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
         """
         Send a Beckn *search* request for the configured domain.
+
+        Parameters
+        ----------
+        transaction_id   Transaction ID to reuse when retrying this step
+        message_id       Message ID to reuse when retrying this step
+
         Returns
         -------
         Parsed JSON response (``dict``). Raises ``requests.HTTPError`` on non-2xx.
@@ -134,6 +257,8 @@ class BAPClient:
 
         context = self._create_context(
             "search",
+            transaction_id=transaction_id,
+            message_id=message_id,
         )
 
         payload = {
@@ -145,20 +270,74 @@ class BAPClient:
             },
         }
 
-        headers = {"Content-Type": "application/json"}
-        resp = self.session.post(
-            url,
-            json=payload,
-            headers=headers,
-            timeout=self.DEFAULT_TIMEOUT
+        return self._post(url, payload)
+
+    def search_stream(
+        self,
+        item_filter: Optional[Callable[[Dict[str, Any], Dict[str, Any]], bool]] = None,
+        *,
+        transaction_id: Optional[str] = None,
+        message_id: Optional[str] = None,
+        chunk_size: int = 65536,
+    ) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """
+        Send a Beckn *search* request and stream the catalog instead of parsing it whole.
+
+        Providers are decoded one at a time from the response stream, so very
+        large catalogs are processed in bounded memory and the first matches
+        are yielded before the body has finished downloading. The request is
+        sent when iteration starts and is not retried once streaming began.
+
+        Parameters
+        ----------
+        item_filter      Predicate on ``(provider, item)``; only matches are yielded
+        transaction_id   Transaction ID to reuse when retrying this step
+        message_id       Message ID to reuse when retrying this step
+        chunk_size       Size of the body chunks read from the socket
+
+        Returns
+        -------
+        Iterator of matching ``(provider, item)`` dicts. Raises ``requests.HTTPError`` on non-2xx.
+        """
+        url = f"{self.base_url.rstrip('/')}/search"
+
+        context = self._create_context(
+            "search",
+            transaction_id=transaction_id,
+            message_id=message_id,
         )
-        resp.raise_for_status()
-        return resp.json()
+
+        payload = {
+            "context": context,
+            "message": {
+                "intent": {
+                    "item": {"descriptor": {"name": self.domain_config["search_intent"]}}
+                }
+            },
+        }
+
+        key = f"{self.domain}.search"
+        body, headers = encode_body(self.ENDPOINT, json_codec.dumps(payload))
+        headers["Content-Type"] = "application/json"
+        with get_endpoint_guard(self.ENDPOINT):
+            resp = self.session.post(
+                url,
+                data=body,
+                headers=headers,
+                timeout=latency_tracker.timeout_for(key, self.DEFAULT_TIMEOUT),
+                stream=True
+            )
+            resp.raise_for_status()
+        with resp:
+            yield from iter_catalog_items(resp.iter_content(chunk_size), item_filter)
 
     def select(
         self,
         provider_id: str,
         item_id: str,
+        *,
+        transaction_id: Optional[str] = None,
+        message_id: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         Send a Beckn *select* request.
@@ -167,6 +346,8 @@ class BAPClient:
         ----------
         provider_id    ID of the service provider
         item_id        ID of the item to select
+        transaction_id Transaction ID to reuse when retrying this step
+        message_id     Message ID to reuse when retrying this step
 
         Returns
         -------
@@ -175,7 +356,9 @@ class BAPClient:
         url = f"{self.base_url.rstrip('/')}/select"
 
         context = self._create_context(
-            "select"
+            "select",
+            transaction_id=transaction_id,
+            message_id=message_id,
         )
 
         payload = {
@@ -194,20 +377,15 @@ class BAPClient:
             },
         }
 
-        headers = {"Content-Type": "application/json"}
-        resp = self.session.post(
-            url,
-            json=payload,
-            headers=headers,
-            timeout=self.DEFAULT_TIMEOUT
-        )
-        resp.raise_for_status()
-        return resp.json()
+        return self._post(url, payload)
 
     def init(
         self,
         provider_id: str,
         item_id: str,
+        *,
+        transaction_id: Optional[str] = None,
+        message_id: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         Send a Beckn *init* request.
@@ -216,6 +394,8 @@ class BAPClient:
         ----------
         provider_id    ID of the service provider
         item_id        ID of the item to initialize
+        transaction_id Transaction ID to reuse when retrying this step
+        message_id     Message ID to reuse when retrying this step
 
         Returns
         -------
@@ -224,7 +404,9 @@ class BAPClient:
         url = f"{self.base_url.rstrip('/')}/init"
 
         context = self._create_context(
-            "init"
+            "init",
+            transaction_id=transaction_id,
+            message_id=message_id,
         )
 
         payload = {
@@ -243,15 +425,7 @@ class BAPClient:
             },
         }
 
-        headers = {"Content-Type": "application/json"}
-        resp = self.session.post(
-            url,
-            json=payload,
-            headers=headers,
-            timeout=self.DEFAULT_TIMEOUT
-        )
-        resp.raise_for_status()
-        return resp.json()
+        return self._post(url, payload)
 
     def confirm(
         self,
@@ -261,6 +435,9 @@ class BAPClient:
         customer_name: str,
         customer_phone: str,
         customer_email: str,
+        *,
+        transaction_id: Optional[str] = None,
+        message_id: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         Send a Beckn *confirm* request.
@@ -273,6 +450,8 @@ class BAPClient:
         customer_name    Name of the customer
         customer_phone   Phone number of the customer
         customer_email   Email address of the customer
+        transaction_id   Transaction ID to reuse when retrying this step
+        message_id       Message ID to reuse when retrying this step
 
         Returns
         -------
@@ -281,7 +460,9 @@ class BAPClient:
         url = f"{self.base_url.rstrip('/')}/confirm"
 
         context = self._create_context(
-            "confirm"
+            "confirm",
+            transaction_id=transaction_id,
+            message_id=message_id,
         )
 
         payload = {
@@ -314,19 +495,14 @@ class BAPClient:
             },
         }
 
-        headers = {"Content-Type": "application/json"}
-        resp = self.session.post(
-            url,
-            json=payload,
-            headers=headers,
-            timeout=self.DEFAULT_TIMEOUT
-        )
-        resp.raise_for_status()
-        return resp.json()
+        return self._post(url, payload)
 
     def status(
         self,
         order_id: str,
+        *,
+        transaction_id: Optional[str] = None,
+        message_id: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         Send a Beckn *status* request.
@@ -334,6 +510,8 @@ class BAPClient:
         Parameters
         ----------
         order_id       ID of the order to check status
+        transaction_id Transaction ID to reuse when retrying this step
+        message_id     Message ID to reuse when retrying this step
 
         Returns
         -------
@@ -342,7 +520,9 @@ class BAPClient:
         url = f"{self.base_url.rstrip('/')}/status"
 
         context = self._create_context(
-            "status"
+            "status",
+            transaction_id=transaction_id,
+            message_id=message_id,
         )
 
         payload = {
@@ -352,15 +532,7 @@ class BAPClient:
             },
         }
 
-        headers = {"Content-Type": "application/json"}
-        resp = self.session.post(
-            url,
-            json=payload,
-            headers=headers,
-            timeout=self.DEFAULT_TIMEOUT
-        )
-        resp.raise_for_status()
-        return resp.json()
+        return self._post(url, payload)
 
 
 # --------------------------------------------------------------------------- #
@@ -369,6 +541,8 @@ if __name__ == "__main__":
     import json
     from datetime import datetime
 
+    from app.beckn_apis.beckn_models import parse_catalog, parse_order
+
     # Create clients for different domains
     # client = BAPClient(domain="retail")
     client = BAPClient(domain="retail")
@@ -380,8 +554,9 @@ if __name__ == "__main__":
         json.dump(search_response, f, indent=2)
 
     # Extract provider and item IDs from search response
-    provider_id = search_response["responses"][0]["message"]["catalog"]["providers"][0]["id"]
-    item_id = search_response["responses"][0]["message"]["catalog"]["providers"][0]["items"][0]["id"]
+    provider = parse_catalog(search_response).providers[0]
+    provider_id = provider.id
+    item_id = provider.items[0].id
 
     # Example select
     select_response = client.select(
@@ -400,20 +575,21 @@ if __name__ == "__main__":
         json.dump(init_response, f, indent=2)
 
     # Extract order ID from init response
-    order_id = init_response["responses"][0]["message"]["order"]["provider"]["id"]
+    init_order = parse_order(init_response)
+    order_id = init_order.provider.id
 
     # Example confirm
     confirm_response = client.confirm(
         provider_id=provider_id,
         item_id=item_id,
-        fulfillment_id=init_response["responses"][0]["message"]["order"]["fulfillments"][0]["id"],
+        fulfillment_id=init_order.fulfillments[0].id,
         customer_name="Lisa",
         customer_phone="876756454",
         customer_email="LisaS@mailinator.com",
     )
     with open(f"retail_confirm_response_{timestamp}.json", "w") as f:
         json.dump(confirm_response, f, indent=2)
-    order_id = confirm_response["responses"][0]["message"]["order"]["id"]
+    order_id = parse_order(confirm_response).id
     # Example status
     status_response  = {}
     while not status_response.get("responses") and timestamp <10:
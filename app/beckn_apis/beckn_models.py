@@ -0,0 +1,212 @@
+from typing import Dict, Any, Optional, List
+
+from app.utils import json_codec
+
+
+class LazyField:
+    """
+    Descriptor for a rarely used subtree (images, long descriptions, tags).
+
+    The subtree is kept as compact JSON bytes, which are far smaller than the
+    equivalent nested dicts, and only decoded when the attribute is read.
+    """
+
+    def __init__(self, default: Any = None):
+        self.default = default
+        self.slot = None
+
+    def __set_name__(self, owner, name):
+        self.slot = f'_{name}'
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        encoded = getattr(instance, self.slot)
+        if encoded is None:
+            return self.default
+        return json_codec.loads(encoded)
+
+    def __set__(self, instance, value):
+        setattr(instance, self.slot, json_codec.dumps(value) if value is not None else None)
+
+
+class Descriptor:
+    """Beckn descriptor: name and short description eager, the rest lazy"""
+
+    __slots__ = ('name', 'code', 'short_desc', '_long_desc', '_images')
+
+    long_desc = LazyField()
+    images = LazyField(default=[])
+
+    def __init__(self, raw: Optional[Dict[str, Any]]):
+        raw = raw or {}
+        self.name: Optional[str] = raw.get('name')
+        self.code: Optional[str] = raw.get('code')
+        self.short_desc: Optional[str] = raw.get('short_desc')
+        self.long_desc = raw.get('long_desc')
+        self.images = raw.get('images')
+
+
+class Price:
+    """Beckn price with its value parsed to a float"""
+
+    __slots__ = ('value', 'currency')
+
+    def __init__(self, raw: Optional[Dict[str, Any]]):
+        raw = raw or {}
+        value = raw.get('value')
+        self.value: Optional[float] = float(value) if value not in (None, '') else None
+        self.currency: Optional[str] = raw.get('currency')
+
+    def __repr__(self) -> str:
+        return f'Price({self.value} {self.currency})'
+
+
+class Item:
+    """Catalog or order item"""
+
+    __slots__ = ('id', 'descriptor', 'price', 'fulfillment_ids', 'category_ids', '_tags')
+
+    tags = LazyField(default=[])
+
+    def __init__(self, raw: Dict[str, Any]):
+        self.id: Optional[str] = raw.get('id')
+        self.descriptor = Descriptor(raw.get('descriptor'))
+        self.price = Price(raw.get('price'))
+        self.fulfillment_ids: List[str] = raw.get('fulfillment_ids') or []
+        self.category_ids: List[str] = raw.get('category_ids') or []
+        self.tags = raw.get('tags')
+
+    @property
+    def name(self) -> Optional[str]:
+        return self.descriptor.name
+
+    def tag_values(self) -> Dict[str, Any]:
+        """Flatten the tag groups to ``{tag code: value}``"""
+        values = {}
+        for group in self.tags:
+            for tag in group.get('list') or []:
+                code = (tag.get('descriptor') or {}).get('code')
+                if code:
+                    values[code] = tag.get('value')
+        return values
+
+    def __repr__(self) -> str:
+        return f'Item(id={self.id!r}, name={self.name!r}, price={self.price!r})'
+
+
+class Fulfillment:
+    """Fulfillment with its type and current state code"""
+
+    __slots__ = ('id', 'type', 'state')
+
+    def __init__(self, raw: Dict[str, Any]):
+        self.id: Optional[str] = raw.get('id')
+        self.type: Optional[str] = raw.get('type')
+        self.state: Optional[str] = ((raw.get('state') or {}).get('descriptor') or {}).get('code')
+
+    def __repr__(self) -> str:
+        return f'Fulfillment(id={self.id!r}, type={self.type!r}, state={self.state!r})'
+
+
+class Quote:
+    """Order quote: total eager, breakup lazy"""
+
+    __slots__ = ('price', '_breakup')
+
+    breakup = LazyField(default=[])
+
+    def __init__(self, raw: Optional[Dict[str, Any]]):
+        raw = raw or {}
+        self.price = Price(raw.get('price'))
+        self.breakup = raw.get('breakup')
+
+    def __repr__(self) -> str:
+        return f'Quote({self.price!r})'
+
+
+class Provider:
+    """Catalog or order provider with its items and fulfillments"""
+
+    __slots__ = ('id', 'descriptor', 'items', 'fulfillments')
+
+    def __init__(self, raw: Dict[str, Any]):
+        self.id: Optional[str] = raw.get('id')
+        self.descriptor = Descriptor(raw.get('descriptor'))
+        self.items: List[Item] = [Item(item) for item in raw.get('items') or []]
+        self.fulfillments: List[Fulfillment] = [Fulfillment(f) for f in raw.get('fulfillments') or []]
+
+    @property
+    def name(self) -> Optional[str]:
+        return self.descriptor.name
+
+    def __repr__(self) -> str:
+        return f'Provider(id={self.id!r}, name={self.name!r}, items={len(self.items)})'
+
+
+class Catalog:
+    """on_search catalog"""
+
+    __slots__ = ('descriptor', 'providers')
+
+    def __init__(self, raw: Optional[Dict[str, Any]]):
+        raw = raw or {}
+        self.descriptor = Descriptor(raw.get('descriptor'))
+        self.providers: List[Provider] = [Provider(p) for p in raw.get('providers') or []]
+
+    def items(self):
+        """Iterate ``(provider, item)`` pairs of the whole catalog"""
+        for provider in self.providers:
+            for item in provider.items:
+                yield provider, item
+
+    def __repr__(self) -> str:
+        return f'Catalog(name={self.descriptor.name!r}, providers={len(self.providers)})'
+
+
+class Order:
+    """on_select / on_init / on_confirm / on_status order"""
+
+    __slots__ = ('id', 'status', 'provider', 'items', 'fulfillments', 'quote')
+
+    def __init__(self, raw: Optional[Dict[str, Any]]):
+        raw = raw or {}
+        self.id: Optional[str] = raw.get('id')
+        self.status: Optional[str] = raw.get('status')
+        self.provider = Provider(raw.get('provider') or {})
+        self.items: List[Item] = [Item(item) for item in raw.get('items') or []]
+        self.fulfillments: List[Fulfillment] = [Fulfillment(f) for f in raw.get('fulfillments') or []]
+        self.quote = Quote(raw.get('quote'))
+
+    def __repr__(self) -> str:
+        return f'Order(id={self.id!r}, status={self.status!r}, provider={self.provider.id!r})'
+
+
+def _messages(response: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """The ``message`` of every BPP response of a Beckn response"""
+    return [(r or {}).get('message') or {} for r in response.get('responses') or []]
+
+
+def parse_catalogs(response: Dict[str, Any]) -> List[Catalog]:
+    """
+    Parse every catalog of a search response.
+
+    Args:
+        response: Parsed search response
+
+    Returns:
+        One Catalog per BPP response
+    """
+    return [Catalog(message.get('catalog')) for message in _messages(response)]
+
+
+def parse_catalog(response: Dict[str, Any]) -> Optional[Catalog]:
+    """Parse the first catalog of a search response, or None if there is none"""
+    messages = _messages(response)
+    return Catalog(messages[0].get('catalog')) if messages else None
+
+
+def parse_order(response: Dict[str, Any]) -> Optional[Order]:
+    """Parse the first order of a select/init/confirm/status response, or None"""
+    messages = _messages(response)
+    return Order(messages[0].get('order')) if messages and messages[0].get('order') else None
@@ -0,0 +1,316 @@
+import heapq
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Any, Optional, Tuple, List, Callable
+
+from app.store.context_store import ContextStore
+from app.utils import json_codec
+from app.utils.logging_config import get_logger
+
+logger = get_logger('BecknCallbacks')
+
+# Callback actions a BPP pushes back for each request action
+CALLBACK_ACTIONS = {
+    "search": "on_search",
+    "select": "on_select",
+    "init": "on_init",
+    "confirm": "on_confirm",
+    "status": "on_status",
+}
+
+ACK_RESPONSE = {"message": {"ack": {"status": "ACK"}}}
+NACK_RESPONSE = {"message": {"ack": {"status": "NACK"}}}
+
+# Public URL of the receiver, sent as ``bap_uri``; clients wait on the BAP response while it is unset
+CALLBACK_URL = os.getenv("BECKN_CALLBACK_URL")
+CALLBACK_PORT = int(os.getenv("BECKN_CALLBACK_PORT", "8090"))
+# Seconds the BAP has to ACK a request whose result arrives as a callback
+ACK_TIMEOUT = 10
+
+
+class _Waiter:
+    """A request waiting for its on_* callback(s)"""
+
+    __slots__ = ('callback_action', 'context', 'future', 'responses')
+
+    def __init__(self, callback_action: str, context: Dict[str, Any]):
+        self.callback_action = callback_action
+        self.context = context
+        self.future: Future = Future()
+        self.responses: List[Dict[str, Any]] = []
+
+    def result(self) -> Dict[str, Any]:
+        return {"context": self.context, "responses": self.responses}
+
+
+class CallbackRegistry:
+    """
+    Matches asynchronous Beckn ``on_*`` callbacks to the requests waiting for them.
+
+    A waiter is a ``concurrent.futures.Future`` keyed by the request's
+    ``transaction_id`` and ``message_id``; the receiver resolves it when the
+    matching callback arrives, so an outstanding request costs a dict entry
+    rather than a blocked thread.
+
+    Every BPP on the network may answer a search, so search waiters stay open
+    for a short collection window and resolve with every ``on_search``
+    received by then. Other actions resolve on their first callback. A single
+    timer thread fires at the earliest deadline and fails the remaining
+    waiters with ``TimeoutError``.
+    """
+
+    DEFAULT_TTL = 100
+    DEFAULT_COLLECT_WINDOW = 10
+    # Callbacks sent by every BPP of the network, collected until the deadline
+    COLLECTED_CALLBACKS = ("on_search",)
+
+    def __init__(self, ttl: float = DEFAULT_TTL, collect_window: float = DEFAULT_COLLECT_WINDOW):
+        """
+        Initialize the registry.
+
+        Parameters
+        ----------
+        ttl             Seconds a waiter is kept before it is failed with TimeoutError
+        collect_window  Seconds a search waiter collects on_search callbacks before it resolves
+        """
+        self.ttl = ttl
+        self.collect_window = collect_window
+        self._lock = threading.Lock()
+        self._waiters: Dict[Tuple[str, str], _Waiter] = {}
+        self._deadlines: List[Tuple[float, Tuple[str, str]]] = []
+        self._timer: Optional[threading.Timer] = None
+        self._timer_deadline = float("inf")
+        self.stats = {"expected": 0, "resolved": 0, "unmatched": 0, "expired": 0}
+
+    def expect(
+        self,
+        action: str,
+        context: Dict[str, Any],
+        *,
+        ttl: Optional[float] = None,
+    ) -> Future:
+        """
+        Register a waiter for the callback(s) of a request that is about to be sent.
+
+        A request re-sent with the same ids while its waiter is still open
+        shares that waiter, so a callback answering either send resolves it.
+
+        Parameters
+        ----------
+        action     The request action (e.g. 'search'); the waiter matches its on_* callbacks
+        context    The Beckn context of the request
+        ttl        Optional override of the registry TTL (or of the collection window for a search)
+
+        Returns
+        -------
+        Future resolved with ``{"context": ..., "responses": [callback, ...]}``
+        """
+        key = (context["transaction_id"], context["message_id"])
+        callback_action = CALLBACK_ACTIONS[action]
+        if ttl is None:
+            ttl = self.collect_window if callback_action in self.COLLECTED_CALLBACKS else self.ttl
+        deadline = time.monotonic() + ttl
+        with self._lock:
+            waiter = self._waiters.get(key)
+            if waiter is not None and waiter.callback_action == callback_action:
+                return waiter.future
+            waiter = _Waiter(callback_action, context)
+            self._waiters[key] = waiter
+            heapq.heappush(self._deadlines, (deadline, key))
+            self.stats["expected"] += 1
+            self._schedule_locked()
+        return waiter.future
+
+    def resolve(self, payload: Dict[str, Any]) -> bool:
+        """
+        Hand a received callback to the waiter of its request.
+
+        Parameters
+        ----------
+        payload    The callback body with ``context`` and ``message``
+
+        Returns
+        -------
+        True if a waiter took the callback, False if nothing was waiting for it
+        """
+        context = payload.get("context") or {}
+        key = (context.get("transaction_id"), context.get("message_id"))
+        with self._lock:
+            waiter = self._waiters.get(key)
+            if waiter is None or waiter.callback_action != context.get("action"):
+                self.stats["unmatched"] += 1
+                return False
+            waiter.responses.append(payload)
+            self.stats["resolved"] += 1
+            if waiter.callback_action in self.COLLECTED_CALLBACKS:
+                return True
+            del self._waiters[key]
+
+        if not waiter.future.done():
+            waiter.future.set_result(waiter.result())
+        return True
+
+    def cancel(self, transaction_id: str, message_id: str) -> None:
+        """Drop the waiter of a request, cancelling its future"""
+        with self._lock:
+            waiter = self._waiters.pop((transaction_id, message_id), None)
+        if waiter is not None:
+            waiter.future.cancel()
+
+    def pending(self) -> int:
+        """Number of requests still waiting for their callback(s)"""
+        with self._lock:
+            return len(self._waiters)
+
+    def _schedule_locked(self) -> None:
+        """Arm the timer for the earliest deadline (caller holds the lock)"""
+        if not self._deadlines or self._deadlines[0][0] >= self._timer_deadline:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer_deadline = self._deadlines[0][0]
+        self._timer = threading.Timer(max(0.0, self._timer_deadline - time.monotonic()), self._expire)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _expire(self) -> None:
+        """Settle the waiters whose deadline has passed and re-arm the timer"""
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            self._timer = None
+            self._timer_deadline = float("inf")
+            while self._deadlines and self._deadlines[0][0] <= now:
+                _, key = heapq.heappop(self._deadlines)
+                waiter = self._waiters.pop(key, None)
+                if waiter is None:
+                    continue
+                expired.append((key, waiter))
+                if waiter.callback_action not in self.COLLECTED_CALLBACKS:
+                    self.stats["expired"] += 1
+            self._schedule_locked()
+
+        for key, waiter in expired:
+            if waiter.future.done():
+                continue
+            if waiter.callback_action in self.COLLECTED_CALLBACKS:
+                waiter.future.set_result(waiter.result())
+                continue
+            waiter.future.set_exception(TimeoutError(f"No {waiter.callback_action} callback for message {key[1]}"))
+
+
+# Registry shared by the receiver and the requests of this process
+callback_registry = CallbackRegistry()
+
+
+def send_for_callback(
+    send: Callable[[], Dict[str, Any]],
+    context: Dict[str, Any],
+    registry: CallbackRegistry = callback_registry,
+) -> Future:
+    """
+    Send a Beckn request that the BAP only ACKs and return the waiter of its callback(s).
+
+    The waiter is registered before the request leaves, so a callback racing
+    the ACK is not lost, and dropped again if the request fails or is NACKed.
+
+    Parameters
+    ----------
+    send       Posts the request and returns the parsed ACK (retries included)
+    context    The Beckn context of the request
+    registry   Registry the receiver resolves callbacks into
+
+    Returns
+    -------
+    Future resolved with ``{"context": ..., "responses": [callback, ...]}``; use
+    ``future.result()`` from threads or ``asyncio.wrap_future`` from coroutines
+    """
+    future = registry.expect(context["action"], context)
+    try:
+        ack = (send().get("message") or {}).get("ack") or {}
+        if ack.get("status") == "NACK":
+            raise RuntimeError(f"Beckn {context['action']} was NACKed: {ack}")
+    except Exception:
+        registry.cancel(context["transaction_id"], context["message_id"])
+        raise
+    return future
+
+
+def await_callback(
+    send: Callable[[], Dict[str, Any]],
+    context: Dict[str, Any],
+    registry: CallbackRegistry = callback_registry,
+) -> Dict[str, Any]:
+    """Send a Beckn request with ``send_for_callback`` and block until its callback(s) resolve it"""
+    return send_for_callback(send, context, registry).result()
+
+
+def create_callback_app(registry: CallbackRegistry = callback_registry):
+    """
+    Build the FastAPI app that accepts ``on_*`` pushes from the BPP.
+
+    Parameters
+    ----------
+    registry    Registry the callbacks are matched against
+
+    Returns
+    -------
+    ``fastapi.FastAPI`` application exposing ``POST /on_search`` ... ``POST /on_status``
+    """
+    from fastapi import FastAPI, Request
+
+    callback_app = FastAPI(title="Homie Beckn callback receiver")
+
+    async def receive(request: Request) -> Dict[str, Any]:
+        payload = json_codec.loads(await request.body())
+        context = payload.get("context") or {}
+        matched = registry.resolve(payload)
+        correlated = ContextStore().lookup_transaction(context.get("transaction_id", ""))
+        logger.info(
+            "Callback %s for transaction %s (%s) - %s",
+            context.get("action"),
+            context.get("transaction_id"),
+            correlated or "unknown session",
+            "matched" if matched else "unmatched",
+        )
+        return ACK_RESPONSE if context.get("action") else NACK_RESPONSE
+
+    for callback_action in CALLBACK_ACTIONS.values():
+        callback_app.add_api_route(f"/{callback_action}", receive, methods=["POST"])
+    return callback_app
+
+
+def start_callback_server(
+    host: str = "0.0.0.0",
+    port: int = CALLBACK_PORT,
+    registry: CallbackRegistry = callback_registry,
+) -> threading.Thread:
+    """
+    Run the callback receiver with uvicorn on a daemon thread.
+
+    Parameters
+    ----------
+    host        Interface to bind
+    port        Port to listen on
+    registry    Registry the callbacks are matched against
+
+    Returns
+    -------
+    The thread serving the receiver
+    """
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(create_callback_app(registry), host=host, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="beckn-callback-receiver", daemon=True)
+    thread.start()
+    return thread
+
+
+# --------------------------------------------------------------------------- #
+# Example usage
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(create_callback_app(), host="0.0.0.0", port=CALLBACK_PORT)
@@ -0,0 +1,125 @@
+import codecs
+import json
+import re
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Characters that change the scanner state; everything else is skipped in bulk
+_STRUCTURAL = re.compile(r'["\[\]{}:,]')
+# Remainder of a JSON string after its opening quote, up to and including the closing quote
+_STRING_TAIL = re.compile(r'(?:[^"\\]|\\.)*"', re.DOTALL)
+# Separators between two array elements
+_ELEMENT_GAP = re.compile(r'[\s,]*')
+
+_element_decoder = json.JSONDecoder()
+
+
+class StreamingArrayExtractor:
+    """
+    Incrementally extracts the elements of every JSON array stored under a
+    given key (e.g. ``"providers"``) from a document fed in chunks.
+
+    Outside the target arrays only the structural characters are scanned;
+    inside them each element is decoded by the C scanner as soon as it is
+    complete. Only the element currently being read is buffered, so a catalog
+    with thousands of providers is processed in memory bounded by its largest
+    provider, and the first providers are available before the body ends.
+    """
+
+    def __init__(self, key: str = 'providers'):
+        """
+        Initialize the extractor.
+
+        Args:
+            key: Object key whose array elements are extracted
+        """
+        self.key = key
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._last_string: Optional[str] = None
+        self._after_key = False
+        self._in_array = False
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """
+        Feed the next chunk of the document.
+
+        Args:
+            chunk: Raw bytes of the response body
+
+        Returns:
+            The array elements completed by this chunk, decoded
+        """
+        buffer = self._buffer + self._decoder.decode(chunk)
+        pos = 0
+        elements = []
+
+        while pos < len(buffer):
+            if self._in_array:
+                pos = _ELEMENT_GAP.match(buffer, pos).end()
+                if pos >= len(buffer):
+                    break
+                if buffer[pos] == ']':
+                    self._in_array = False
+                    pos += 1
+                    continue
+                try:
+                    element, pos = _element_decoder.raw_decode(buffer, pos)
+                except ValueError:
+                    # The element continues in the next chunk
+                    break
+                elements.append(element)
+                continue
+
+            match = _STRUCTURAL.search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+            char = match.group()
+            if char == '"':
+                tail = _STRING_TAIL.match(buffer, match.start() + 1)
+                if tail is None:
+                    # The string continues in the next chunk
+                    pos = match.start()
+                    break
+                self._last_string = buffer[match.start() + 1:tail.end() - 1]
+                pos = tail.end()
+                continue
+
+            pos = match.end()
+            if char == ':':
+                self._after_key = self._last_string == self.key
+            else:
+                self._in_array = char == '[' and self._after_key
+                self._after_key = False
+
+        # Drop everything that has been consumed
+        self._buffer = buffer[pos:]
+        return elements
+
+    def close(self) -> None:
+        """Check that the document did not end in the middle of an element"""
+        if self._in_array and self._buffer.strip():
+            raise ValueError(f"Truncated JSON: unterminated '{self.key}' element")
+
+
+def iter_catalog_items(
+    chunks: Iterable[bytes],
+    item_filter: Optional[Callable[[Dict[str, Any], Dict[str, Any]], bool]] = None,
+) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """
+    Stream ``(provider, item)`` pairs out of a search response body.
+
+    Args:
+        chunks: Raw body chunks (e.g. ``resp.iter_content(65536)``)
+        item_filter: Predicate on ``(provider, item)``; only matches are yielded
+
+    Returns:
+        Iterator of matching ``(provider, item)`` pairs, in document order
+    """
+    extractor = StreamingArrayExtractor('providers')
+    for chunk in chunks:
+        for provider in extractor.feed(chunk):
+            for item in provider.get('items') or []:
+                if item_filter is None or item_filter(provider, item):
+                    yield provider, item
+    extractor.close()
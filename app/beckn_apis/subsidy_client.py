@@ -1,8 +1,19 @@
+from functools import partial
 from typing import Dict, Any, Optional, Union
 import requests
 import uuid
+import json
 import time
 
+from app.beckn_apis import callback_receiver
+from app.utils import json_codec
+from app.utils.circuit_breaker import get_endpoint_guard
+from app.utils.http_compression import configure_session, encode_body, get_transfer_stats
+from app.utils.http2_transport import use_http2
+from app.utils.latency import latency_tracker, hedged_call
+from app.utils.retry import call_with_retry, get_retry_policy
+from app.utils.single_flight import single_flight
+
 
 class SubsidyClient:
     """
@@ -20,6 +31,12 @@ class SubsidyClient:
     DEFAULT_CITY_CODE = "NANP:628"
     DEFAULT_TIMEOUT = 100
     DEFAULT_VERSION = "1.1.0"
+    # Circuit breaker / bulkhead shared by every client of the BAP endpoint
+    ENDPOINT = "beckn_bap"
+    # Actions that are safe to send twice, so they may be hedged
+    HEDGED_ACTIONS = ("search", "status")
+    # Actions whose identical concurrent requests are collapsed into one
+    COALESCED_ACTIONS = ("search", "status")
     DEFAULT_DOMAIN = "deg:schemes"
 
     def __init__(
@@ -31,6 +48,10 @@ class SubsidyClient:
         bpp_id: Optional[str] = None,
         bpp_uri: Optional[str] = None,
         session: Optional[requests.Session] = None,
+        hedge: bool = False,
+        http2: bool = False,
+        callback_url: Optional[str] = None,
+        callback_registry: Optional[callback_receiver.CallbackRegistry] = None,
     ):
         """
         Initialize the subsidy client with configuration.
@@ -43,13 +64,22 @@ class SubsidyClient:
         bpp_id      Target BPP network identifier
         bpp_uri     Target BPP URI
         session     Optional pre-configured requests.Session
+        hedge       Fire a duplicate search/status after the observed p95 latency
+        http2       Multiplex requests over the shared HTTP/2 connections
+        callback_url       Public URL of the callback receiver; when set it is sent as
+                           ``bap_uri`` and each call awaits its on_* callback(s)
+        callback_registry  Registry the receiver resolves callbacks into (the shared one by default)
         """
         self.base_url = base_url or self.DEFAULT_BASE_URL
         self.bap_id = bap_id or self.DEFAULT_BAP_ID
-        self.bap_uri = bap_uri or self.DEFAULT_BAP_URI
+        self.bap_uri = callback_url or bap_uri or self.DEFAULT_BAP_URI
         self.bpp_id = bpp_id or self.DEFAULT_BPP_ID
         self.bpp_uri = bpp_uri or self.DEFAULT_BPP_URI
-        self.session = session or requests.Session()
+        self.session = configure_session(session or requests.Session())
+        self.hedge = hedge
+        self.callback_registry = (callback_registry or callback_receiver.callback_registry) if callback_url else None
+        if http2:
+            use_http2(self.session)
 
     def _create_context(
         self,
@@ -57,6 +87,8 @@ class SubsidyClient:
         *,
         country_code: Optional[str] = None,
         city_code: Optional[str] = None,
+        transaction_id: Optional[str] = None,
+        message_id: Optional[str] = None,
         extra_context: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
         """
@@ -67,6 +99,8 @@ class SubsidyClient:
         action         The action being performed (e.g., 'search', 'confirm', 'status')
         country_code   ISO-3166 alpha-3 country code
         city_code      City code
+        transaction_id Transaction ID to reuse (a new one is minted if omitted)
+        message_id     Message ID to reuse (a new one is minted if omitted)
         extra_context  Additional context fields to merge
 
         Returns
@@ -89,8 +123,8 @@ class SubsidyClient:
             "bap_uri": self.bap_uri,
             "bpp_id": self.bpp_id,
             "bpp_uri": self.bpp_uri,
-            "transaction_id": str(uuid.uuid4()),
-            "message_id": str(uuid.uuid4()),
+            "transaction_id": transaction_id or str(uuid.uuid4()),
+            "message_id": message_id or str(uuid.uuid4()),
             "timestamp": str(now),
         }
         
@@ -99,17 +133,108 @@ class SubsidyClient:
             
         return context
 
-    def search(self) -> Dict[str, Any]:
+    def _post(self, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        POST a Beckn payload and return the parsed JSON response.
+
+        The timeout adapts to the observed p99 latency of the action,
+        idempotent actions are hedged after the observed p95 when enabled, and
+        transient failures are retried according to the action's retry policy
+        and identical concurrent searches / status polls are coalesced.
+        With a callback receiver the BAP only has to ACK the request (hedging
+        is off) and the call returns once its on_* callback(s) arrived.
+
+        Parameters
+        ----------
+        url        Fully-qualified action URL
+        payload    Request body with ``context`` and ``message``
+
+        Returns
+        -------
+        Parsed JSON response (``dict``). Raises ``requests.HTTPError`` on non-2xx
+        and ``EndpointUnavailableError`` while the BAP endpoint is degraded.
+        """
+        action = payload["context"]["action"]
+        key = f"subsidy.{action}"
+        timeout = latency_tracker.timeout_for(key, self.DEFAULT_TIMEOUT)
+        if self.callback_registry is not None:
+            timeout = min(timeout, callback_receiver.ACK_TIMEOUT)
+        send = partial(self._send, url, payload, key, timeout)
+        if self.hedge and self.callback_registry is None and action in self.HEDGED_ACTIONS:
+            delay = latency_tracker.hedge_delay(key)
+            if delay is not None:
+                send = partial(hedged_call, send, delay)
+        # A retry re-sends the same message_id; confirm is only retried if it never left
+        send = partial(call_with_retry, send, get_retry_policy(action), name=key)
+        if self.callback_registry is not None:
+            send = partial(callback_receiver.await_callback, send, payload["context"], self.callback_registry)
+        if action in self.COALESCED_ACTIONS:
+            # Identical concurrent searches / status polls share one upstream call, whichever
+            # transaction they belong to; each caller gets the response under its own ids
+            context = payload["context"]
+            message = json.dumps(payload["message"], sort_keys=True)
+            flight_key = f"{url}|{context['domain']}|{message}"
+            return self._restamp(single_flight.do(flight_key, send, group=key), context)
+        return send()
+
+    @staticmethod
+    def _restamp(response: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy a (possibly shared) response with the caller's transaction_id and message_id in every context"""
+        ids = {"transaction_id": context["transaction_id"], "message_id": context["message_id"]}
+        response = dict(response)
+        if isinstance(response.get("context"), dict):
+            response["context"] = {**response["context"], **ids}
+        if isinstance(response.get("responses"), list):
+            response["responses"] = [
+                {**item, "context": {**(item.get("context") or {}), **ids}} if isinstance(item, dict) else item
+                for item in response["responses"]
+            ]
+        return response
+
+    def _send(self, url: str, payload: Dict[str, Any], key: str, timeout: float) -> Dict[str, Any]:
+        """Send one POST attempt and record its latency under ``key``"""
+        body, headers = encode_body(self.ENDPOINT, json_codec.dumps(payload))
+        headers["Content-Type"] = "application/json"
+        with get_endpoint_guard(self.ENDPOINT):
+            start = time.perf_counter()
+            try:
+                resp = self.session.post(
+                    url,
+                    data=body,
+                    headers=headers,
+                    timeout=timeout
+                )
+            finally:
+                latency_tracker.record(key, time.perf_counter() - start)
+            resp.raise_for_status()
+        get_transfer_stats(self.ENDPOINT).record_response(resp)
+        return json_codec.loads(resp.content)
+
+    def search(
+        self,
+        *,
+        transaction_id: Optional[str] = None,
+        message_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
         """
         Send a Beckn *search* request for subsidies.
 
+        Parameters
+        ----------
+        transaction_id   Transaction ID to reuse when retrying this step
+        message_id       Message ID to reuse when retrying this step
+
         Returns
         -------
         Parsed JSON response (``dict``). Raises ``requests.HTTPError`` on non-2xx.
         """
         url = f"{self.base_url.rstrip('/')}/search"
         
-        context = self._create_context("search")
+        context = self._create_context(
+            "search",
+            transaction_id=transaction_id,
+            message_id=message_id,
+        )
 
         payload = {
             "context": context,
@@ -124,15 +249,7 @@ class SubsidyClient:
             }
         }
 
-        headers = {"Content-Type": "application/json"}
-        resp = self.session.post(
-            url,
-            json=payload,
-            headers=headers,
-            timeout=self.DEFAULT_TIMEOUT
-        )
-        resp.raise_for_status()
-        return resp.json()
+        return self._post(url, payload)
 
     def confirm(
         self,
@@ -142,6 +259,9 @@ class SubsidyClient:
         customer_name: str,
         customer_phone: str,
         customer_email: str,
+        *,
+        transaction_id: Optional[str] = None,
+        message_id: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         Send a Beckn *confirm* request for a subsidy.
@@ -154,6 +274,8 @@ class SubsidyClient:
         customer_name    Name of the customer
         customer_phone   Phone number of the customer
         customer_email   Email address of the customer
+        transaction_id   Transaction ID to reuse when retrying this step
+        message_id       Message ID to reuse when retrying this step
 
         Returns
         -------
@@ -161,7 +283,11 @@ class SubsidyClient:
         """
         url = f"{self.base_url.rstrip('/')}/confirm"
         
-        context = self._create_context("confirm")
+        context = self._create_context(
+            "confirm",
+            transaction_id=transaction_id,
+            message_id=message_id,
+        )
 
         payload = {
             "context": context,
@@ -193,19 +319,14 @@ class SubsidyClient:
             }
         }
 
-        headers = {"Content-Type": "application/json"}
-        resp = self.session.post(
-            url,
-            json=payload,
-            headers=headers,
-            timeout=self.DEFAULT_TIMEOUT
-        )
-        resp.raise_for_status()
-        return resp.json()
+        return self._post(url, payload)
 
     def status(
         self,
         order_id: str,
+        *,
+        transaction_id: Optional[str] = None,
+        message_id: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         Send a Beckn *status* request for a subsidy.
@@ -213,6 +334,8 @@ class SubsidyClient:
         Parameters
         ----------
         order_id       ID of the subsidy order to check status
+        transaction_id Transaction ID to reuse when retrying this step
+        message_id     Message ID to reuse when retrying this step
 
         Returns
         -------
@@ -220,7 +343,11 @@ class SubsidyClient:
         """
         url = f"{self.base_url.rstrip('/')}/status"
         
-        context = self._create_context("status")
+        context = self._create_context(
+            "status",
+            transaction_id=transaction_id,
+            message_id=message_id,
+        )
 
         payload = {
             "context": context,
@@ -229,15 +356,7 @@ class SubsidyClient:
             }
         }
 
-        headers = {"Content-Type": "application/json"}
-        resp = self.session.post(
-            url,
-            json=payload,
-            headers=headers,
-            timeout=self.DEFAULT_TIMEOUT
-        )
-        resp.raise_for_status()
-        return resp.json()
+        return self._post(url, payload)
 
 
 # --------------------------------------------------------------------------- #
@@ -7,16 +7,18 @@ import json
 import shutil
 
 from google.adk.agents import Agent
-from google.adk.tools import FunctionTool
+from google.adk.tools import FunctionTool, ToolContext
 
 from app.solar_service_agent.agent import root_agent as solar_service_agent
 from app.solar_retail_agent.agent import root_agent as solar_retail_agent
 from app.connection_agent.agent import root_agent as connection_agent
 from app.subsidy_agent.agent import root_agent as subsidy_agent
 from app.prompt_book.homie_agent_prompt import HOMIE_AGENT_SYSTEM_PROMPT
-from app.world_engine_apis.meter_client import MeterClient
-from app.world_engine_apis.energy_resource_client import EnergyResourceClient
+from app.store.checkpoint_store import session_key
+from app.store.context_store import ContextStore
+from app.world_engine_apis.provisioning import get_provisioning_service
 import app.models
+from app.utils.circuit_breaker import EndpointUnavailableError
 from app.utils.logging_config import get_logger
 
 logger = get_logger('homie')
@@ -28,12 +30,13 @@ if os.path.exists('context_store_history'):
     shutil.rmtree('context_store_history', ignore_errors=True)  # force delete
 
 
-def _create_meter_energy_resource():
+def _create_meter_energy_resource(tool_context: ToolContext):
     """
     Creates a new meter and associated energy resource.
 
-    Creates a smart meter with default parameters using the MeterClient, then creates
-    a consumer energy resource linked to that meter using the EnergyResourceClient.
+    Creates a smart meter with a freshly allocated code, then creates a consumer
+    energy resource linked to that meter. Calling it again in the same session
+    returns the already provisioned pair instead of creating new ones.
 
     Returns
     -------
@@ -41,21 +44,25 @@ def _create_meter_energy_resource():
         A tuple containing:
         - meter_id (int): ID of the created meter
         - energy_resource_id (int): ID of the created energy resource
+    dict
+        ``{"error": ...}`` with a message to relay to the user when the
+        World Engine is degraded and the call was failed fast
     """
 
-    meter_client = MeterClient()
-    meter = meter_client.create_meter(
-        code="METER306",
-        energy_resource="2230"
-    )
-    meter_id = meter['data']['id']
-    energy_resource_client = EnergyResourceClient()
-    energy_resource = energy_resource_client.create_energy_resource(
-        name="Saksham's Home",
-        type="CONSUMER",
-        meter_id=meter_id
-    )
-    return meter_id, energy_resource['data']['id']
+    try:
+        return _provision_meter_energy_resource(tool_context)
+    except EndpointUnavailableError as e:
+        logger.warning("Meter provisioning failed fast: %s", e)
+        return {"error": str(e)}
+
+
+def _provision_meter_energy_resource(tool_context: ToolContext):
+    """Create the meter and its energy resource (see ``_create_meter_energy_resource``)"""
+    # The household key lives in the session state, so it is stable across calls of a session
+    household_id = session_key(tool_context.state)
+    name = ContextStore().get_user_details().get('name') or "My"
+    household = get_provisioning_service().provision(household_id, name=f"{name}'s Home")
+    return household.meter_id, household.energy_resource_id
 
 root_agent = Agent(
     name="homie",
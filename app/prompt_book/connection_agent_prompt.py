@@ -10,6 +10,7 @@ You have the following tools at your disposal:
     *   **Output**: A dictionary containing provider and item information. You should extract and store:
         *   `provider_id` from ["responses"][0]["message"]["catalog"]["providers"][0]["id"]
         *   `item_id` from ["responses"][0]["message"]["catalog"]["providers"][0]["items"][0]["id"]
+        *   `expected_load` (when present): the household's forecast `annual_kwh`, `average_kw`, `p95_kw`, `peak_kw` and a `suggested_connection_type`. Use it to recommend a connection whose capacity covers the peak load.
 
 2.  **_handle_select**:
     *   **Description**: Selects a specific connection option from a provider.
@@ -10,6 +10,7 @@ You have the following tools at your disposal:
     *   **Output**: A dictionary containing provider and item information. You should extract and store:
         *   `provider_id` from ["responses"][0]["message"]["catalog"]["providers"][0]["id"]
         *   `item_id` from ["responses"][0]["message"]["catalog"]["providers"][0]["items"][0]["id"]
+        *   `bill_impact` (when present): item ID -> estimated `yearly_bill_before`, `yearly_bill_after`, `yearly_savings`, `monthly_savings` and `payback_years` for the user's household. Use it to tell the user how each system would change their electricity bill.
 
 2.  **_handle_select**:
     *   **Description**: Selects a specific solar product or service from a provider.
@@ -17,7 +18,7 @@ You have the following tools at your disposal:
     *   **Required Parameters**:
         *   `provider_id` (string): The ID of the chosen provider (obtained from _handle_search response).
         *   `item_id` (string): The ID of the specific product or service chosen.
-    *   **Output**: A dictionary containing selection details to be used in subsequent calls.
+    *   **Output**: A dictionary containing selection details to be used in subsequent calls. When it contains `bill_impact`, tell the user the estimated yearly savings and payback of the selected system before they confirm.
 
 3.  **_handle_init**:
     *   **Description**: Starts the formal purchase process for the selected solar product/service.
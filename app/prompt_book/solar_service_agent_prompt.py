@@ -10,6 +10,7 @@ You have the following tools at your disposal:
     *   **Output**: A dictionary containing provider and item information. You should extract and store:
         *   `provider_id` from ["responses"][0]["message"]["catalog"]["providers"][0]["id"]
         *   `item_id` from ["responses"][0]["message"]["catalog"]["providers"][0]["items"][0]["id"]
+        *   `meter_health` (when present): anomaly `counts` by kind (`spike`, `zero_read`, `production_dropoff`), the `latest` anomalies and `ongoing` runs found in the household's meter readings. If there are zero-reads or ongoing anomalies, tell the user their meter may be faulty and suggest having the installer check it during the visit.
 
 2.  **_handle_select**:
     *   **Description**: Selects a specific installation service from a provider.
@@ -50,7 +51,7 @@ You have the following tools at your disposal:
     *   **When to use**: When the user asks about the progress of their installation scheduling.
     *   **Required Parameters**:
         *   `order_id` (string): The order ID obtained from _handle_init response.
-    *   **Output**: A dictionary containing the current status and any relevant updates.
+    *   **Output**: A dictionary containing the current status and any relevant updates, plus `meter_health` (when present). After installation, an ongoing `production_dropoff` means the new system produces far less than usual; suggest the installer re-check the commissioning.
 
 **Important Note About Tool Outputs:**
 All tools return JSON/dictionary responses that contain important information needed for subsequent calls. You must:
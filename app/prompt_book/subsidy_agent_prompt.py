@@ -7,9 +7,12 @@ You have the following tools at your disposal:
     *   **Description**: Searches for available subsidies based on the user's context.
     *   **When to use**: When you need to find applicable subsidies for the user's solar installation.
     *   **Required Parameters**: None - the search uses context from previous stages
-    *   **Output**: A dictionary containing available subsidy information. You should extract and store:
-        *   `provider_id` from ["responses"][0]["message"]["catalog"]["providers"][0]["id"]
-        *   `item_id` from ["responses"][0]["message"]["catalog"]["providers"][0]["items"][0]["id"]
+    *   **Optional Parameters**:
+        *   `annual_income` (number): Yearly household income in USD. Only pass it if the user has already mentioned it; never ask for it.
+    *   **Output**: A dictionary with the subsidies the household is eligible for, already matched against the system size, system cost, location and installation date from previous stages:
+        *   `eligible_subsidies`: list of schemes, best estimated amount first. Each has `provider_id`, `item_id`, `fulfillment_id`, `name`, `subsidy_type`, `estimated_amount`, `max_amount` and `unverified` (criteria such as `annual_income` that could not be checked and may still exclude the scheme)
+        *   `ineligible_count`: number of schemes the household does not qualify for
+        *   Use the `provider_id`, `item_id` and `fulfillment_id` of the chosen scheme (normally the first) for `_handle_confirm`. Mention any `unverified` criteria to the user.
 
 2.  **_handle_confirm**:
     *   **Description**: Automatically confirms the subsidy application using information from previous stages.
@@ -17,7 +20,7 @@ You have the following tools at your disposal:
     *   **Required Parameters**:
         *   `provider_id` (string): The ID of the subsidy provider
         *   `item_id` (string): The ID of the specific subsidy
-        *   `fulfillment_id` (string): The fulfillment ID from previous stages
+        *   `fulfillment_id` (string): The fulfillment ID of the chosen scheme from _handle_search
         *   `customer_name` (string): User's name from previous stages
         *   `customer_phone` (string): User's phone from previous stages
         *   `customer_email` (string): User's email from previous stages
@@ -1,5 +1,6 @@
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
+from app.beckn_apis.callback_receiver import CALLBACK_PORT, CALLBACK_URL, start_callback_server
 from app.homie.agent import root_agent
 
 # --- Session Management ---
@@ -28,3 +29,9 @@ runner = Runner(
     session_service=session_service  # Uses our session manager
 )
 print(f"Runner created for agent '{runner.agent.name}'.")
+
+# --- Callback receiver ---
+# The BPP pushes on_* callbacks to CALLBACK_URL; the agents' clients await them there.
+if CALLBACK_URL:
+    start_callback_server(port=CALLBACK_PORT)
+    print(f"Callback receiver listening on port {CALLBACK_PORT} for '{CALLBACK_URL}'.")
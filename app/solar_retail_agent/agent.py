@@ -1,24 +1,31 @@
 import os
 
-from typing import Dict
-import json
+from functools import partial
+from typing import Dict, Optional
 import sys
 
 from google.adk.agents import Agent
-from google.adk.tools import FunctionTool
+from google.adk.tools import FunctionTool, ToolContext
+from app.analytics.net_metering import NetMeteringSimulator
+from app.analytics.solar import capacity_kw
 from app.prompt_book.solar_retail_agent_prompt import SOLAR_RETAIL_AGENT_SYSTEM_PROMPT
+from app.store.checkpoint_store import JourneyCheckpoints
 from app.store.context_store import ContextStore
 from app.beckn_apis.beckn_client import BAPClient
+from app.beckn_apis.callback_receiver import CALLBACK_URL
+from app.beckn_apis.beckn_models import parse_catalogs, parse_order
 import app.models
+from app.utils import json_codec
 from app.utils.logging_config import get_logger
 from app.utils.progress_tracker import update_progress_by_handler
+from app.world_engine_apis.provisioning import get_provisioning_service
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 # Get logger for this module
 logger = get_logger('SolarRetail')
 
-client = BAPClient(domain="retail")
+client = BAPClient(domain="retail", callback_url=CALLBACK_URL)
 
 
 def _save_context_store(step: str):
@@ -39,47 +46,117 @@ def _save_context_store(step: str):
     }
 
     # Save to file
-    with open(filename, 'w') as f:
-        json.dump(state, f, indent=2)
+    json_codec.dump_file(state, filename)
 
     logger.info("Step - Context store saved")
 
 
-def _handle_search() -> Dict:
+def _apply_purchased_system(response: Dict, tool_context: ToolContext) -> Optional[Dict]:
+    """
+    Simulate the bought PV system against the household's load and store
+    its production load factor on the household's meter
+
+    Args:
+        response: The confirm response
+        tool_context: Context of the tool call, holding the household of the session
+
+    Returns:
+        Yearly consumption/production/import/export of the household, or None
+        if the meter or the system size is unknown
+    """
+    household = get_provisioning_service().get(tool_context.state.get('household_id') or '')
+    order = parse_order(response)
+    capacity = next((c for c in map(capacity_kw, order.items) if c), None) if order else None
+    if capacity:
+        context_store.update_solar_details(system_size=capacity)
+    if order is not None and order.quote.price.value is not None:
+        context_store.update_solar_details(system_cost=order.quote.price.value)
+    if household is None or household.meter_id is None or not capacity:
+        logger.info("Step Confirm - Net metering skipped: meter or system size unknown")
+        return None
+    try:
+        return net_metering.apply_purchase(household.meter_id, capacity)
+    except Exception as e:
+        # The purchase itself succeeded, so it must not fail over the meter update
+        logger.warning("Step Confirm - Updating the meter's production load factor failed: %s", e)
+        return None
+
+
+def _bill_impact(items, tool_context: ToolContext) -> Dict:
+    """
+    Estimate the yearly bill impact of every item stating a system size, for the session's household
+
+    Args:
+        items: Catalog or order items
+        tool_context: Context of the tool call, holding the household of the session
+
+    Returns:
+        Dict: Item ID -> bill before/after, yearly savings and payback years (empty if none can be estimated)
+    """
+    candidates, prices = {}, {}
+    for item in items:
+        capacity = capacity_kw(item)
+        if item.id and capacity:
+            candidates[item.id] = capacity
+            prices[item.id] = item.price.value
+    if not candidates:
+        return {}
+    household = get_provisioning_service().get(tool_context.state.get('household_id') or '')
+    try:
+        return net_metering.bill_impact(household.meter_id if household else None, candidates, prices=prices)
+    except Exception as e:
+        logger.warning("Bill impact estimate failed: %s", e)
+        return {}
+
+
+def _handle_search(tool_context: ToolContext) -> Dict:
     """
     Search for available solar products and services.
     No parameters required as search is performed with default configurations.
 
+    Args:
+        tool_context (ToolContext): Context of the tool call
+
     Returns:
-        Dict: Response containing available solar products and services
+        Dict: Response containing available solar products and services, plus the
+        estimated yearly bill impact of every sized system under 'bill_impact'
     """
     logger.info("Step Search - Starting operation")
 
     # Update progress tracker for this step
     update_progress_by_handler("solar_retail", "search")
+    checkpoints = journeys.for_session(tool_context.state)
 
     # Update context with search parameters
     context_store.update_connection_details()
     context_store.update_user_details()
 
-    response = client.search()
+    # Every search starts a new transaction, unless this household already confirmed an order
+    response = checkpoints.run_step('search', {}, client.search)
+    context_store.update_solar_details(transaction_id=checkpoints.transaction_id)
     context_store.add_transaction_history('search', response)
     _save_context_store('search')
 
-    logger.info("Step Search - Operation completed")
+    impact = _bill_impact([item for c in parse_catalogs(response) for _, item in c.items()], tool_context)
+    if impact:
+        response = {**response, 'bill_impact': impact}
+
+    logger.info("Step Search - Operation completed (transaction %s)", checkpoints.transaction_id)
     return response
 
 
-def _handle_select(provider_id: str, item_id: str) -> Dict:
+def _handle_select(provider_id: str, item_id: str, tool_context: ToolContext) -> Dict:
     """
     Select a specific solar product or service from a provider.
 
     Args:
         provider_id (str): ID of the selected provider
         item_id (str): ID of the selected solar product or service
+        tool_context (ToolContext): Context of the tool call
 
     Returns:
-        Dict: Response containing details of the selected product/service
+        Dict: Response containing details of the selected product/service, plus its
+        estimated yearly bill impact under 'bill_impact'
 
     Raises:
         Exception: If search hasn't been performed or if provider_id/item_id are missing
@@ -88,8 +165,9 @@ def _handle_select(provider_id: str, item_id: str) -> Dict:
 
     # Update progress tracker for this step
     update_progress_by_handler("solar_retail", "select")
+    checkpoints = journeys.for_session(tool_context.state)
 
-    if not context_store.get_transaction_history().get('search'):
+    if not checkpoints.is_completed('search'):
         logger.error("Step Select - Failed: Search must be performed before selection")
         raise Exception('Search must be performed before selection')
 
@@ -103,24 +181,31 @@ def _handle_select(provider_id: str, item_id: str) -> Dict:
         item_id=item_id
     )
 
-    response = client.select(
-        provider_id=provider_id,
-        item_id=item_id
+    response = checkpoints.run_step(
+        'select',
+        {'provider_id': provider_id, 'item_id': item_id},
+        partial(client.select, provider_id=provider_id, item_id=item_id)
     )
     context_store.add_transaction_history('select', response)
     _save_context_store('select')
 
+    order = parse_order(response)
+    impact = _bill_impact(order.items if order else [], tool_context)
+    if impact:
+        response = {**response, 'bill_impact': impact}
+
     logger.info("Step Select - Operation completed")
     return response
 
 
-def _handle_init(provider_id: str, item_id: str) -> Dict:
+def _handle_init(provider_id: str, item_id: str, tool_context: ToolContext) -> Dict:
     """
     Initialize the solar product/service purchase process.
 
     Args:
         provider_id (str): ID of the selected provider
         item_id (str): ID of the selected solar product or service
+        tool_context (ToolContext): Context of the tool call
 
     Returns:
         Dict: Response containing initialization details including fulfillment_id
@@ -132,8 +217,9 @@ def _handle_init(provider_id: str, item_id: str) -> Dict:
 
     # Update progress tracker for this step
     update_progress_by_handler("solar_retail", "init")
+    checkpoints = journeys.for_session(tool_context.state)
 
-    if not context_store.get_transaction_history().get('select'):
+    if not checkpoints.is_completed('select'):
         logger.error("Step Init - Failed: Selection must be made before initialization")
         raise Exception('Selection must be made before initialization')
 
@@ -145,9 +231,10 @@ def _handle_init(provider_id: str, item_id: str) -> Dict:
     # Update user details in context
     context_store.update_user_details(**init_data)
 
-    response = client.init(
-        provider_id=provider_id,
-        item_id=item_id
+    response = checkpoints.run_step(
+        'init',
+        {'provider_id': provider_id, 'item_id': item_id},
+        partial(client.init, provider_id=provider_id, item_id=item_id)
     )
     context_store.add_transaction_history('init', response)
     _save_context_store('init')
@@ -162,10 +249,13 @@ def _handle_confirm(
     fulfillment_id: str,
     customer_name: str,
     customer_phone: str,
-    customer_email: str
+    customer_email: str,
+    tool_context: ToolContext
 ) -> Dict:
     """
     Confirm the solar product/service purchase with customer details.
+    Once confirmed, the household's meter is updated with the production
+    of the bought system.
 
     Args:
         provider_id (str): ID of the selected provider
@@ -174,9 +264,11 @@ def _handle_confirm(
         customer_name (str): Full name of the person making the purchase
         customer_phone (str): Primary contact phone number
         customer_email (str): Customer's email address
+        tool_context (ToolContext): Context of the tool call
 
     Returns:
-        Dict: Response containing confirmation details including order_id
+        Dict: Response containing confirmation details including order_id, plus
+        the yearly net metering estimate of the household under 'net_metering'
 
     Raises:
         Exception: If initialization hasn't been done
@@ -185,8 +277,9 @@ def _handle_confirm(
 
     # Update progress tracker for this step
     update_progress_by_handler("solar_retail", "confirm")
+    checkpoints = journeys.for_session(tool_context.state)
 
-    if not context_store.get_transaction_history().get('init'):
+    if not checkpoints.is_completed('init'):
         logger.error("Step Confirm - Failed: Initialization must be done before confirmation")
         raise Exception('Initialization must be done before confirmation')
 
@@ -199,7 +292,8 @@ def _handle_confirm(
         customer_email=customer_email
     )
 
-    response = client.confirm(
+    response = checkpoints.run_confirm(
+        client.confirm,
         provider_id=provider_id,
         item_id=item_id,
         fulfillment_id=fulfillment_id,
@@ -210,16 +304,21 @@ def _handle_confirm(
     context_store.add_transaction_history('confirm', response)
     _save_context_store('confirm')
 
+    net_metering_result = _apply_purchased_system(response, tool_context)
+    if net_metering_result is not None:
+        response = {**response, 'net_metering': net_metering_result}
+
     logger.info("Step Confirm - Operation completed")
     return response
 
 
-def _handle_status(order_id: str) -> Dict:
+def _handle_status(order_id: str, tool_context: ToolContext) -> Dict:
     """
     Check the status of a solar product/service purchase.
 
     Args:
         order_id (str): The order ID obtained from confirm response
+        tool_context (ToolContext): Context of the tool call
 
     Returns:
         Dict: Response containing current status of the purchase
@@ -231,15 +330,20 @@ def _handle_status(order_id: str) -> Dict:
 
     # Update progress tracker for this step
     update_progress_by_handler("solar_retail", "status")
+    checkpoints = journeys.for_session(tool_context.state)
 
-    if not context_store.get_transaction_history().get('confirm'):
+    if not checkpoints.is_completed('confirm'):
         logger.error("Step Status - Failed: Confirmation must be done before status check")
         raise Exception('Confirmation must be done before status check')
 
     context_store.update_connection_details(
         order_id=order_id
     )
-    response = client.status(order_id=order_id)
+    response = checkpoints.run_step(
+        'status',
+        {'order_id': order_id},
+        partial(client.status, order_id=order_id)
+    )
     context_store.add_transaction_history('status', response)
     _save_context_store('status')
 
@@ -248,6 +352,8 @@ def _handle_status(order_id: str) -> Dict:
 
 
 context_store = ContextStore()
+journeys = JourneyCheckpoints('solar_retail')
+net_metering = NetMeteringSimulator()
 current_state = None
 
 root_agent = Agent(
@@ -1,24 +1,30 @@
-import json
 import os
 import sys
-from typing import Dict
+from functools import partial
+from typing import Dict, Optional
 
 from google.adk.agents import Agent
-from google.adk.tools import FunctionTool
+from google.adk.tools import FunctionTool, ToolContext
 
 import app.models
+from app.analytics.anomalies import AnomalyMonitor
+from app.analytics.series_cache import MeterSeriesCache
 from app.beckn_apis.beckn_client import BAPClient
+from app.beckn_apis.callback_receiver import CALLBACK_URL
 from app.prompt_book.solar_service_agent_prompt import SOLAR_SERVICE_AGENT_SYSTEM_PROMPT
+from app.store.checkpoint_store import JourneyCheckpoints
 from app.store.context_store import ContextStore
+from app.utils import json_codec
 from app.utils.logging_config import get_logger
 from app.utils.progress_tracker import update_progress_by_handler
+from app.world_engine_apis.provisioning import get_provisioning_service
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 # Get logger for this module
 logger = get_logger('SolarService')
 
-retail_client = BAPClient(domain="solar")
+retail_client = BAPClient(domain="solar", callback_url=CALLBACK_URL)
 
 
 def _save_context_store(step: str):
@@ -39,44 +45,82 @@ def _save_context_store(step: str):
     }
 
     # Save to file
-    with open(filename, 'w') as f:
-        json.dump(state, f, indent=2)
+    json_codec.dump_file(state, filename)
 
     logger.info("Step - Context store saved")
 
 
-def _handle_search() -> Dict:
+def _meter_health(tool_context: ToolContext) -> Optional[Dict]:
+    """
+    Check the session household's meter readings for anomalies
+
+    Args:
+        tool_context: Context of the tool call, holding the household of the session
+
+    Returns:
+        Dict: Anomaly counts, latest anomalies and ongoing zero-read or production
+        drop-off runs, or None if the household has no meter readings
+    """
+    household = get_provisioning_service().get(tool_context.state.get('household_id') or '')
+    if household is None or household.meter_id is None:
+        return None
+    try:
+        series_cache.refresh(household.meter_id)
+        if not len(series_cache.get(household.meter_id).timestamps):
+            return None
+        anomaly_monitor.scan(series_cache, [household.meter_id])
+        return anomaly_monitor.summary(household.meter_id)
+    except Exception as e:
+        logger.warning("Meter health check failed: %s", e)
+        return None
+
+
+def _handle_search(tool_context: ToolContext) -> Dict:
     """
     Search for available solar installation services.
     No parameters required as search is performed with default configurations.
 
+    Args:
+        tool_context (ToolContext): Context of the tool call
+
     Returns:
-        Dict: Response containing available solar installation services
+        Dict: Response containing available solar installation services, plus the
+        household meter's anomaly summary under 'meter_health' when it has readings
     """
     logger.info("Step Search - Starting operation")
 
     # Update progress tracker for this step
     update_progress_by_handler("solar_service", "search")
+    checkpoints = journeys.for_session(tool_context.state)
 
     # Update context with search parameters
     context_store.update_connection_details()
     context_store.update_user_details()
 
-    response = retail_client.search()
+    # Every search starts a new transaction, unless this household already confirmed an order
+    response = checkpoints.run_step('search', {}, retail_client.search)
+    context_store.update_service_details(transaction_id=checkpoints.transaction_id)
     context_store.add_transaction_history('search', response)
     _save_context_store('search')
 
-    logger.info("Step Search - Operation completed")
+    # A faulty meter is worth fixing during the installation visit
+    meter_health = _meter_health(tool_context)
+    if meter_health is not None:
+        context_store.update_service_details(meter_health=meter_health)
+        response = {**response, 'meter_health': meter_health}
+
+    logger.info("Step Search - Operation completed (transaction %s)", checkpoints.transaction_id)
     return response
 
 
-def _handle_select(provider_id: str, item_id: str) -> Dict:
+def _handle_select(provider_id: str, item_id: str, tool_context: ToolContext) -> Dict:
     """
     Select a specific solar installation service provider.
 
     Args:
         provider_id (str): ID of the selected provider
         item_id (str): ID of the selected installation service
+        tool_context (ToolContext): Context of the tool call
 
     Returns:
         Dict: Response containing details of the selected service
@@ -88,8 +132,9 @@ def _handle_select(provider_id: str, item_id: str) -> Dict:
 
     # Update progress tracker for this step
     update_progress_by_handler("solar_service", "select")
+    checkpoints = journeys.for_session(tool_context.state)
 
-    if not context_store.get_transaction_history().get('search'):
+    if not checkpoints.is_completed('search'):
         logger.error("Step Select - Failed: Search must be performed before selection")
         raise Exception('Search must be performed before selection')
 
@@ -103,9 +148,10 @@ def _handle_select(provider_id: str, item_id: str) -> Dict:
         item_id=item_id
     )
 
-    response = retail_client.select(
-        provider_id=provider_id,
-        item_id=item_id
+    response = checkpoints.run_step(
+        'select',
+        {'provider_id': provider_id, 'item_id': item_id},
+        partial(retail_client.select, provider_id=provider_id, item_id=item_id)
     )
     context_store.add_transaction_history('select', response)
     _save_context_store('select')
@@ -114,13 +160,14 @@ def _handle_select(provider_id: str, item_id: str) -> Dict:
     return response
 
 
-def _handle_init(provider_id: str, item_id: str) -> Dict:
+def _handle_init(provider_id: str, item_id: str, tool_context: ToolContext) -> Dict:
     """
     Initialize the solar installation service request.
 
     Args:
         provider_id (str): ID of the selected provider
         item_id (str): ID of the selected installation service
+        tool_context (ToolContext): Context of the tool call
 
     Returns:
         Dict: Response containing initialization details including fulfillment_id
@@ -132,8 +179,9 @@ def _handle_init(provider_id: str, item_id: str) -> Dict:
 
     # Update progress tracker for this step
     update_progress_by_handler("solar_service", "init")
+    checkpoints = journeys.for_session(tool_context.state)
 
-    if not context_store.get_transaction_history().get('select'):
+    if not checkpoints.is_completed('select'):
         logger.error("Step Init - Failed: Selection must be made before initialization")
         raise Exception('Selection must be made before initialization')
 
@@ -145,9 +193,10 @@ def _handle_init(provider_id: str, item_id: str) -> Dict:
     # Update user details in context
     context_store.update_user_details(**init_data)
 
-    response = retail_client.init(
-        provider_id=provider_id,
-        item_id=item_id
+    response = checkpoints.run_step(
+        'init',
+        {'provider_id': provider_id, 'item_id': item_id},
+        partial(retail_client.init, provider_id=provider_id, item_id=item_id)
     )
     context_store.add_transaction_history('init', response)
     _save_context_store('init')
@@ -162,7 +211,8 @@ def _handle_confirm(
     fulfillment_id: str,
     customer_name: str,
     customer_phone: str,
-    customer_email: str
+    customer_email: str,
+    tool_context: ToolContext
 ) -> Dict:
     """
     Confirm the solar installation service request with customer details.
@@ -174,6 +224,7 @@ def _handle_confirm(
         customer_name (str): Full name of the person requesting installation
         customer_phone (str): Primary contact phone number
         customer_email (str): Customer's email address
+        tool_context (ToolContext): Context of the tool call
 
     Returns:
         Dict: Response containing confirmation details including order_id
@@ -185,8 +236,9 @@ def _handle_confirm(
 
     # Update progress tracker for this step
     update_progress_by_handler("solar_service", "confirm")
+    checkpoints = journeys.for_session(tool_context.state)
 
-    if not context_store.get_transaction_history().get('init'):
+    if not checkpoints.is_completed('init'):
         logger.error("Step Confirm - Failed: Initialization must be done before confirmation")
         raise Exception('Initialization must be done before confirmation')
 
@@ -199,7 +251,8 @@ def _handle_confirm(
         customer_email=customer_email
     )
 
-    response = retail_client.confirm(
+    response = checkpoints.run_confirm(
+        retail_client.confirm,
         provider_id=provider_id,
         item_id=item_id,
         fulfillment_id=fulfillment_id,
@@ -214,15 +267,17 @@ def _handle_confirm(
     return response
 
 
-def _handle_status(order_id: str) -> Dict:
+def _handle_status(order_id: str, tool_context: ToolContext) -> Dict:
     """
     Check the status of a solar installation service request.
 
     Args:
         order_id (str): The order ID obtained from confirm response
+        tool_context (ToolContext): Context of the tool call
 
     Returns:
-        Dict: Response containing current status of the installation request
+        Dict: Response containing current status of the installation request, plus the
+        meter's anomaly summary under 'meter_health' (e.g. production drop-offs of the new system)
 
     Raises:
         Exception: If confirmation hasn't been done
@@ -231,23 +286,36 @@ def _handle_status(order_id: str) -> Dict:
 
     # Update progress tracker for this step
     update_progress_by_handler("solar_service", "status")
+    checkpoints = journeys.for_session(tool_context.state)
 
-    if not context_store.get_transaction_history().get('confirm'):
+    if not checkpoints.is_completed('confirm'):
         logger.error("Step Status - Failed: Confirmation must be done before status check")
         raise Exception('Confirmation must be done before status check')
 
     context_store.update_connection_details(
         order_id=order_id
     )
-    response = retail_client.status(order_id=order_id)
+    response = checkpoints.run_step(
+        'status',
+        {'order_id': order_id},
+        partial(retail_client.status, order_id=order_id)
+    )
     context_store.add_transaction_history('status', response)
     _save_context_store('status')
 
+    meter_health = _meter_health(tool_context)
+    if meter_health is not None:
+        context_store.update_service_details(meter_health=meter_health)
+        response = {**response, 'meter_health': meter_health}
+
     logger.info("Step Status - Operation completed")
     return response
 
 
 context_store = ContextStore()
+journeys = JourneyCheckpoints('solar_service')
+series_cache = MeterSeriesCache()
+anomaly_monitor = AnomalyMonitor()
 current_state = None
 
 root_agent = Agent(
@@ -0,0 +1,380 @@
+import os
+import re
+import threading
+import time
+import uuid
+from functools import partial
+from typing import Dict, Any, Optional, List, Callable, MutableMapping
+
+from app.store.context_store import ContextStore
+from app.utils import json_codec
+
+# Checkpoints of a journey left untouched for longer than this are discarded
+DEFAULT_TTL_SECONDS = 24 * 3600
+
+_UNSAFE_FILE_CHARS = re.compile(r'[^A-Za-z0-9_.-]')
+
+
+class OrderAlreadyConfirmedError(Exception):
+    """
+    Raised instead of restarting or re-confirming a journey whose order was already confirmed.
+    The message is meant to be relayed to the user as is.
+    """
+
+    def __init__(self, journey: str, order_id: Optional[str] = None):
+        self.journey = journey
+        self.order_id = order_id
+        order = f"order {order_id}" if order_id else "an order"
+        super().__init__(f"This household already confirmed {order} ({journey}); check its status instead")
+
+
+def session_key(state: MutableMapping[str, Any]) -> str:
+    """
+    Get the household of a session, which keys its checkpoints, minting one if the session has none yet
+
+    Args:
+        state: The session state (``tool_context.state``)
+    """
+    household_id = state.get('household_id')
+    if not household_id:
+        household_id = state['household_id'] = str(uuid.uuid4())
+    return household_id
+
+
+class CheckpointStore:
+    """
+    Persists the outcome of every Beckn step of one household's journey so
+    that an interrupted journey resumes from its last completed step instead
+    of re-ordering.
+
+    Each step goes through two states:
+
+    * ``pending``   - ``begin`` was called; the Beckn ``transaction_id`` and
+                      ``message_id`` are already on disk, so a retry after a
+                      crash re-sends the same ids and the BPP can de-duplicate.
+    * ``completed`` - ``complete`` was called; the response and the key ids
+                      extracted from it are recorded.
+
+    Only steps with side effects (``REPLAYED_STEPS``) are replayed from their
+    checkpoint; searches, selections and status polls are always sent again.
+    Once a confirm was sent, its checkpoint is never dropped: restarting the
+    journey (search/select/init) or confirming other details raises
+    ``OrderAlreadyConfirmedError`` until the checkpoints expire.
+
+    One ``transaction_id`` is minted when a journey starts with ``search`` and
+    reused by every later step of the same order, so the BPP and our logs can
+    correlate select/init/confirm/status with the original search.
+    """
+
+    STEPS: List[str] = ['search', 'select', 'init', 'confirm', 'status']
+    REPLAYED_STEPS = ('init', 'confirm')
+
+    def __init__(
+        self,
+        journey: str,
+        session_id: str,
+        directory: str = 'checkpoints',
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+    ):
+        """
+        Initialize the checkpoint store of one household's journey.
+
+        Args:
+            journey: Name of the journey (e.g. 'solar_retail')
+            session_id: Household (or session) the journey belongs to
+            directory: Directory the checkpoint files are written to
+            ttl_seconds: Age after which untouched checkpoints are discarded
+        """
+        self.journey = journey
+        self.session_id = session_id
+        self.ttl_seconds = ttl_seconds
+        self.path = os.path.join(directory, journey, f'{_UNSAFE_FILE_CHARS.sub("_", session_id)}.json')
+        self._lock = threading.Lock()
+        self.transaction_id: Optional[str] = None
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.updated_at = time.time()
+        self._load()
+
+    @property
+    def expired(self) -> bool:
+        return time.time() - self.updated_at > self.ttl_seconds
+
+    def _load(self) -> None:
+        """Load the persisted journey, starting empty if there is no usable file"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            data = json_codec.load_file(self.path)
+        except (OSError, ValueError):
+            return
+        self.updated_at = data.get('updated_at', 0.0)
+        if self.expired:
+            self.reset()
+            return
+        self.transaction_id = data.get('transaction_id')
+        self.steps = data.get('steps', {})
+        for step, entry in self.steps.items():
+            self._index(step, entry['ids'])
+
+    def _index(self, step: str, ids: Dict[str, str]) -> None:
+        """Register the step's ids in the context store's transaction index"""
+        if ids.get('transaction_id'):
+            ContextStore().index_transaction(
+                ids['transaction_id'],
+                session=self.session_id,
+                journey=self.journey,
+                stage=step,
+                message_id=ids.get('message_id')
+            )
+
+    def _persist(self) -> None:
+        """Atomically write the steps so a crash never leaves a torn file"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.updated_at = time.time()
+        json_codec.dump_file({
+            'journey': self.journey,
+            'session_id': self.session_id,
+            'updated_at': self.updated_at,
+            'transaction_id': self.transaction_id,
+            'steps': self.steps
+        }, self.path)
+
+    def _check_not_confirmed(self, step: str) -> None:
+        """Refuse to (re)send ``step`` if that would drop or duplicate a sent confirm"""
+        if 'confirm' not in self.steps or step not in self.STEPS:
+            return
+        if self.STEPS.index(step) <= self.STEPS.index('confirm'):
+            raise OrderAlreadyConfirmedError(self.journey, self.get_outputs('confirm').get('order_id'))
+
+    def _invalidate_after(self, step: str) -> None:
+        """Drop checkpoints of the steps that follow ``step``"""
+        if step not in self.STEPS:
+            return
+        for later in self.STEPS[self.STEPS.index(step) + 1:]:
+            self.steps.pop(later, None)
+
+    def begin(self, step: str, params: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Mark a step as pending and return the Beckn ids to send with it.
+
+        If the step is already pending with the same parameters (the previous
+        attempt died before its response was recorded) the same ids are
+        returned, otherwise a new message_id is minted and later steps are
+        dropped. A new transaction_id is only minted when a journey starts.
+        Steps before a sent confirm are refused, since dropping it could
+        place the order twice.
+
+        Args:
+            step: The step name (search/select/init/confirm/status)
+            params: The request parameters of the step
+
+        Returns:
+            Dict with the 'transaction_id' and 'message_id' to use
+
+        Raises:
+            OrderAlreadyConfirmedError: If ``step`` comes before a confirm that was already sent
+        """
+        with self._lock:
+            entry = self.steps.get(step)
+            if entry and entry['state'] == 'pending' and entry['params'] == params:
+                return dict(entry['ids'])
+            self._check_not_confirmed(step)
+
+            if self.transaction_id is None or step == self.STEPS[0]:
+                self.transaction_id = str(uuid.uuid4())
+            ids = {
+                'transaction_id': self.transaction_id,
+                'message_id': str(uuid.uuid4())
+            }
+            self._invalidate_after(step)
+            self.steps[step] = {
+                'state': 'pending',
+                'params': params,
+                'ids': ids
+            }
+            self._persist()
+            self._index(step, ids)
+            return dict(ids)
+
+    def complete(self, step: str, response: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Record the response of a pending step and the key ids it produced.
+
+        Args:
+            step: The step name (search/select/init/confirm/status)
+            response: The Beckn response of the step
+
+        Returns:
+            Dict of the key outputs extracted from the response
+        """
+        with self._lock:
+            entry = self.steps.setdefault(step, {'params': None, 'ids': {}})
+            outputs = extract_step_outputs(response)
+            entry.update(state='completed', response=response, outputs=outputs)
+            self._persist()
+            return outputs
+
+    def get_completed(self, step: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Get the recorded response of a step completed with the same parameters.
+
+        Args:
+            step: The step name (search/select/init/confirm/status)
+            params: The request parameters of the step
+
+        Returns:
+            The recorded response, or None if the step must be (re)sent
+        """
+        entry = self.steps.get(step)
+        if entry and entry['state'] == 'completed' and entry['params'] == params:
+            return entry['response']
+        return None
+
+    def is_completed(self, step: str) -> bool:
+        """Check whether a step has a completed checkpoint"""
+        entry = self.steps.get(step)
+        return bool(entry and entry['state'] == 'completed')
+
+    def get_outputs(self, step: str) -> Dict[str, Any]:
+        """Get the key outputs recorded for a completed step"""
+        entry = self.steps.get(step) or {}
+        return entry.get('outputs', {})
+
+    def run_step(self, step: str, params: Dict[str, Any], send: Callable[..., Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Send a step with checkpointed ids, or replay it if it has side effects and was completed.
+
+        Args:
+            step: The step name (search/select/init/confirm/status)
+            params: The request parameters of the step
+            send: Client call taking ``transaction_id`` and ``message_id`` keywords
+
+        Returns:
+            The Beckn response of the step
+        """
+        if step in self.REPLAYED_STEPS:
+            response = self.get_completed(step, params)
+            if response is not None:
+                return response
+
+        ids = self.begin(step, params)
+        response = send(**ids)
+        self.complete(step, response)
+        return response
+
+    def run_confirm(self, send: Callable[..., Dict[str, Any]], **params) -> Dict[str, Any]:
+        """
+        Confirm an order at most once.
+
+        A recorded confirm is replayed and a pending one is re-sent with the
+        same message_id. A confirm with other details (e.g. a corrected phone
+        number) is refused rather than sent as a second order.
+
+        Args:
+            send: Client ``confirm`` call
+            **params: provider_id, item_id, fulfillment_id and customer details
+
+        Returns:
+            The Beckn confirm response
+
+        Raises:
+            OrderAlreadyConfirmedError: If a confirm with other details was already sent
+        """
+        return self.run_step('confirm', params, partial(send, **params))
+
+    def reset(self) -> None:
+        """Forget every checkpoint of the journey"""
+        with self._lock:
+            self.transaction_id = None
+            self.steps = {}
+            self.updated_at = time.time()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+class JourneyCheckpoints:
+    """
+    Checkpoint stores of every household on one journey.
+
+    Stores are created on first use and dropped from memory once they
+    expire, so a long-running process does not keep every past journey.
+    """
+
+    def __init__(self, journey: str, directory: str = 'checkpoints', ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        """
+        Initialize the journey's stores.
+
+        Args:
+            journey: Name of the journey (e.g. 'solar_retail')
+            directory: Directory the checkpoint files are written to
+            ttl_seconds: Age after which untouched checkpoints are discarded
+        """
+        self.journey = journey
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._stores: Dict[str, CheckpointStore] = {}
+
+    def for_session(self, state: MutableMapping[str, Any]) -> CheckpointStore:
+        """
+        Get the checkpoint store of the household of a session.
+
+        Args:
+            state: The session state (``tool_context.state``)
+
+        Returns:
+            The household's CheckpointStore of this journey
+        """
+        session_id = session_key(state)
+        with self._lock:
+            for key in [k for k, store in self._stores.items() if store.expired]:
+                self._stores.pop(key).reset()
+            store = self._stores.get(session_id)
+            if store is None:
+                store = self._stores[session_id] = CheckpointStore(
+                    self.journey, session_id, self.directory, self.ttl_seconds
+                )
+            return store
+
+
+def extract_step_outputs(response: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extract the ids needed by later steps from a Beckn response.
+
+    Args:
+        response: The Beckn response of a step
+
+    Returns:
+        Dict with whichever of transaction_id, provider_id, item_id,
+        fulfillment_id and order_id are present in the first response
+    """
+    outputs: Dict[str, Any] = {}
+    responses = response.get('responses') or []
+    if not responses:
+        return outputs
+
+    first = responses[0] or {}
+    context = first.get('context') or {}
+    if context.get('transaction_id'):
+        outputs['transaction_id'] = context['transaction_id']
+
+    message = first.get('message') or {}
+    order = message.get('order')
+    if order is None:
+        providers = (message.get('catalog') or {}).get('providers') or []
+        if providers:
+            order = {'provider': providers[0], 'items': providers[0].get('items') or []}
+    if not order:
+        return outputs
+
+    if order.get('id'):
+        outputs['order_id'] = order['id']
+    if (order.get('provider') or {}).get('id'):
+        outputs['provider_id'] = order['provider']['id']
+    items = order.get('items') or []
+    if items and items[0].get('id'):
+        outputs['item_id'] = items[0]['id']
+    fulfillments = order.get('fulfillments') or []
+    if fulfillments and fulfillments[0].get('id'):
+        outputs['fulfillment_id'] = fulfillments[0]['id']
+    return outputs
@@ -18,10 +18,12 @@ class ContextStore:
                 'location': None,
                 'address': None,
                 'phone': None,
-                'email': None
+                'email': None,
+                'annual_income': None
             },
             'connection_details': {
                 'connection_type': None,
+                'expected_load': None,
                 'provider_id': None,
                 'item_id': None,
                 'selection_id': None,
@@ -43,6 +45,7 @@ class ContextStore:
                 'customer_email': None,
                 'order_id': None,
                 'system_size': None,
+                'system_cost': None,
                 'installation_type': None
             },
             'service_details': {
@@ -56,7 +59,8 @@ class ContextStore:
                 'customer_email': None,
                 'order_id': None,
                 'installation_date': None,
-                'installation_address': None
+                'installation_address': None,
+                'meter_health': None
             },
             'subsidy_details': {
                 'provider_id': None,
@@ -71,7 +75,9 @@ class ContextStore:
                 'subsidy_type': None,
                 'subsidy_amount': None
             },
-            'transaction_history': {}
+            'transaction_history': {},
+            'transaction_index': {},
+            'message_index': {}
         }
 
     def update_user_details(self, **kwargs) -> None:
@@ -98,6 +104,33 @@ class ContextStore:
         """Add transaction data to history"""
         self.context['transaction_history'][action] = data
 
+    def index_transaction(
+        self,
+        transaction_id: str,
+        session: str,
+        journey: str,
+        stage: str,
+        message_id: Optional[str] = None
+    ) -> None:
+        """Record which session (household), journey and stage a Beckn transaction (and message) belongs to"""
+        entry = self.context['transaction_index'].setdefault(
+            transaction_id, {'session': session, 'journey': journey, 'stage': stage, 'message_ids': {}}
+        )
+        entry['session'] = session
+        entry['journey'] = journey
+        entry['stage'] = stage
+        if message_id:
+            entry['message_ids'][stage] = message_id
+            self.context['message_index'][message_id] = transaction_id
+
+    def lookup_transaction(self, transaction_id: str) -> Optional[Dict]:
+        """Get the session, journey, latest stage and message IDs of a Beckn transaction"""
+        return self.context['transaction_index'].get(transaction_id)
+
+    def lookup_message(self, message_id: str) -> Optional[str]:
+        """Get the transaction ID a Beckn message ID was sent under"""
+        return self.context['message_index'].get(message_id)
+
     def get_user_details(self) -> Dict:
         """Get all user details"""
         return self.context['user_details']
@@ -0,0 +1,93 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from app.analytics.downsample import downsample
+from app.analytics.series_cache import MeterSeriesCache
+from app.runner_setup import session_service, APP_NAME, USER_ID, SESSION_ID
+from app.utils.logging_config import get_logger
+from app.world_engine_apis.provisioning import get_provisioning_service
+
+logger = get_logger("Consumption Panel")
+
+# Points sent to the browser per chart, however long the history is
+MAX_POINTS = 2000
+# Seconds before the meter history is fetched again (the app reruns every second)
+REFRESH_SECONDS = 300
+
+RESOLUTIONS = {"Raw": None, "Hourly": "hour", "Daily": "day", "Monthly": "month"}
+
+
+@st.cache_resource
+def _series_cache() -> MeterSeriesCache:
+    return MeterSeriesCache()
+
+
+def _household_meter_id() -> Optional[int]:
+    """Meter of the chat session's household (its dataset ID), None until one is provisioned"""
+    session = session_service.get_session(app_name=APP_NAME, user_id=USER_ID, session_id=SESSION_ID)
+    household_id = session.state.get("household_id") if session else None
+    household = get_provisioning_service().get(household_id) if household_id else None
+    return household.meter_id if household else None
+
+
+@st.cache_data(ttl=REFRESH_SECONDS, show_spinner=False)
+def _chart_data(dataset_id: int, metric: str, resolution: str, max_points: int):
+    """Chart frame of a meter dataset, capped at max_points, plus the size of the full series"""
+    cache = _series_cache()
+    try:
+        series = cache.refresh(dataset_id)
+    except Exception as e:
+        logger.warning(f"Refreshing meter dataset {dataset_id} failed, showing cached data: {e}")
+        series = cache.get(dataset_id)
+
+    if resolution == "Raw":
+        x, y = series.timestamps, series.values[metric]
+    else:
+        buckets = series.pyramids[metric].query(resolution=RESOLUTIONS[resolution], percentiles=())
+        x, y = buckets["start"], buckets["sum"]
+    total = len(y)
+    x, y = downsample(x, y, max_points)
+    return pd.DataFrame({"time": x.astype("datetime64[ms]"), metric: np.round(y, 4)}), total
+
+
+def display_consumption_panel(dataset_id: int = None, max_points: int = MAX_POINTS):
+    """
+    Displays the consumption and production history of a meter dataset.
+    dataset_id: meter dataset to show (default: the meter of the session's household)
+    max_points: maximum number of points plotted per series
+    """
+    st.subheader("📈 Energy Usage")
+
+    if dataset_id is None:
+        dataset_id = _household_meter_id()
+    if dataset_id is None:
+        st.info("No meter has been set up for this household yet.")
+        return
+
+    cols = st.columns([3, 2])
+    with cols[0]:
+        resolution = st.radio("Resolution", list(RESOLUTIONS), index=2, horizontal=True)
+    with cols[1]:
+        metric = st.selectbox(
+            "Series",
+            ["consumptionKWh", "productionKWh"],
+            format_func=lambda m: "Consumption" if m == "consumptionKWh" else "Production"
+        )
+
+    frame, total = _chart_data(dataset_id, metric, resolution, max_points)
+    if frame.empty:
+        st.info("No readings for this meter yet.")
+        return
+
+    st.line_chart(frame, x="time", y=metric, height=260)
+    unit = "kWh per reading" if resolution == "Raw" else f"kWh per {RESOLUTIONS[resolution]}"
+    st.caption(f"{unit} · showing {len(frame):,} of {total:,} points")
+
+
+if __name__ == '__main__':
+    st.set_page_config(layout="wide")
+    st.title("Consumption Panel Demo")
+    display_consumption_panel()
@@ -1,5 +1,6 @@
 import streamlit as st
 from app.streamlit_components.progress_stepper import display_progress_stepper
+from app.streamlit_components.consumption_panel import display_consumption_panel
 
 
 # Define the steps for Solar Retail
@@ -27,6 +28,9 @@ def display_solar_retail_view():
         st.markdown("--- ")
         st.subheader(f"Current Step: Not Started")
 
+    # Past usage, to size the system against
+    st.markdown("--- ")
+    display_consumption_panel()
 
 
 
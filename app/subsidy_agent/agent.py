@@ -2,22 +2,31 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from typing import Dict
-import json
+from datetime import date
+from functools import partial
+from typing import Dict, Optional
 
 from google.adk.agents import Agent
-from google.adk.tools import FunctionTool
+from google.adk.tools import FunctionTool, ToolContext
+from app.analytics.subsidies import HouseholdProfile, SubsidyRules
+from app.beckn_apis.beckn_models import parse_catalogs
+from app.beckn_apis.callback_receiver import CALLBACK_URL
 from app.prompt_book.subsidy_agent_prompt import SUBSIDY_AGENT_SYSTEM_PROMPT
+from app.store.checkpoint_store import JourneyCheckpoints
 from app.store.context_store import ContextStore
 from app.beckn_apis.subsidy_client import SubsidyClient
 from app.models import GEMINI_2_5_FLASH
+from app.utils import json_codec
 from app.utils.logging_config import get_logger
 from app.utils.progress_tracker import update_progress_by_handler
+from app.world_engine_apis.meter_client import MeterClient
+from app.world_engine_apis.provisioning import get_provisioning_service
 
 # Get logger for this module
 logger = get_logger('Subsidy')
 
-client = SubsidyClient()
+client = SubsidyClient(callback_url=CALLBACK_URL)
+meter_client = MeterClient()
 
 
 def _save_context_store(step: str):
@@ -38,36 +47,85 @@ def _save_context_store(step: str):
     }
 
     # Save to file
-    with open(filename, 'w') as f:
-        json.dump(state, f, indent=2)
+    json_codec.dump_file(state, filename)
 
     logger.info("Step - Context store saved")
 
 
-def _handle_search() -> Dict:
+def _household_profile(tool_context: ToolContext) -> HouseholdProfile:
+    """
+    Collect what previous stages know about the household for matching subsidies
+
+    Args:
+        tool_context: Context of the tool call, holding the household of the session
+
+    Returns:
+        HouseholdProfile: System size and cost, income, installation date and location
+    """
+    solar_details = context_store.get_solar_details()
+    service_details = context_store.get_service_details()
+    user_details = context_store.get_user_details()
+
+    location = [user_details.get('location')]
+    household = get_provisioning_service().get(tool_context.state.get('household_id') or '')
+    if household is not None and household.meter_id is not None:
+        try:
+            meter = meter_client.get_meter_by_id(household.meter_id, projection="location").get('data') or {}
+            location += [meter.get('state'), meter.get('city'), meter.get('pincode')]
+        except Exception as e:
+            logger.warning("Step Search - Meter location lookup failed: %s", e)
+
+    return HouseholdProfile(
+        capacity_kw=solar_details.get('system_size'),
+        annual_income=user_details.get('annual_income'),
+        # Not scheduled yet means it is installed now
+        install_date=service_details.get('installation_date') or date.today().isoformat(),
+        system_cost=solar_details.get('system_cost'),
+        location=[str(value) for value in location if value],
+        property_type='Residential',
+    )
+
+
+def _handle_search(tool_context: ToolContext, annual_income: Optional[float] = None) -> Dict:
     """
     Search for available subsidies based on the user's context.
-    Uses information from previous stages to find applicable subsidies.
+    Uses information from previous stages to keep only the subsidies the household is eligible for.
+
+    Args:
+        tool_context (ToolContext): Context of the tool call
+        annual_income (float, optional): Yearly household income in USD, only if the user already stated it
 
     Returns:
-        Dict: Response containing available subsidies matching the user's context
+        Dict: The eligible subsidies with provider_id, item_id, fulfillment_id and estimated amount,
+        best first, plus the number of ineligible ones
     """
     logger.info("Step Search - Starting operation")
 
     # Update progress tracker for this step
     update_progress_by_handler("subsidy", "search")
+    checkpoints = journeys.for_session(tool_context.state)
 
-    # Get solar and service details to determine subsidy eligibility
-    solar_details = context_store.get_solar_details()
-    service_details = context_store.get_service_details()
+    if annual_income is not None:
+        context_store.update_user_details(annual_income=annual_income)
 
-    # Use the information to search for applicable subsidies
-    response = client.search()
+    # Every search starts a new transaction, unless this household already confirmed an order
+    response = checkpoints.run_step('search', {}, client.search)
+    context_store.update_subsidy_details(transaction_id=checkpoints.transaction_id)
     context_store.add_transaction_history('search', response)
     _save_context_store('search')
 
-    logger.info("Step Search - Operation completed")
-    return response
+    # Match the household against every scheme of the catalog instead of returning the raw catalog
+    rules = SubsidyRules.from_catalogs(parse_catalogs(response))
+    if not len(rules):
+        logger.info("Step Search - Operation completed without subsidy schemes")
+        return response
+    result = {'transaction_id': checkpoints.transaction_id, **rules.match(_household_profile(tool_context))}
+
+    logger.info(
+        "Step Search - Operation completed (transaction %s): %d eligible, %d ineligible subsidies",
+        checkpoints.transaction_id, len(result['eligible_subsidies']), result['ineligible_count']
+    )
+    return result
 
 
 def _handle_confirm(
@@ -76,7 +134,8 @@ def _handle_confirm(
     fulfillment_id: str,
     customer_name: str,
     customer_phone: str,
-    customer_email: str
+    customer_email: str,
+    tool_context: ToolContext
 ) -> Dict:
     """
     Automatically confirm the subsidy application using information from previous stages.
@@ -84,25 +143,27 @@ def _handle_confirm(
     Args:
         provider_id (str): ID of the subsidy provider
         item_id (str): ID of the specific subsidy
-        fulfillment_id (str): ID of the fulfillment from init response
+        fulfillment_id (str): ID of the fulfillment from the search results
         customer_name (str): Full name of the person applying for subsidy
         customer_phone (str): Primary contact phone number
         customer_email (str): Customer's email address
+        tool_context (ToolContext): Context of the tool call
 
     Returns:
         Dict: Response containing confirmation details including order_id
 
     Raises:
-        Exception: If initialization hasn't been done
+        Exception: If search hasn't been performed
     """
     logger.info("Step Confirm - Starting operation for customer %s", customer_name)
 
     # Update progress tracker for this step
     update_progress_by_handler("subsidy", "confirm")
+    checkpoints = journeys.for_session(tool_context.state)
 
-    if not context_store.get_transaction_history().get('init'):
-        logger.error("Step Confirm - Failed: Initialization must be done before confirmation")
-        raise Exception('Initialization must be done before confirmation')
+    if not checkpoints.is_completed('search'):
+        logger.error("Step Confirm - Failed: Search must be performed before confirmation")
+        raise Exception('Search must be performed before confirmation')
 
     # Update subsidy details in context
     context_store.update_subsidy_details(
@@ -114,7 +175,8 @@ def _handle_confirm(
         customer_email=customer_email
     )
 
-    response = client.confirm(
+    response = checkpoints.run_confirm(
+        client.confirm,
         provider_id=provider_id,
         item_id=item_id,
         fulfillment_id=fulfillment_id,
@@ -129,12 +191,13 @@ def _handle_confirm(
     return response
 
 
-def _handle_status(order_id: str) -> Dict:
+def _handle_status(order_id: str, tool_context: ToolContext) -> Dict:
     """
     Check the status of a subsidy application.
 
     Args:
         order_id (str): The order ID obtained from confirm response
+        tool_context (ToolContext): Context of the tool call
 
     Returns:
         Dict: Response containing current status of the subsidy application
@@ -146,15 +209,20 @@ def _handle_status(order_id: str) -> Dict:
 
     # Update progress tracker for this step
     update_progress_by_handler("subsidy", "status")
+    checkpoints = journeys.for_session(tool_context.state)
 
-    if not context_store.get_transaction_history().get('confirm'):
+    if not checkpoints.is_completed('confirm'):
         logger.error("Step Status - Failed: Confirmation must be done before status check")
         raise Exception('Confirmation must be done before status check')
 
     # Update subsidy details with order ID
     context_store.update_subsidy_details(order_id=order_id)
 
-    response = client.status(order_id=order_id)
+    response = checkpoints.run_step(
+        'status',
+        {'order_id': order_id},
+        partial(client.status, order_id=order_id)
+    )
     context_store.add_transaction_history('status', response)
     _save_context_store('status')
 
@@ -163,6 +231,7 @@ def _handle_status(order_id: str) -> Dict:
 
 
 context_store = ContextStore()
+journeys = JourneyCheckpoints('subsidy')
 current_state = None
 
 root_agent = Agent(
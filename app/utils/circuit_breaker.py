@@ -0,0 +1,235 @@
+import threading
+import time
+from typing import Dict, Any, Optional
+
+import requests
+
+from app.utils.logging_config import get_logger
+
+logger = get_logger('CircuitBreaker')
+
+
+class EndpointUnavailableError(Exception):
+    """
+    Raised instead of calling an endpoint that is known to be degraded.
+    The message is meant to be relayed to the user as is.
+    """
+
+    def __init__(self, endpoint: str, reason: str, retry_after: Optional[float] = None):
+        self.endpoint = endpoint
+        self.reason = reason
+        self.retry_after = retry_after
+        message = f"{endpoint} is temporarily unavailable ({reason})"
+        if retry_after is not None:
+            message += f", please retry in {int(retry_after) + 1}s"
+        super().__init__(message)
+
+
+class CircuitOpenError(EndpointUnavailableError):
+    """Raised when the endpoint's circuit breaker is open"""
+
+
+class BulkheadFullError(EndpointUnavailableError):
+    """Raised when too many calls to the endpoint are already in flight"""
+
+
+class CircuitBreaker:
+    """
+    Classic three-state circuit breaker.
+
+    * closed    - calls flow; ``failure_threshold`` consecutive failures open it
+    * open      - calls fail fast until ``recovery_timeout`` has elapsed
+    * half_open - up to ``half_open_max_calls`` trial calls decide whether it
+                  closes again (success) or re-opens (failure)
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._half_open_calls = 0
+        self.stats = {'successes': 0, 'failures': 0, 'rejections': 0, 'opened': 0}
+
+    def before_call(self) -> None:
+        """Admit a call or raise CircuitOpenError"""
+        with self._lock:
+            if self.state == self.OPEN:
+                elapsed = time.monotonic() - self.opened_at
+                if elapsed < self.recovery_timeout:
+                    self.stats['rejections'] += 1
+                    raise CircuitOpenError(self.name, 'circuit open', self.recovery_timeout - elapsed)
+                self._transition(self.HALF_OPEN)
+            if self.state == self.HALF_OPEN:
+                if self._half_open_calls >= self.half_open_max_calls:
+                    self.stats['rejections'] += 1
+                    raise CircuitOpenError(self.name, 'circuit half-open, trial call in flight')
+                self._half_open_calls += 1
+
+    def cancel_call(self) -> None:
+        """Give back an admission whose call never ran"""
+        with self._lock:
+            if self.state == self.HALF_OPEN and self._half_open_calls:
+                self._half_open_calls -= 1
+
+    def on_success(self) -> None:
+        """Record a successful call"""
+        with self._lock:
+            self.stats['successes'] += 1
+            self.consecutive_failures = 0
+            if self.state != self.CLOSED:
+                self._transition(self.CLOSED)
+
+    def on_failure(self) -> None:
+        """Record a failed call"""
+        with self._lock:
+            self.stats['failures'] += 1
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self.stats['opened'] += 1
+                self._transition(self.OPEN)
+
+    def _transition(self, state: str) -> None:
+        """Switch state (caller holds the lock)"""
+        logger.info("Endpoint %s - circuit %s -> %s", self.name, self.state, state)
+        self.state = state
+        self._half_open_calls = 0
+
+
+class Bulkhead:
+    """Caps the number of concurrent calls to one endpoint"""
+
+    def __init__(self, name: str, max_concurrent: int = 20, max_wait: float = 1.0):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_wait = max_wait
+        self._semaphore = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.rejections = 0
+
+    def acquire(self) -> None:
+        """Take a slot or raise BulkheadFullError after ``max_wait`` seconds"""
+        if not self._semaphore.acquire(timeout=self.max_wait):
+            with self._lock:
+                self.rejections += 1
+            raise BulkheadFullError(self.name, f'{self.max_concurrent} calls already in flight')
+        with self._lock:
+            self.in_flight += 1
+
+    def release(self) -> None:
+        """Give a slot back"""
+        with self._lock:
+            self.in_flight -= 1
+        self._semaphore.release()
+
+
+class EndpointGuard:
+    """
+    Circuit breaker plus bulkhead for one external endpoint, used as a context manager:
+
+        with get_endpoint_guard('meter_simulator'):
+            resp = session.get(url)
+            resp.raise_for_status()
+
+    Connection errors, timeouts and 5xx responses count as failures; 4xx
+    responses are the caller's fault and count as successes for the breaker.
+    """
+
+    def __init__(self, name: str, breaker: CircuitBreaker, bulkhead: Bulkhead):
+        self.name = name
+        self.breaker = breaker
+        self.bulkhead = bulkhead
+
+    def __enter__(self) -> 'EndpointGuard':
+        self.breaker.before_call()
+        try:
+            self.bulkhead.acquire()
+        except BulkheadFullError:
+            # The admitted call never ran, so it must not count for or against the endpoint
+            self.breaker.cancel_call()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.bulkhead.release()
+        if exc is None or not is_endpoint_failure(exc):
+            self.breaker.on_success()
+        else:
+            self.breaker.on_failure()
+        return False
+
+    def metrics(self) -> Dict[str, Any]:
+        """Get breaker state and counters for this endpoint"""
+        return {
+            'state': self.breaker.state,
+            'consecutive_failures': self.breaker.consecutive_failures,
+            **self.breaker.stats,
+            'in_flight': self.bulkhead.in_flight,
+            'bulkhead_rejections': self.bulkhead.rejections,
+        }
+
+
+def is_endpoint_failure(exc: BaseException) -> bool:
+    """Check whether an exception means the endpoint itself is degraded"""
+    if isinstance(exc, requests.HTTPError):
+        return exc.response is None or exc.response.status_code >= 500
+    return isinstance(exc, (requests.ConnectionError, requests.Timeout))
+
+
+# External endpoints and their limits
+ENDPOINT_LIMITS = {
+    'beckn_bap': {'failure_threshold': 5, 'recovery_timeout': 30.0, 'max_concurrent': 50},
+    'meter_simulator': {'failure_threshold': 5, 'recovery_timeout': 15.0, 'max_concurrent': 20},
+    'energy_resource_simulator': {'failure_threshold': 5, 'recovery_timeout': 15.0, 'max_concurrent': 20},
+}
+
+_guards: Dict[str, EndpointGuard] = {}
+_guards_lock = threading.Lock()
+
+
+def get_endpoint_guard(name: str) -> EndpointGuard:
+    """
+    Get the process-wide guard of an endpoint, creating it on first use.
+
+    Args:
+        name: Endpoint name, one of ENDPOINT_LIMITS (unknown names get defaults)
+
+    Returns:
+        The EndpointGuard shared by every client of that endpoint
+    """
+    with _guards_lock:
+        guard = _guards.get(name)
+        if guard is None:
+            limits = ENDPOINT_LIMITS.get(name, {})
+            breaker = CircuitBreaker(
+                name,
+                failure_threshold=limits.get('failure_threshold', 5),
+                recovery_timeout=limits.get('recovery_timeout', 30.0)
+            )
+            bulkhead = Bulkhead(name, max_concurrent=limits.get('max_concurrent', 20))
+            guard = _guards[name] = EndpointGuard(name, breaker, bulkhead)
+        return guard
+
+
+def endpoint_metrics() -> Dict[str, Dict[str, Any]]:
+    """Get breaker state and counters of every endpoint used so far"""
+    with _guards_lock:
+        guards = list(_guards.values())
+    return {guard.name: guard.metrics() for guard in guards}
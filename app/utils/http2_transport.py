@@ -0,0 +1,165 @@
+"""
+HTTP/2 transport for the ``requests`` based clients.
+
+``HTTP2Adapter`` is a ``requests`` transport adapter backed by an ``httpx``
+client with HTTP/2 enabled. Mounted on a session it keeps every ``requests``
+API (``raise_for_status``, ``iter_content``, exception types) while the
+requests of all sessions sharing the adapter are multiplexed as streams over
+a few connections per host instead of one HTTP/1.1 connection each.
+
+Requires ``httpx`` with the ``h2`` package (``pip install httpx[http2]``).
+HTTP/2 is negotiated via ALPN on ``https://`` URLs; plain ``http://`` URLs
+stay on HTTP/1.1 unless the adapter is created with ``http1=False``
+(prior knowledge, the server must speak h2c).
+"""
+import threading
+from typing import Dict, Iterator, Optional
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.exceptions import NewConnectionError
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+# Connection-specific headers that are not allowed in HTTP/2 requests
+_HOP_BY_HOP = frozenset(('connection', 'keep-alive', 'proxy-connection', 'transfer-encoding', 'upgrade'))
+
+
+def _translate(exc: Exception) -> Exception:
+    """Map an httpx transport error to the equivalent ``requests`` exception"""
+    if isinstance(exc, httpx.ConnectTimeout):
+        return requests.ConnectTimeout(str(exc))
+    if isinstance(exc, httpx.TimeoutException):
+        return requests.ReadTimeout(str(exc))
+    if isinstance(exc, httpx.ConnectError):
+        # Same shape as a refused requests connection, so retries know nothing was sent
+        return requests.ConnectionError(NewConnectionError(None, str(exc)))
+    return requests.ConnectionError(str(exc))
+
+
+def _timeout(timeout) -> 'httpx.Timeout':
+    """Convert a ``requests`` timeout (seconds or ``(connect, read)``) to httpx"""
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+    return httpx.Timeout(timeout)
+
+
+class _RawBody:
+    """
+    The ``Response.raw`` of an HTTP/2 response.
+
+    Exposes the subset of urllib3's response API ``requests`` relies on;
+    ``tell()`` reports the bytes received on the wire like urllib3 does.
+    """
+
+    def __init__(self, response: 'httpx.Response'):
+        self._response = response
+
+    def stream(self, chunk_size: int = 65536, decode_content: bool = True) -> Iterator[bytes]:
+        try:
+            yield from self._response.iter_bytes(chunk_size)
+        except httpx.TransportError as e:
+            raise _translate(e) from e
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        return b''.join(self.stream(amt or 65536))
+
+    def tell(self) -> int:
+        return self._response.num_bytes_downloaded
+
+    def close(self) -> None:
+        self._response.close()
+
+    def release_conn(self) -> None:
+        self._response.close()
+
+
+class HTTP2Adapter(BaseAdapter):
+    """``requests`` transport adapter that sends requests over HTTP/2 with httpx"""
+
+    def __init__(self, *, http1: bool = True, max_connections: int = 10, verify: bool = True):
+        """
+        Initialize the adapter.
+
+        Args:
+            http1: Allow falling back to HTTP/1.1 (False forces h2 prior knowledge)
+            max_connections: Connections per adapter; each carries many concurrent streams
+            verify: Verify TLS certificates
+        """
+        if httpx is None:
+            raise ImportError("HTTP/2 transport requires httpx[http2]")
+        super().__init__()
+        self.client = httpx.Client(
+            http1=http1,
+            http2=True,
+            verify=verify,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        headers = {k: v for k, v in request.headers.items() if k.lower() not in _HOP_BY_HOP}
+        try:
+            upstream = self.client.send(
+                self.client.build_request(
+                    request.method,
+                    request.url,
+                    headers=headers,
+                    content=request.body,
+                    timeout=_timeout(timeout),
+                ),
+                stream=True,
+                follow_redirects=False,
+            )
+        except httpx.TransportError as e:
+            raise _translate(e) from e
+
+        response = requests.Response()
+        response.status_code = upstream.status_code
+        response.reason = upstream.reason_phrase
+        response.headers = CaseInsensitiveDict(upstream.headers.multi_items())
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.raw = _RawBody(upstream)
+        return response
+
+    def close(self) -> None:
+        # Shared adapters outlive the sessions they are mounted on
+        pass
+
+
+_adapters: Dict[bool, HTTP2Adapter] = {}
+_adapters_lock = threading.Lock()
+
+
+def get_http2_adapter(*, http1: bool = True) -> HTTP2Adapter:
+    """Get the process-wide HTTP/2 adapter, so every session shares its connections"""
+    with _adapters_lock:
+        adapter = _adapters.get(http1)
+        if adapter is None:
+            adapter = _adapters[http1] = HTTP2Adapter(http1=http1)
+        return adapter
+
+
+def use_http2(session: requests.Session, *, http1: bool = True) -> requests.Session:
+    """
+    Route every request of a session through the shared HTTP/2 adapter.
+
+    Args:
+        session: The session to configure
+        http1: Allow HTTP/1.1 fallback; False sends h2 with prior knowledge on ``http://``
+
+    Returns:
+        The same session
+    """
+    adapter = get_http2_adapter(http1=http1)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
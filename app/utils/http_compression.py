@@ -0,0 +1,136 @@
+import gzip
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+
+try:
+    import brotli  # noqa: F401  (enables urllib3's "br" decoding)
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# Response encodings we can decode; urllib3 only handles "br" when brotli is installed
+ACCEPT_ENCODING = 'br, gzip, deflate' if brotli is not None else 'gzip, deflate'
+
+# Request bodies of at least this many bytes are gzipped, per endpoint.
+# None disables request compression (the server must accept Content-Encoding: gzip).
+REQUEST_COMPRESSION_THRESHOLD: Dict[str, Optional[int]] = {
+    'beckn_bap': None,
+    'meter_simulator': 4096,
+    'energy_resource_simulator': 4096,
+}
+
+# gzip level 5 is within a few percent of level 9 on JSON at a fraction of the CPU
+GZIP_LEVEL = 5
+
+
+class TransferStats:
+    """
+    Raw vs on-the-wire byte counters of one endpoint.
+
+    ``*_raw`` counts the JSON bytes before compression / after decompression,
+    ``*_wire`` what was actually transmitted.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.compressed_requests = 0
+        self.compressed_responses = 0
+        self.sent_raw = 0
+        self.sent_wire = 0
+        self.received_raw = 0
+        self.received_wire = 0
+
+    def record_request(self, raw: int, wire: int) -> None:
+        """Account for one request body"""
+        with self._lock:
+            self.sent_raw += raw
+            self.sent_wire += wire
+            if wire != raw:
+                self.compressed_requests += 1
+
+    def record_response(self, resp: requests.Response) -> None:
+        """Account for one response whose body has been read"""
+        raw = len(resp.content)
+        wire = response_wire_bytes(resp)
+        with self._lock:
+            self.requests += 1
+            self.received_raw += raw
+            self.received_wire += wire
+            if resp.headers.get('Content-Encoding'):
+                self.compressed_responses += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current counters and compression ratios"""
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'compressed_requests': self.compressed_requests,
+                'compressed_responses': self.compressed_responses,
+                'sent_raw': self.sent_raw,
+                'sent_wire': self.sent_wire,
+                'received_raw': self.received_raw,
+                'received_wire': self.received_wire,
+                'received_ratio': round(self.received_wire / self.received_raw, 3) if self.received_raw else None,
+            }
+
+
+_stats: Dict[str, TransferStats] = {}
+_stats_lock = threading.Lock()
+
+
+def get_transfer_stats(name: str) -> TransferStats:
+    """Get the process-wide byte counters of an endpoint, creating them on first use"""
+    with _stats_lock:
+        stats = _stats.get(name)
+        if stats is None:
+            stats = _stats[name] = TransferStats(name)
+        return stats
+
+
+def transfer_metrics() -> Dict[str, Dict[str, Any]]:
+    """Get the byte counters of every endpoint used so far"""
+    with _stats_lock:
+        stats = list(_stats.values())
+    return {s.name: s.snapshot() for s in stats}
+
+
+def configure_session(session: requests.Session) -> requests.Session:
+    """Advertise every response encoding we can decode on a session"""
+    session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+    return session
+
+
+def encode_body(endpoint: str, body: bytes) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Compress a request body if it is large enough for the endpoint.
+
+    Args:
+        endpoint: Endpoint name, one of REQUEST_COMPRESSION_THRESHOLD
+        body: Encoded JSON body
+
+    Returns:
+        The body to send and the extra headers it needs
+    """
+    threshold = REQUEST_COMPRESSION_THRESHOLD.get(endpoint)
+    if threshold is not None and len(body) >= threshold:
+        compressed = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        if len(compressed) < len(body):
+            get_transfer_stats(endpoint).record_request(len(body), len(compressed))
+            return compressed, {'Content-Encoding': 'gzip'}
+    get_transfer_stats(endpoint).record_request(len(body), len(body))
+    return body, {}
+
+
+def response_wire_bytes(resp: requests.Response) -> int:
+    """Bytes of a (fully read) response body as received, before decompression"""
+    raw = getattr(resp, 'raw', None)
+    if raw is not None and hasattr(raw, 'tell'):
+        try:
+            return raw.tell()
+        except (OSError, ValueError):
+            pass
+    length = resp.headers.get('Content-Length')
+    return int(length) if length and length.isdigit() else len(resp.content)
@@ -0,0 +1,107 @@
+"""
+JSON codec used for HTTP bodies, response decoding and store persistence.
+
+Picks the fastest available backend: ``orjson``, then ``msgspec``, then the
+standard library. All backends produce compact UTF-8 bytes and accept
+``bytes`` or ``str`` when decoding.
+"""
+import json
+import os
+import tempfile
+from typing import Any, Iterable, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+
+if orjson is not None:
+    BACKEND = 'orjson'
+
+    def dumps(obj: Any) -> bytes:
+        """Encode an object to compact JSON bytes"""
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(data: Union[bytes, str]) -> Any:
+        """Decode JSON bytes or text"""
+        return orjson.loads(data)
+
+elif msgspec is not None:
+    BACKEND = 'msgspec'
+    _encoder = msgspec.json.Encoder()
+    _decoder = msgspec.json.Decoder()
+
+    def dumps(obj: Any) -> bytes:
+        """Encode an object to compact JSON bytes"""
+        return _encoder.encode(obj)
+
+    def loads(data: Union[bytes, str]) -> Any:
+        """Decode JSON bytes or text"""
+        return _decoder.decode(data)
+
+else:
+    BACKEND = 'json'
+    _encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+    def dumps(obj: Any) -> bytes:
+        """Encode an object to compact JSON bytes"""
+        return _encoder.encode(obj).encode('utf-8')
+
+    def loads(data: Union[bytes, str]) -> Any:
+        """Decode JSON bytes or text"""
+        return json.loads(data)
+
+
+def _write_atomic(chunks: Iterable[bytes], path: str) -> None:
+    """Write to a unique temporary file next to ``path`` and move it into place"""
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path) or '.', delete=False) as f:
+        try:
+            for chunk in chunks:
+                f.write(chunk)
+        except BaseException:
+            f.close()
+            os.remove(f.name)
+            raise
+    os.replace(f.name, path)
+
+
+def dump_file(obj: Any, path: str) -> None:
+    """
+    Write an object as JSON, atomically replacing the file.
+
+    Args:
+        obj: The object to encode
+        path: Destination file path
+    """
+    _write_atomic([dumps(obj)], path)
+
+
+def dump_lines(objs: Iterable[Any], path: str) -> None:
+    """
+    Write objects as JSON lines, atomically replacing the file.
+
+    Args:
+        objs: The objects to encode, one per line
+        path: Destination file path
+    """
+    _write_atomic((dumps(obj) + b'\n' for obj in objs), path)
+
+
+def load_file(path: str) -> Any:
+    """
+    Read a JSON file.
+
+    Args:
+        path: Source file path
+
+    Returns:
+        The decoded object
+    """
+    with open(path, 'rb') as f:
+        return loads(f.read())
@@ -0,0 +1,123 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Deque, Dict, Optional, TypeVar
+
+import numpy as np
+
+T = TypeVar('T')
+
+
+class LatencyTracker:
+    """
+    Keeps a sliding window of observed latencies per key (e.g. 'retail.search')
+    and derives adaptive timeouts and hedge delays from its percentiles.
+    """
+
+    WINDOW = 256
+    MIN_SAMPLES = 20
+    TIMEOUT_HEADROOM = 1.5
+    MIN_TIMEOUT = 5.0
+
+    def __init__(self, window: int = WINDOW):
+        """
+        Initialize the tracker.
+
+        Args:
+            window: Number of most recent samples kept per key
+        """
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, key: str, seconds: float) -> None:
+        """Record one observed latency for a key"""
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def percentile(self, key: str, q: float) -> Optional[float]:
+        """
+        Get a latency percentile for a key.
+
+        Args:
+            key: The tracked key
+            q: Percentile in [0, 100]
+
+        Returns:
+            The percentile in seconds, or None until MIN_SAMPLES were recorded
+        """
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None or len(samples) < self.MIN_SAMPLES:
+                return None
+            values = np.fromiter(samples, dtype=float, count=len(samples))
+        return float(np.percentile(values, q))
+
+    def timeout_for(self, key: str, default: float) -> float:
+        """
+        Get the timeout to use for the next call of a key.
+
+        The timeout is the observed p99 with some headroom, kept between
+        MIN_TIMEOUT and ``default``; ``default`` is used until enough samples exist.
+        """
+        p99 = self.percentile(key, 99)
+        if p99 is None:
+            return default
+        return min(default, max(self.MIN_TIMEOUT, p99 * self.TIMEOUT_HEADROOM))
+
+    def hedge_delay(self, key: str) -> Optional[float]:
+        """Get the delay (observed p95) after which a duplicate call is fired"""
+        return self.percentile(key, 95)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Get count, p50, p95 and p99 of every tracked key"""
+        with self._lock:
+            keys = list(self._samples)
+        result = {}
+        for key in keys:
+            with self._lock:
+                values = np.fromiter(self._samples[key], dtype=float)
+            if values.size:
+                p50, p95, p99 = np.percentile(values, [50, 95, 99])
+                result[key] = {'count': int(values.size), 'p50': float(p50), 'p95': float(p95), 'p99': float(p99)}
+        return result
+
+
+# Tracker shared by every client of this process
+latency_tracker = LatencyTracker()
+
+_hedge_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix='hedge')
+
+
+def hedged_call(fn: Callable[[], T], delay: float) -> T:
+    """
+    Run an idempotent call and fire a duplicate if it has not answered after ``delay``.
+
+    The first successful result wins; an exception is only raised once both
+    attempts have failed (the primary's exception is raised).
+
+    Args:
+        fn: The idempotent call
+        delay: Seconds to wait for the primary before hedging
+
+    Returns:
+        The result of whichever attempt succeeded first
+    """
+    primary = _hedge_executor.submit(fn)
+    done, _ = wait([primary], timeout=delay)
+    if done:
+        return primary.result()
+
+    hedge = _hedge_executor.submit(fn)
+    pending = {primary, hedge}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                for other in pending:
+                    other.cancel()
+                return future.result()
+    return primary.result()
@@ -0,0 +1,164 @@
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Tuple, TypeVar
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from app.utils.logging_config import get_logger
+
+logger = get_logger('Retry')
+
+T = TypeVar('T')
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    How often and how fast one kind of call may be retried.
+
+    Attributes:
+        max_attempts: Total attempts including the first one
+        base_delay: Backoff base in seconds (full jitter: uniform(0, base * 2**retry))
+        max_delay: Upper bound of a single backoff
+        retry_on_status: HTTP statuses that are worth retrying
+        unsent_only: Only retry attempts that provably never reached the server
+    """
+    max_attempts: int = 3
+    base_delay: float = 0.2
+    max_delay: float = 2.0
+    retry_on_status: Tuple[int, ...] = (429, 502, 503, 504)
+    unsent_only: bool = False
+
+    def backoff(self, retry: int) -> float:
+        """Jittered delay before the given retry (0-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** retry)))
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
+
+# Per-action policies. Reads and Beckn actions without side effects are retried
+# freely. Actions that create something are only retried when the connection
+# was never established: neither the BPP nor Strapi de-duplicates a re-sent
+# create, and a timeout or 5xx does not tell whether it was already applied.
+RETRY_POLICIES: Dict[str, RetryPolicy] = {
+    'search': RetryPolicy(),
+    'select': RetryPolicy(),
+    'init': RetryPolicy(),
+    'status': RetryPolicy(),
+    'confirm': RetryPolicy(unsent_only=True),
+    'GET': RetryPolicy(),
+    'DELETE': RetryPolicy(),
+    'create_meter': RetryPolicy(unsent_only=True),
+    # Sets absolute values, so re-sending it is harmless
+    'update_meter': RetryPolicy(),
+    'create_energy_resource': RetryPolicy(unsent_only=True),
+}
+
+
+def get_retry_policy(action: str) -> RetryPolicy:
+    """Get the retry policy of an action or HTTP method (unknown ones are not retried)"""
+    return RETRY_POLICIES.get(action, NO_RETRY)
+
+
+class RetryBudget:
+    """
+    Process-wide token bucket that caps retries to a fraction of traffic.
+
+    Every first attempt deposits ``ratio`` tokens and every retry spends one,
+    plus a small time-based refill so a quiet process can still retry. When
+    an endpoint is down for everyone, the bucket drains quickly and further
+    failures surface immediately instead of multiplying the load.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 1.0, max_tokens: float = 20.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self._lock = threading.Lock()
+        self._tokens = max_tokens
+        self._refilled_at = time.monotonic()
+        self.stats = {'requests': 0, 'retries': 0, 'exhausted': 0}
+
+    def _refill_locked(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.max_tokens, self._tokens + (now - self._refilled_at) * self.min_per_second)
+        self._refilled_at = now
+
+    def on_request(self) -> None:
+        """Account for a first attempt"""
+        with self._lock:
+            self._refill_locked()
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+            self.stats['requests'] += 1
+
+    def try_spend(self) -> bool:
+        """Take a token for a retry, returning False when the budget is exhausted"""
+        with self._lock:
+            self._refill_locked()
+            if self._tokens < 1:
+                self.stats['exhausted'] += 1
+                return False
+            self._tokens -= 1
+            self.stats['retries'] += 1
+            return True
+
+
+# Budget shared by every client of this process
+retry_budget = RetryBudget()
+
+
+def was_not_sent(exc: BaseException) -> bool:
+    """Check whether a failed attempt never reached the server because no connection was established"""
+    if isinstance(exc, requests.ConnectTimeout):
+        return True
+    if not isinstance(exc, requests.ConnectionError) or not exc.args:
+        return False
+    # urllib3 wraps the underlying error in a MaxRetryError
+    reason = getattr(exc.args[0], 'reason', exc.args[0])
+    return isinstance(reason, NewConnectionError)
+
+
+def is_retryable(exc: BaseException, policy: RetryPolicy) -> bool:
+    """Check whether a failed attempt is worth retrying under a policy"""
+    if policy.unsent_only:
+        return was_not_sent(exc)
+    if isinstance(exc, requests.HTTPError):
+        return exc.response is not None and exc.response.status_code in policy.retry_on_status
+    return isinstance(exc, (requests.ConnectionError, requests.Timeout))
+
+
+def call_with_retry(
+    fn: Callable[[], T],
+    policy: RetryPolicy,
+    *,
+    budget: RetryBudget = retry_budget,
+    name: str = 'call'
+) -> T:
+    """
+    Run a call, retrying transient failures according to a policy and budget.
+
+    Args:
+        fn: The call; it is invoked again unchanged for each retry
+        policy: The retry policy of the call
+        budget: Retry budget to spend from
+        name: Name used in log lines
+
+    Returns:
+        The result of the first successful attempt
+    """
+    budget.on_request()
+    attempts = policy.max_attempts
+
+    for attempt in range(attempts):
+        try:
+            return fn()
+        except Exception as e:
+            last_attempt = attempt + 1 >= attempts
+            if last_attempt or not is_retryable(e, policy) or not budget.try_spend():
+                raise
+            delay = policy.backoff(attempt)
+            logger.info("Retrying %s after %s (attempt %d/%d, in %.2fs)", name, e, attempt + 2, attempts, delay)
+            time.sleep(delay)
@@ -0,0 +1,79 @@
+import copy
+import threading
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class _Call:
+    """One in-flight upstream call and the waiters sharing its outcome"""
+
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Collapses concurrent identical calls into one upstream call.
+
+    The first caller of a key runs the call; callers arriving with the same key
+    while it is in flight block on its outcome and receive their own copy of the
+    result (or the same exception), so no caller can mutate another's response.
+    Nothing is cached: once the call finishes the next caller of the key starts
+    a new one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def do(self, key: str, fn: Callable[[], T], *, group: str = 'default') -> T:
+        """
+        Run ``fn`` unless an identical call is already in flight.
+
+        Args:
+            key: Identity of the call; equal keys are coalesced
+            fn: The upstream call
+            group: Name the call is counted under in ``stats``
+
+        Returns:
+            The result of the upstream call (a deep copy for coalesced callers)
+        """
+        with self._lock:
+            stats = self.stats.setdefault(group, {'calls': 0, 'upstream': 0, 'coalesced': 0})
+            stats['calls'] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                stats['upstream'] += 1
+            else:
+                call.waiters += 1
+                stats['coalesced'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+# Coalescer shared by every client of this process
+single_flight = SingleFlight()
@@ -1,6 +1,14 @@
+from functools import partial
 from typing import Dict, Any, Optional, Union
 import requests
 
+from app.utils import json_codec
+from app.utils.circuit_breaker import get_endpoint_guard
+from app.utils.http_compression import configure_session, encode_body, get_transfer_stats
+from app.utils.http2_transport import use_http2
+from app.utils.retry import call_with_retry, get_retry_policy
+from app.world_engine_apis.projection import ENERGY_RESOURCE_PROJECTIONS, Projection, resolve_projection
+
 
 class EnergyResourceClient:
     """
@@ -8,8 +16,12 @@ class EnergyResourceClient:
     Provides methods for CRUD operations on energy resources.
     """
 
+    # Circuit breaker / bulkhead shared by every client of this endpoint
+    ENDPOINT = "energy_resource_simulator"
+
     def __init__(
         self,
+        http2: bool = False,
     ):
         """
         Initialize the energy resource client.
@@ -18,27 +30,83 @@ class EnergyResourceClient:
         ----------
         base_url    Base URL for the world engine API
         session     Optional pre-configured requests.Session
+        http2       Send requests through the shared HTTP/2 transport
         """
         self.base_url = "http://world-engine-team13.becknprotocol.io/meter-data-simulator"
-        self.session = requests.Session()
+        self.session = configure_session(requests.Session())
         self.session.headers.update({
             'Content-Type': 'application/json'
         })
+        if http2:
+            use_http2(self.session)
+
+    def _request(
+        self,
+        method: str,
+        url: str,
+        *,
+        action: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+        **kwargs
+    ) -> Any:
+        """
+        Send a request to the simulator and return the parsed JSON response.
+        Transient failures are retried according to the retry policy of
+        ``action`` (or of the HTTP method when no action is given).
+
+        Parameters
+        ----------
+        method          HTTP method
+        url             Fully-qualified URL
+        action          Name of the operation, used to pick the retry policy
+        idempotency_key Key identifying a create, sent as ``Idempotency-Key`` (creates are
+                        only retried when the connection failed, since Strapi ignores it)
+        kwargs          Extra arguments for ``requests.Session.request``
+
+        Returns
+        -------
+        Parsed JSON response. Raises ``requests.HTTPError`` on non-2xx and
+        ``EndpointUnavailableError`` while the simulator is degraded.
+        """
+        if idempotency_key:
+            kwargs["headers"] = {**kwargs.get("headers", {}), "Idempotency-Key": idempotency_key}
+        action = action or method
+        return call_with_retry(
+            partial(self._send, method, url, **kwargs),
+            get_retry_policy(action),
+            name=f"{self.ENDPOINT}.{action}"
+        )
+
+    def _send(self, method: str, url: str, **kwargs) -> Any:
+        """Send one request attempt through the endpoint's circuit breaker"""
+        if "json" in kwargs:
+            # Keep the caller's headers (e.g. Idempotency-Key) next to the encoding ones
+            kwargs["data"], encoding_headers = encode_body(self.ENDPOINT, json_codec.dumps(kwargs.pop("json")))
+            kwargs["headers"] = {**kwargs.get("headers", {}), **encoding_headers}
+        with get_endpoint_guard(self.ENDPOINT):
+            resp = self.session.request(method, url, **kwargs)
+            resp.raise_for_status()
+        get_transfer_stats(self.ENDPOINT).record_response(resp)
+        return json_codec.loads(resp.content)
 
     def create_energy_resource(
         self,
         name: str,
         type: str,
         meter_id: Union[int, str],
+        *,
+        idempotency_key: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         Create a new energy resource.
+        The request is only retried on transient failures when an idempotency key is given.
 
         Parameters
         ----------
-        name        Name of the energy resource
-        type        Type of the energy resource (e.g., "CONSUMER")
-        meter_id    ID of the associated meter
+        name            Name of the energy resource
+        type            Type of the energy resource (e.g., "CONSUMER")
+        meter_id        ID of the associated meter
+        idempotency_key Key identifying this creation across retries
 
         Returns
         -------
@@ -54,9 +122,9 @@ class EnergyResourceClient:
             }
         }
 
-        resp = self.session.post(url, json=payload)
-        resp.raise_for_status()
-        return resp.json()
+        return self._request(
+            "POST", url, action="create_energy_resource", idempotency_key=idempotency_key, json=payload
+        )
 
     def get_energy_resource_by_id(
         self,
@@ -64,7 +132,8 @@ class EnergyResourceClient:
         *,
         populate_meter_parent: bool = True,
         populate_meter_children: bool = True,
-        populate_meter_appliances: bool = True
+        populate_meter_appliances: bool = True,
+        projection: Union[str, Projection, None] = None
     ) -> Dict[str, Any]:
         """
         Get a specific energy resource by its ID.
@@ -75,6 +144,7 @@ class EnergyResourceClient:
         populate_meter_parent    Whether to populate meter parent data
         populate_meter_children  Whether to populate meter children data
         populate_meter_appliances Whether to populate meter appliances data
+        projection               ENERGY_RESOURCE_PROJECTIONS preset or Projection; replaces the populate flags
 
         Returns
         -------
@@ -83,16 +153,17 @@ class EnergyResourceClient:
         url = f"{self.base_url}/energy-resources/{resource_id}"
         
         params = {}
-        if populate_meter_parent:
-            params["populate[0]"] = "meter.parent"
-        if populate_meter_children:
-            params["populate[1]"] = "meter.children"
-        if populate_meter_appliances:
-            params["populate[2]"] = "meter.appliances"
-
-        resp = self.session.get(url, params=params)
-        resp.raise_for_status()
-        return resp.json()
+        if projection is not None:
+            params = resolve_projection(projection, ENERGY_RESOURCE_PROJECTIONS).to_params()
+        else:
+            if populate_meter_parent:
+                params["populate[0]"] = "meter.parent"
+            if populate_meter_children:
+                params["populate[1]"] = "meter.children"
+            if populate_meter_appliances:
+                params["populate[2]"] = "meter.appliances"
+
+        return self._request("GET", url, params=params)
 
     def delete_energy_resource(self, resource_id: Union[int, str]) -> Dict[str, Any]:
         """
@@ -108,9 +179,7 @@ class EnergyResourceClient:
         """
         url = f"{self.base_url}/energy-resources/{resource_id}"
         
-        resp = self.session.delete(url)
-        resp.raise_for_status()
-        return resp.json()
+        return self._request("DELETE", url)
 
 
 # --------------------------------------------------------------------------- #
@@ -1,8 +1,17 @@
+from functools import partial
 from typing import Dict, Any, Optional, List, Union
 from dataclasses import dataclass
 import requests
 import json
 
+from app.utils import json_codec
+from app.utils.circuit_breaker import get_endpoint_guard
+from app.utils.http_compression import configure_session, encode_body, get_transfer_stats
+from app.utils.http2_transport import use_http2
+from app.utils.retry import call_with_retry, get_retry_policy
+from app.utils.single_flight import single_flight
+from app.world_engine_apis.projection import METER_PROJECTIONS, Projection, resolve_projection
+
 
 class MeterClient:
     """
@@ -10,8 +19,12 @@ class MeterClient:
     Provides methods for CRUD operations on meters and accessing meter data.
     """
 
+    # Circuit breaker / bulkhead shared by every client of this endpoint
+    ENDPOINT = "meter_simulator"
+
     def __init__(
         self,
+        http2: bool = False,
     ):
         """
         Initialize the meter client.
@@ -20,25 +33,88 @@ class MeterClient:
         ----------
         base_url    Base URL for the world engine API
         session     Optional pre-configured requests.Session
+        http2       Send requests through the shared HTTP/2 transport
         """
         self.base_url = "http://world-engine-team13.becknprotocol.io/meter-data-simulator"
-        self.session = requests.Session()
+        self.session = configure_session(requests.Session())
         self.session.headers.update({
             'Content-Type': 'application/json'
         })
+        if http2:
+            use_http2(self.session)
+
+    def _request(
+        self,
+        method: str,
+        url: str,
+        *,
+        action: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+        **kwargs
+    ) -> Any:
+        """
+        Send a request to the simulator and return the parsed JSON response.
+        Transient failures are retried according to the retry policy of
+        ``action`` (or of the HTTP method when no action is given), and
+        identical concurrent GETs are coalesced into one upstream call.
+
+        Parameters
+        ----------
+        method          HTTP method
+        url             Fully-qualified URL
+        action          Name of the operation, used to pick the retry policy
+        idempotency_key Key identifying a create, sent as ``Idempotency-Key`` (creates are
+                        only retried when the connection failed, since Strapi ignores it)
+        kwargs          Extra arguments for ``requests.Session.request``
+
+        Returns
+        -------
+        Parsed JSON response. Raises ``requests.HTTPError`` on non-2xx and
+        ``EndpointUnavailableError`` while the simulator is degraded.
+        """
+        if idempotency_key:
+            kwargs["headers"] = {**kwargs.get("headers", {}), "Idempotency-Key": idempotency_key}
+        action = action or method
+        send = partial(
+            call_with_retry,
+            partial(self._send, method, url, **kwargs),
+            get_retry_policy(action),
+            name=f"{self.ENDPOINT}.{action}"
+        )
+        if method == "GET":
+            # Identical concurrent reads share one upstream call
+            params = sorted((kwargs.get("params") or {}).items())
+            return single_flight.do(f"{url}|{params}", send, group=f"{self.ENDPOINT}.GET")
+        return send()
+
+    def _send(self, method: str, url: str, **kwargs) -> Any:
+        """Send one request attempt through the endpoint's circuit breaker"""
+        if "json" in kwargs:
+            # Keep the caller's headers (e.g. Idempotency-Key) next to the encoding ones
+            kwargs["data"], encoding_headers = encode_body(self.ENDPOINT, json_codec.dumps(kwargs.pop("json")))
+            kwargs["headers"] = {**kwargs.get("headers", {}), **encoding_headers}
+        with get_endpoint_guard(self.ENDPOINT):
+            resp = self.session.request(method, url, **kwargs)
+            resp.raise_for_status()
+        get_transfer_stats(self.ENDPOINT).record_response(resp)
+        return json_codec.loads(resp.content)
 
     def create_meter(
         self,
         code: str,
         energy_resource: Optional[str] = None,
+        *,
+        idempotency_key: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         Create a new meter.
+        The request is only retried on transient failures when an idempotency key is given.
 
         Parameters
         ----------
         code            Unique identifier for the meter
         energy_resource Optional energy resource identifier
+        idempotency_key Key identifying this creation across retries
 
         Returns
         -------
@@ -62,14 +138,13 @@ class MeterClient:
             }
         }
 
-        resp = self.session.post(url, json=payload)
-        resp.raise_for_status()
-        return resp.json()
+        return self._request("POST", url, action="create_meter", idempotency_key=idempotency_key, json=payload)
 
     def get_all_meters(
         self,
         *,
-        sort_by: str = "children.code:desc"
+        sort_by: str = "children.code:desc",
+        projection: Union[str, Projection, None] = None
     ) -> Dict[str, Any]:
         """
         Get all meters by automatically handling pagination.
@@ -78,12 +153,15 @@ class MeterClient:
         Parameters
         ----------
         sort_by     Field to sort by (default: children.code:desc)
+        projection  Fields/relations to return: a METER_PROJECTIONS preset or a
+                    Projection (default: "full", every relation populated)
 
         Returns
         -------
         Dict containing the API response with all meters combined
         """
         url = f"{self.base_url}/meters"
+        fields = resolve_projection(projection, METER_PROJECTIONS).to_params()
         page_size = 10000
         page = 1
         all_data = []
@@ -93,16 +171,11 @@ class MeterClient:
             params = {
                 "pagination[page]": page,
                 "pagination[pageSize]": page_size,
-                "populate[0]": "parent",
-                "populate[1]": "energyResource",
-                "populate[2]": "children",
-                "populate[3]": "appliances",
+                **fields,
                 "sort[0]": sort_by
             }
 
-            resp = self.session.get(url, params=params)
-            resp.raise_for_status()
-            data = resp.json()
+            data = self._request("GET", url, params=params)
 
             # Get total pages from the first response
             if page == 1:
@@ -117,6 +190,122 @@ class MeterClient:
         # Construct the final response in the same format as the API
         return all_data
     
+    def find_meters(
+        self,
+        filters: Dict[str, Any],
+        *,
+        page_size: int = 100,
+        projection: Union[str, Projection, None] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the meters whose fields equal the given values.
+
+        Parameters
+        ----------
+        filters     Field -> value, e.g. {"code": "METER306"} (Strapi ``$eq`` filters)
+        page_size   Maximum number of meters returned
+        projection  METER_PROJECTIONS preset or Projection (default: "full")
+
+        Returns
+        -------
+        List of matching meters
+        """
+        url = f"{self.base_url}/meters"
+
+        params = {
+            "pagination[page]": 1,
+            "pagination[pageSize]": page_size,
+            **resolve_projection(projection, METER_PROJECTIONS).to_params(),
+        }
+        for field, value in filters.items():
+            params[f"filters[{field}][$eq]"] = value
+
+        data = self._request("GET", url, params=params)
+        return data['data']['results']
+
+    def get_meters_updated_since(
+        self,
+        since: str,
+        *,
+        page_size: int = 1000,
+        projection: Union[str, Projection, None] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the meters updated at or after a timestamp, oldest update first.
+
+        Parameters
+        ----------
+        since       ISO-8601 ``updatedAt`` watermark
+        page_size   Meters fetched per page
+        projection  METER_PROJECTIONS preset or Projection (default: "full")
+
+        Returns
+        -------
+        List of updated meters
+        """
+        url = f"{self.base_url}/meters"
+        fields = resolve_projection(projection, METER_PROJECTIONS).to_params()
+        page = 1
+        all_data = []
+        total_pages = 1
+
+        while page <= total_pages:
+            params = {
+                "pagination[page]": page,
+                "pagination[pageSize]": page_size,
+                "filters[updatedAt][$gte]": since,
+                **fields,
+                "sort[0]": "updatedAt:asc",
+                "sort[1]": "id:asc"
+            }
+
+            data = self._request("GET", url, params=params)
+            if page == 1:
+                total_pages = (data.get('data', {}).get('pagination', {}).get('pageCount', 1))
+            all_data.extend(data['data']['results'])
+            page += 1
+
+        return all_data
+
+    def get_all_meter_ids(self) -> List[int]:
+        """
+        Get the IDs of every meter, without any other field.
+
+        Returns
+        -------
+        List of meter IDs
+        """
+        return [int(meter['id']) for meter in self.get_all_meters(sort_by="id:asc", projection="ids")]
+
+    def get_all_meter_codes(self) -> List[str]:
+        """
+        Get the codes of every meter, without any other field.
+
+        Returns
+        -------
+        List of meter codes
+        """
+        return [
+            meter['code'] for meter in self.get_all_meters(sort_by="id:asc", projection="codes") if meter.get('code')
+        ]
+
+    def update_meter(self, meter_id: Union[int, str], fields: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Update fields of a meter (e.g. ``{"productionLoadFactor": 0.42}``).
+
+        Parameters
+        ----------
+        meter_id    ID of the meter to update
+        fields      Fields to set; the others are left unchanged
+
+        Returns
+        -------
+        Dict containing the API response
+        """
+        url = f"{self.base_url}/meters/{meter_id}"
+
+        return self._request("PUT", url, action="update_meter", json={"data": fields})
+
     def delete_meter(self, meter_id: Union[int, str]) -> Dict[str, Any]:
         """
         Delete a meter by its ID.
@@ -131,16 +320,15 @@ class MeterClient:
         """
         url = f"{self.base_url}/meters/{meter_id}"
         
-        resp = self.session.delete(url)
-        resp.raise_for_status()
-        return resp.json()
+        return self._request("DELETE", url)
 
     def get_meter_by_id(
         self,
         meter_id: Union[int, str],
         *,
         populate_parent: bool = True,
-        populate_children: bool = True
+        populate_children: bool = True,
+        projection: Union[str, Projection, None] = None
     ) -> Dict[str, Any]:
         """
         Get a specific meter by its ID.
@@ -150,6 +338,7 @@ class MeterClient:
         meter_id          ID of the meter to retrieve
         populate_parent   Whether to populate parent data
         populate_children Whether to populate children data
+        projection        METER_PROJECTIONS preset or Projection; replaces the populate flags
 
         Returns
         -------
@@ -158,14 +347,15 @@ class MeterClient:
         url = f"{self.base_url}/meters/{meter_id}"
         
         params = {}
-        if populate_parent:
-            params["populate[0]"] = "parent"
-        if populate_children:
-            params["populate[1]"] = "children"
+        if projection is not None:
+            params = resolve_projection(projection, METER_PROJECTIONS).to_params()
+        else:
+            if populate_parent:
+                params["populate[0]"] = "parent"
+            if populate_children:
+                params["populate[1]"] = "children"
 
-        resp = self.session.get(url, params=params)
-        resp.raise_for_status()
-        return resp.json()
+        return self._request("GET", url, params=params)
 
     def get_meter_historical_data(self, dataset_id: Union[int, str]) -> Dict[str, Any]:
         """
@@ -181,9 +371,7 @@ class MeterClient:
         """
         url = f"{self.base_url}/meter-datasets/{dataset_id}"
         
-        resp = self.session.get(url)
-        resp.raise_for_status()
-        return resp.json()
+        return self._request("GET", url)
 
 
 # --------------------------------------------------------------------------- #
@@ -0,0 +1,192 @@
+from typing import Dict, Any, List, Iterable, Union
+
+import numpy as np
+
+from app.world_engine_apis.meter_replica import MeterReplica, related_id
+
+
+class MeterTree:
+    """
+    Array-based index of the meter hierarchy (feeder -> transformer -> household).
+
+    Nodes are numbered ``0..n-1`` in the order of ``ids``; ``parent`` holds the
+    parent's node number (-1 for roots). A pre-order (Euler tour) walk assigns
+    every node an interval ``[tin, tout)`` of ``order`` that contains exactly
+    its subtree, so subtree membership is two comparisons and a subtree
+    roll-up of any number of series is one prefix sum over ``order``.
+    """
+
+    def __init__(self, ids: np.ndarray, parent: np.ndarray):
+        """
+        Build the index from parent pointers.
+
+        Parameters
+        ----------
+        ids         Meter IDs, one per node
+        parent      Node number of each node's parent, -1 for roots
+        """
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.parent = np.asarray(parent, dtype=np.int64).copy()
+        self._node: Dict[int, int] = {int(meter_id): node for node, meter_id in enumerate(self.ids)}
+        n = len(self.ids)
+
+        self._index_children()
+        self.order = np.empty(n, dtype=np.int64)
+        self.tin = np.full(n, -1, dtype=np.int64)
+        self.tout = np.empty(n, dtype=np.int64)
+        self.depth = np.zeros(n, dtype=np.int64)
+        position = self._walk(np.flatnonzero(self.parent < 0), 0)
+        if position < n:
+            # Nodes not reachable from a root sit on a parent cycle: cut each cycle once
+            for node in range(n):
+                if self.tin[node] < 0:
+                    self.parent[node] = -1
+                    position = self._walk([node], position)
+            # The walk skipped the cut edges; drop them from the children index too
+            self._index_children()
+
+    def _index_children(self) -> None:
+        """Index the children in CSR form: the children of v are child_nodes[child_start[v]:child_start[v + 1]]"""
+        has_parent = self.parent >= 0
+        children_of = self.parent[has_parent]
+        child_order = np.argsort(children_of, kind='stable')
+        self.child_nodes = np.flatnonzero(has_parent)[child_order]
+        self.child_start = np.zeros(len(self.ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(children_of, minlength=len(self.ids)), out=self.child_start[1:])
+
+    def _walk(self, roots: Iterable[int], position: int) -> int:
+        """Iterative pre-order walk from the given roots, filling order/tin/tout/depth"""
+        for root in roots:
+            self.depth[root] = 0
+            stack = [(int(root), False)]
+            while stack:
+                node, leaving = stack.pop()
+                if leaving:
+                    self.tout[node] = position
+                    continue
+                if self.tin[node] >= 0:
+                    continue
+                self.tin[node] = position
+                self.order[position] = node
+                position += 1
+                stack.append((node, True))
+                for child in self.child_nodes[self.child_start[node]:self.child_start[node + 1]][::-1]:
+                    if self.tin[child] < 0:
+                        self.depth[child] = self.depth[node] + 1
+                        stack.append((int(child), False))
+        return position
+
+    @classmethod
+    def from_meters(cls, meters: List[Dict[str, Any]]) -> 'MeterTree':
+        """
+        Build the tree from meters as returned by the simulator.
+
+        The ``parent`` relation is used when present; otherwise populated
+        ``children`` lists are used to find the parent.
+
+        Parameters
+        ----------
+        meters      Meters with ``id`` and ``parent`` and/or ``children``
+
+        Returns
+        -------
+        The tree; parents outside the list make their children roots
+        """
+        ids = np.fromiter((int(m['id']) for m in meters), dtype=np.int64, count=len(meters))
+        node_of = {int(meter_id): node for node, meter_id in enumerate(ids)}
+        parent = np.full(len(ids), -1, dtype=np.int64)
+        for node, meter in enumerate(meters):
+            parent_id = related_id(meter.get('parent'))
+            if parent_id is not None:
+                parent[node] = node_of.get(parent_id, -1)
+        for node, meter in enumerate(meters):
+            for child in meter.get('children') or []:
+                child_node = node_of.get(related_id(child))
+                if child_node is not None and parent[child_node] < 0 and child_node != node:
+                    parent[child_node] = node
+        return cls(ids, parent)
+
+    @classmethod
+    def from_replica(cls, replica: MeterReplica) -> 'MeterTree':
+        """Build the tree from every meter of a replica"""
+        return cls.from_meters(replica.find())
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def node(self, meter_id: Union[int, str]) -> int:
+        """Node number of a meter ID (KeyError if unknown)"""
+        return self._node[int(meter_id)]
+
+    def roots(self) -> np.ndarray:
+        """Meter IDs of the roots"""
+        return self.ids[self.parent < 0]
+
+    def children(self, meter_id: Union[int, str]) -> np.ndarray:
+        """Meter IDs of the direct children of a meter"""
+        node = self.node(meter_id)
+        return self.ids[self.child_nodes[self.child_start[node]:self.child_start[node + 1]]]
+
+    def subtree(self, meter_id: Union[int, str]) -> np.ndarray:
+        """Meter IDs of a meter and all its descendants, in pre-order"""
+        node = self.node(meter_id)
+        return self.ids[self.order[self.tin[node]:self.tout[node]]]
+
+    def ancestors(self, meter_id: Union[int, str]) -> List[int]:
+        """Meter IDs from the parent of a meter up to its root"""
+        result = []
+        node = self.parent[self.node(meter_id)]
+        while node >= 0:
+            result.append(int(self.ids[node]))
+            node = self.parent[node]
+        return result
+
+    def is_ancestor(self, ancestor_id: Union[int, str], meter_id: Union[int, str]) -> bool:
+        """Check whether a meter is in the subtree of another (a meter is its own ancestor)"""
+        a, m = self.node(ancestor_id), self.node(meter_id)
+        return bool(self.tin[a] <= self.tin[m] < self.tout[a])
+
+    def align(self, values: Dict[Union[int, str], Any], default: float = 0.0) -> np.ndarray:
+        """
+        Arrange per-meter values in node order.
+
+        Parameters
+        ----------
+        values      Meter ID -> scalar or 1-D series (all series of equal length)
+        default     Value of meters missing from ``values``
+
+        Returns
+        -------
+        Array of shape ``(n,)`` or ``(n, T)``
+        """
+        sample = next(iter(values.values()), default)
+        shape = (len(self.ids),) + np.shape(sample)
+        result = np.full(shape, default, dtype=float)
+        for meter_id, value in values.items():
+            node = self._node.get(int(meter_id))
+            if node is not None:
+                result[node] = value
+        return result
+
+    def rollup(self, values: np.ndarray) -> np.ndarray:
+        """
+        Sum every node's own values over its subtree.
+
+        Parameters
+        ----------
+        values      Own consumption/production of every node, shape ``(n,)`` or
+                    ``(n, T)`` in node order (see ``align``)
+
+        Returns
+        -------
+        Subtree totals of the same shape: row ``v`` is the sum over v and all its descendants
+        """
+        values = np.asarray(values)
+        prefix = np.zeros((len(self.ids) + 1,) + values.shape[1:], dtype=np.result_type(values, np.float64))
+        np.cumsum(values[self.order], axis=0, out=prefix[1:])
+        return prefix[self.tout] - prefix[self.tin]
+
+    def rollup_by_id(self, values: Dict[Union[int, str], Any]) -> Dict[int, Any]:
+        """``rollup`` for a ``{meter ID: value}`` mapping, returning the totals keyed by meter ID"""
+        totals = self.rollup(self.align(values))
+        return {int(meter_id): total for meter_id, total in zip(self.ids, totals)}
@@ -0,0 +1,401 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Iterable, Union
+
+import requests
+
+from app.utils import json_codec
+from app.utils.logging_config import get_logger
+from app.world_engine_apis.meter_client import MeterClient
+
+logger = get_logger('MeterReplica')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meters (
+    id                 INTEGER PRIMARY KEY,
+    code               TEXT,
+    pincode            TEXT,
+    city               TEXT,
+    energy_resource_id INTEGER,
+    parent_id          INTEGER,
+    updated_at         TEXT,
+    data               BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS meters_code ON meters (code);
+CREATE INDEX IF NOT EXISTS meters_pincode ON meters (pincode);
+CREATE INDEX IF NOT EXISTS meters_city ON meters (city);
+CREATE INDEX IF NOT EXISTS meters_energy_resource ON meters (energy_resource_id);
+CREATE INDEX IF NOT EXISTS meters_parent ON meters (parent_id);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_UPSERT = """
+INSERT OR REPLACE INTO meters (id, code, pincode, city, energy_resource_id, parent_id, updated_at, data)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def related_id(value: Any) -> Optional[int]:
+    """Id of a relation that is either populated (``{"id": ...}``) or a bare id"""
+    if isinstance(value, dict):
+        value = value.get('id')
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _meter_row(meter: Dict[str, Any]) -> tuple:
+    """Column values of one meter as returned by the simulator"""
+    return (
+        int(meter['id']),
+        meter.get('code'),
+        str(meter['pincode']) if meter.get('pincode') is not None else None,
+        meter.get('city'),
+        related_id(meter.get('energyResource')),
+        related_id(meter.get('parent')),
+        meter.get('updatedAt'),
+        json_codec.dumps(meter),
+    )
+
+
+def _watermark(rows: List[tuple]) -> Optional[str]:
+    """Newest ``updatedAt`` of a batch of meter rows"""
+    return max((row[6] for row in rows if row[6]), default=None)
+
+
+def _parse_timestamp(value: str) -> float:
+    """Epoch seconds of a Strapi ISO-8601 timestamp (``2025-05-01T10:00:00.000Z``)"""
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+
+def _unwrap(response: Any) -> Optional[Dict[str, Any]]:
+    """The meter of a single-meter response (``{"data": meter}`` or the bare meter)"""
+    if isinstance(response, dict) and isinstance(response.get('data'), dict):
+        response = response['data']
+    if isinstance(response, dict) and response.get('id') is not None:
+        return response
+    return None
+
+
+class MeterReplica:
+    """
+    Local SQLite replica of the World Engine meters.
+
+    A bulk sync loads every meter from ``MeterClient.get_all_meters`` in one
+    transaction. Lookups by id, ``code``, ``pincode``, ``city`` or energy
+    resource are then indexed point queries instead of a scan of the 10k-row
+    pages, and id / code lookups that miss fall through to the simulator and
+    are cached in the replica.
+
+    The full meter JSON is kept next to the indexed columns, so results have
+    the same shape as the simulator's.
+    """
+
+    # Lookup fields and the column they are indexed under
+    INDEXED_FIELDS = {
+        'code': 'code',
+        'pincode': 'pincode',
+        'city': 'city',
+        'energyResource': 'energy_resource_id',
+        'parent': 'parent_id',
+    }
+
+    def __init__(
+        self,
+        client: Optional[MeterClient] = None,
+        path: str = os.path.join('replica', 'meters.db'),
+    ):
+        """
+        Open (or create) the replica.
+
+        Parameters
+        ----------
+        client      Client used for syncs and read-through (default: a new MeterClient)
+        path        SQLite database file, or ":memory:"
+        """
+        self.client = client or MeterClient()
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _transaction(self):
+        """Hold the lock and run the block in one write transaction"""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------ #
+    # Writes
+
+    def sync(self) -> int:
+        """
+        Replace the replica with every meter of the simulator.
+
+        Returns
+        -------
+        Number of meters stored
+        """
+        start = time.perf_counter()
+        meters = self.client.get_all_meters()
+        rows = [_meter_row(meter) for meter in meters]
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM meters')
+            conn.executemany(_UPSERT, rows)
+            self._set_state_locked('last_full_sync', str(time.time()))
+            self._set_state_locked('watermark', _watermark(rows))
+        logger.info("Synced %d meters in %.2fs", len(rows), time.perf_counter() - start)
+        return len(rows)
+
+    def sync_delta(self, *, reconcile_deletes: bool = True) -> Dict[str, Any]:
+        """
+        Apply only the meters changed since the last sync.
+
+        Meters with ``updatedAt`` at or after the stored watermark are upserted
+        (the overlap at the watermark itself is re-applied, which is harmless,
+        so updates sharing its timestamp are never missed). Deleted meters leave
+        no ``updatedAt`` trace, so they are found by comparing the ID list of
+        the simulator with the replica. Falls back to a full sync when the
+        replica has never been synced.
+
+        Parameters
+        ----------
+        reconcile_deletes   Also remove meters that no longer exist upstream
+
+        Returns
+        -------
+        Metrics of this sync (see sync_metrics)
+        """
+        watermark = self.get_state('watermark')
+        start = time.perf_counter()
+        if watermark is None:
+            self.sync()
+            upserted, deleted = self.count(), 0
+        else:
+            meters = self.client.get_meters_updated_since(watermark)
+            rows = [_meter_row(meter) for meter in meters]
+            stale = []
+            if reconcile_deletes:
+                remote_ids = set(self.client.get_all_meter_ids())
+                with self._lock:
+                    local_ids = [row[0] for row in self._conn.execute('SELECT id FROM meters')]
+                stale = [(meter_id,) for meter_id in local_ids if meter_id not in remote_ids]
+            with self._transaction() as conn:
+                conn.executemany(_UPSERT, rows)
+                conn.executemany('DELETE FROM meters WHERE id = ?', stale)
+                self._set_state_locked('watermark', max(watermark, _watermark(rows) or watermark))
+            upserted, deleted = len(rows), len(stale)
+
+        with self._transaction():
+            self._set_state_locked('last_delta_sync', str(time.time()))
+            self._set_state_locked('last_delta_duration', str(time.perf_counter() - start))
+            self._set_state_locked('last_delta_upserted', str(upserted))
+            self._set_state_locked('last_delta_deleted', str(deleted))
+        metrics = self.sync_metrics()
+        logger.info(
+            "Delta sync: %d upserted, %d deleted in %.2fs (lag %.0fs)",
+            upserted, deleted, metrics['last_delta_duration'], metrics['lag_seconds'] or 0
+        )
+        return metrics
+
+    def upsert(self, meters: Iterable[Dict[str, Any]]) -> int:
+        """
+        Insert or replace meters in the replica.
+
+        Parameters
+        ----------
+        meters      Meters as returned by the simulator
+
+        Returns
+        -------
+        Number of meters written
+        """
+        rows = [_meter_row(meter) for meter in meters]
+        with self._transaction() as conn:
+            conn.executemany(_UPSERT, rows)
+        return len(rows)
+
+    def delete(self, meter_ids: Iterable[Union[int, str]]) -> int:
+        """
+        Remove meters from the replica.
+
+        Parameters
+        ----------
+        meter_ids   IDs of the meters to remove
+
+        Returns
+        -------
+        Number of meters removed
+        """
+        with self._transaction() as conn:
+            cursor = conn.executemany('DELETE FROM meters WHERE id = ?', [(int(i),) for i in meter_ids])
+        return cursor.rowcount
+
+    # ------------------------------------------------------------------ #
+    # Reads
+
+    def get(self, meter_id: Union[int, str], *, read_through: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Get a meter by its ID.
+
+        Parameters
+        ----------
+        meter_id        ID of the meter
+        read_through    Fetch (and cache) the meter from the simulator if it is not replicated
+
+        Returns
+        -------
+        The meter, or None if it does not exist
+        """
+        with self._lock:
+            row = self._conn.execute('SELECT data FROM meters WHERE id = ?', (int(meter_id),)).fetchone()
+        if row is not None:
+            return json_codec.loads(row[0])
+        if not read_through:
+            return None
+        try:
+            meter = _unwrap(self.client.get_meter_by_id(meter_id))
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                return None
+            raise
+        if meter is not None:
+            self.upsert([meter])
+        return meter
+
+    def get_by_code(self, code: str, *, read_through: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Get a meter by its code.
+
+        Parameters
+        ----------
+        code            Meter code, e.g. "METER306"
+        read_through    Fetch (and cache) the meter from the simulator if it is not replicated
+
+        Returns
+        -------
+        The meter, or None if it does not exist
+        """
+        meters = self.find(code=code)
+        if meters:
+            return meters[0]
+        if not read_through:
+            return None
+        meters = self.client.find_meters({"code": code}, page_size=1)
+        if not meters:
+            return None
+        self.upsert(meters)
+        return meters[0]
+
+    def find(self, *, limit: Optional[int] = None, **filters: Any) -> List[Dict[str, Any]]:
+        """
+        Get the replicated meters matching every given field.
+
+        Parameters
+        ----------
+        limit       Maximum number of meters returned
+        filters     Field -> value, fields from INDEXED_FIELDS
+                    (``energyResource`` / ``parent`` take the related ID)
+
+        Returns
+        -------
+        Matching meters ordered by ID
+        """
+        clauses, values = [], []
+        for field, value in filters.items():
+            column = self.INDEXED_FIELDS.get(field)
+            if column is None:
+                raise ValueError(f"Field must be one of {list(self.INDEXED_FIELDS)}")
+            if column in ('energy_resource_id', 'parent_id'):
+                value = related_id(value)
+            elif column == 'pincode' and value is not None:
+                value = str(value)
+            clauses.append(f'{column} IS ?')
+            values.append(value)
+
+        query = 'SELECT data FROM meters'
+        if clauses:
+            query += ' WHERE ' + ' AND '.join(clauses)
+        query += ' ORDER BY id'
+        if limit is not None:
+            query += ' LIMIT ?'
+            values.append(int(limit))
+
+        with self._lock:
+            rows = self._conn.execute(query, values).fetchall()
+        return [json_codec.loads(row[0]) for row in rows]
+
+    def count(self) -> int:
+        """Number of replicated meters"""
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM meters').fetchone()[0]
+
+    # ------------------------------------------------------------------ #
+    # Sync state
+
+    def _set_state_locked(self, key: str, value: str) -> None:
+        self._conn.execute('INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)', (key, value))
+
+    def sync_metrics(self) -> Dict[str, Any]:
+        """
+        Get the freshness of the replica.
+
+        Returns
+        -------
+        Dict with the ``watermark`` (newest replicated ``updatedAt``), ``lag_seconds``
+        (now minus the watermark), ``since_last_sync_seconds`` and the counters of the
+        last delta sync
+        """
+        with self._lock:
+            state = dict(self._conn.execute('SELECT key, value FROM sync_state').fetchall())
+        now = time.time()
+        watermark = state.get('watermark')
+        last_sync = max(float(state.get('last_full_sync') or 0), float(state.get('last_delta_sync') or 0))
+        return {
+            'watermark': watermark,
+            'lag_seconds': now - _parse_timestamp(watermark) if watermark else None,
+            'since_last_sync_seconds': now - last_sync if last_sync else None,
+            'last_delta_duration': float(state.get('last_delta_duration') or 0),
+            'last_delta_upserted': int(state.get('last_delta_upserted') or 0),
+            'last_delta_deleted': int(state.get('last_delta_deleted') or 0),
+            'meters': self.count(),
+        }
+
+    def get_state(self, key: str) -> Optional[str]:
+        """Get a persisted sync state value (e.g. ``last_full_sync``)"""
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM sync_state WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+
+# --------------------------------------------------------------------------- #
+# Example usage
+if __name__ == "__main__":
+    replica = MeterReplica()
+    print("Synced meters:", replica.sync())
+    print("Delta sync:", replica.sync_delta())
+    print("METER306:", replica.get_by_code("METER306"))
+    print("Meters in 94103:", len(replica.find(pincode="94103")))
@@ -0,0 +1,179 @@
+import math
+from typing import Dict, Any, Optional, List, Tuple, Union
+
+import numpy as np
+
+from app.world_engine_apis.meter_replica import MeterReplica
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distances in km from one point to arrays of points"""
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class MeterSpatialIndex:
+    """
+    Uniform grid index over meter coordinates for neighbourhood queries.
+
+    Coordinates are projected to kilometres around the fleet's mean latitude
+    (accurate at city scale) and bucketed into square cells. Points are
+    stored sorted by cell, so every cell is a contiguous slice of NumPy
+    arrays: a query only visits the cells overlapping its area and filters
+    those candidates exactly (haversine for radius queries).
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        latitudes: np.ndarray,
+        longitudes: np.ndarray,
+        pincodes: Optional[List[Optional[str]]] = None,
+        *,
+        cell_km: float = 1.0
+    ):
+        """
+        Build the index.
+
+        Parameters
+        ----------
+        ids         Meter IDs
+        latitudes   Latitudes in degrees, aligned with ``ids``
+        longitudes  Longitudes in degrees, aligned with ``ids``
+        pincodes    Optional pincode of every meter, for ``in_pincode``
+        cell_km     Grid cell size; about the typical query radius works best
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        lats = np.asarray(latitudes, dtype=np.float64)
+        lons = np.asarray(longitudes, dtype=np.float64)
+        self.cell_km = cell_km
+        self._cos_lat0 = math.cos(math.radians(float(lats.mean()))) if len(lats) else 1.0
+
+        cx, cy = self._cells(lats, lons)
+        order = np.lexsort((cy, cx))
+        self.ids = ids[order]
+        self.latitudes = lats[order]
+        self.longitudes = lons[order]
+        self._cx = cx[order]
+        self._cy = cy[order]
+
+        keys = np.stack([self._cx, self._cy], axis=1)
+        unique, starts = np.unique(keys, axis=0, return_index=True)
+        ends = np.append(starts[1:], len(order))
+        self._buckets: Dict[Tuple[int, int], Tuple[int, int]] = {
+            (int(x), int(y)): (int(s), int(e)) for (x, y), s, e in zip(unique, starts, ends)
+        }
+
+        self._pincodes: Dict[str, np.ndarray] = {}
+        if pincodes is not None:
+            sorted_pincodes = np.asarray([str(p) if p is not None else '' for p in pincodes], dtype=object)[order]
+            for pincode in set(sorted_pincodes) - {''}:
+                self._pincodes[pincode] = self.ids[sorted_pincodes == pincode]
+
+    def _cells(self, lats: np.ndarray, lons: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Grid cell of each coordinate"""
+        x = np.radians(lons) * EARTH_RADIUS_KM * self._cos_lat0
+        y = np.radians(lats) * EARTH_RADIUS_KM
+        return np.floor(x / self.cell_km).astype(np.int64), np.floor(y / self.cell_km).astype(np.int64)
+
+    @classmethod
+    def from_meters(cls, meters: List[Dict[str, Any]], *, cell_km: float = 1.0) -> 'MeterSpatialIndex':
+        """
+        Build the index from meters as returned by the simulator.
+
+        Parameters
+        ----------
+        meters      Meters with ``latitude``/``longitude`` (others are skipped)
+        cell_km     Grid cell size
+
+        Returns
+        -------
+        The index
+        """
+        located = [m for m in meters if m.get('latitude') is not None and m.get('longitude') is not None]
+        return cls(
+            np.fromiter((int(m['id']) for m in located), dtype=np.int64, count=len(located)),
+            np.fromiter((float(m['latitude']) for m in located), dtype=np.float64, count=len(located)),
+            np.fromiter((float(m['longitude']) for m in located), dtype=np.float64, count=len(located)),
+            [m.get('pincode') for m in located],
+            cell_km=cell_km
+        )
+
+    @classmethod
+    def from_replica(cls, replica: MeterReplica, *, cell_km: float = 1.0) -> 'MeterSpatialIndex':
+        """Build the index from every meter of a replica"""
+        return cls.from_meters(replica.find(), cell_km=cell_km)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _candidates(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> np.ndarray:
+        """Positions of the points in every cell overlapping a bounding box"""
+        (x0, x1), (y0, y1) = self._cells(np.array([min_lat, max_lat]), np.array([min_lon, max_lon]))
+        x0, x1 = (x0, x1) if x0 <= x1 else (x1, x0)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > len(self._buckets):
+            # Larger than the populated area: walking the buckets is cheaper than the cells
+            slices = [
+                range(s, e) for (x, y), (s, e) in self._buckets.items() if x0 <= x <= x1 and y0 <= y <= y1
+            ]
+        else:
+            slices = [
+                range(*self._buckets[(x, y)])
+                for x in range(int(x0), int(x1) + 1)
+                for y in range(int(y0), int(y1) + 1)
+                if (x, y) in self._buckets
+            ]
+        if not slices:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.arange(r.start, r.stop) for r in slices])
+
+    def within_radius(self, latitude: float, longitude: float, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the meters within a distance of a point.
+
+        Parameters
+        ----------
+        latitude    Latitude of the centre in degrees
+        longitude   Longitude of the centre in degrees
+        radius_km   Radius in kilometres
+
+        Returns
+        -------
+        Meter IDs and their distances in km, nearest first
+        """
+        dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+        dlon = dlat / max(math.cos(math.radians(latitude)), 1e-6)
+        candidates = self._candidates(latitude - dlat, longitude - dlon, latitude + dlat, longitude + dlon)
+        distances = haversine_km(latitude, longitude, self.latitudes[candidates], self.longitudes[candidates])
+        inside = distances <= radius_km
+        candidates, distances = candidates[inside], distances[inside]
+        nearest = np.argsort(distances, kind='stable')
+        return self.ids[candidates[nearest]], distances[nearest]
+
+    def within_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> np.ndarray:
+        """
+        Get the meters inside a latitude/longitude bounding box.
+
+        Parameters
+        ----------
+        min_lat     Southern edge in degrees
+        min_lon     Western edge in degrees
+        max_lat     Northern edge in degrees
+        max_lon     Eastern edge in degrees
+
+        Returns
+        -------
+        Meter IDs inside the box (edges included)
+        """
+        candidates = self._candidates(min_lat, min_lon, max_lat, max_lon)
+        lats, lons = self.latitudes[candidates], self.longitudes[candidates]
+        inside = (lats >= min_lat) & (lats <= max_lat) & (lons >= min_lon) & (lons <= max_lon)
+        return self.ids[candidates[inside]]
+
+    def in_pincode(self, pincode: Union[str, int]) -> np.ndarray:
+        """Meter IDs of a pincode"""
+        return self._pincodes.get(str(pincode), np.empty(0, dtype=np.int64))
@@ -0,0 +1,103 @@
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, Tuple, Union
+
+
+@dataclass(frozen=True)
+class Projection:
+    """
+    Which fields and relations a World Engine (Strapi) read returns.
+
+    Attributes
+    ----------
+    fields      Scalar fields to return; empty returns every field
+    populate    Relation (or dotted path) -> nested Projection, or None for all of its fields
+    """
+    fields: Tuple[str, ...] = ()
+    populate: Dict[str, Optional['Projection']] = field(default_factory=dict)
+
+    def to_params(self, prefix: str = '') -> Dict[str, Any]:
+        """
+        Encode as Strapi query parameters (``fields[0]=...``, ``populate[rel][fields][0]=...``).
+
+        Parameters
+        ----------
+        prefix      Key of the enclosing relation, used for nested projections
+
+        Returns
+        -------
+        Query parameters to merge into a request
+        """
+        def key(name: str) -> str:
+            return f'{prefix}[{name}]' if prefix else name
+
+        params: Dict[str, Any] = {}
+        for i, name in enumerate(self.fields):
+            params[f'{key("fields")}[{i}]'] = name
+        if all(nested is None for nested in self.populate.values()):
+            # Whole relations only: the list form (``populate[0]=parent``, dotted paths allowed)
+            for i, relation in enumerate(self.populate):
+                params[f'{key("populate")}[{i}]'] = relation
+            return params
+        for relation, nested in self.populate.items():
+            relation_key = f'{key("populate")}[{relation}]'
+            if nested is None:
+                params[relation_key] = 'true'
+            else:
+                params.update(nested.to_params(relation_key))
+        return params
+
+
+ID_ONLY = Projection(fields=('id',))
+
+# Presets for common jobs, by resource
+METER_PROJECTIONS: Dict[str, Projection] = {
+    # Everything get_all_meters has always returned
+    'full': Projection(populate={'parent': None, 'energyResource': None, 'children': None, 'appliances': None}),
+    'ids': ID_ONLY,
+    'codes': Projection(fields=('code',)),
+    # Fleet scans that only need where a meter is
+    'location': Projection(fields=('code', 'latitude', 'longitude', 'pincode', 'city', 'state')),
+    # Building the meter hierarchy
+    'hierarchy': Projection(fields=('code',), populate={'parent': ID_ONLY, 'children': ID_ONLY}),
+    # Consumption / production jobs
+    'load': Projection(
+        fields=('code', 'type', 'consumptionLoadFactor', 'productionLoadFactor'),
+        populate={'energyResource': Projection(fields=('name', 'type'))}
+    ),
+    # Resuming a household: the meter of a code and the energy resource attached to it
+    'provisioning': Projection(fields=('code',), populate={'energyResource': ID_ONLY}),
+}
+
+ENERGY_RESOURCE_PROJECTIONS: Dict[str, Projection] = {
+    # Everything get_energy_resource_by_id has always returned
+    'full': Projection(populate={'meter.parent': None, 'meter.children': None, 'meter.appliances': None}),
+    'summary': Projection(fields=('name', 'type'), populate={'meter': Projection(fields=('code',))}),
+    'meter_only': Projection(fields=('name',), populate={'meter': None}),
+}
+
+
+def resolve_projection(
+    projection: Union[str, Projection, None],
+    presets: Dict[str, Projection],
+    default: str = 'full'
+) -> Projection:
+    """
+    Look up a projection by preset name, passing Projection instances through.
+
+    Parameters
+    ----------
+    projection  Preset name, Projection, or None for the default preset
+    presets     The presets of the resource
+    default     Preset used when ``projection`` is None
+
+    Returns
+    -------
+    The projection to send
+    """
+    if projection is None:
+        projection = default
+    if isinstance(projection, Projection):
+        return projection
+    if projection not in presets:
+        raise ValueError(f"Projection must be one of {list(presets)} or a Projection")
+    return presets[projection]
@@ -0,0 +1,274 @@
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional, List, Tuple, Union
+
+from app.utils import json_codec
+from app.utils.logging_config import get_logger
+from app.world_engine_apis.energy_resource_client import EnergyResourceClient
+from app.world_engine_apis.meter_client import MeterClient
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+logger = get_logger('Provisioning')
+
+
+class MeterCodeAllocator:
+    """
+    Hands out unique meter codes (``METER<n>``) from reserved blocks.
+
+    A block of ``block_size`` numbers is reserved at a time by advancing a
+    high-water mark kept in a file under an exclusive lock, so several
+    processes never hand out the same code and the file is touched once per
+    block rather than per meter. The mark starts above the highest code
+    already known to the simulator.
+    """
+
+    def __init__(
+        self,
+        meter_client: MeterClient,
+        *,
+        prefix: str = "METER",
+        block_size: int = 100,
+        path: str = os.path.join('provisioning', 'meter_codes.json'),
+    ):
+        """
+        Parameters
+        ----------
+        meter_client    Client used to find the highest existing code on first use
+        prefix          Code prefix
+        block_size      Numbers reserved per block
+        path            File holding the high-water mark
+        """
+        self.meter_client = meter_client
+        self.prefix = prefix
+        self.block_size = block_size
+        self.path = path
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+
+    def _highest_existing(self) -> int:
+        """Highest number used by a ``<prefix><n>`` code in the simulator"""
+        pattern = re.compile(rf'^{re.escape(self.prefix)}(\d+)$')
+        numbers = [int(m.group(1)) for m in map(pattern.match, self.meter_client.get_all_meter_codes()) if m]
+        return max(numbers, default=0)
+
+    def _reserve_block(self) -> Tuple[int, int]:
+        """Advance the shared high-water mark by one block and return the reserved range"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(f'{self.path}.lock', 'w') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                mark = json_codec.load_file(self.path).get('next') if os.path.exists(self.path) else None
+                if mark is None:
+                    mark = self._highest_existing() + 1
+                json_codec.dump_file({'prefix': self.prefix, 'next': mark + self.block_size}, self.path)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return mark, mark + self.block_size
+
+    def allocate(self) -> str:
+        """Get the next unused meter code"""
+        with self._lock:
+            if self._next >= self._end:
+                self._next, self._end = self._reserve_block()
+            code = f"{self.prefix}{self._next}"
+            self._next += 1
+            return code
+
+
+@dataclass
+class Household:
+    """Meter and energy resource provisioned for one session"""
+    session_id: str
+    code: str
+    meter_id: Optional[int] = None
+    energy_resource_id: Optional[int] = None
+
+    @property
+    def complete(self) -> bool:
+        return self.meter_id is not None and self.energy_resource_id is not None
+
+
+class ProvisioningService:
+    """
+    Creates the meter + consumer energy resource of a household, once per session.
+
+    Every step is recorded before and after its remote call: the meter code
+    is assigned to the session before the meter is created, and the created
+    IDs are stored as soon as they are known. Records are appended to a
+    journal (one JSON line per change, the last line of a session wins), so
+    recording costs the same however many households exist. Provisioning the
+    same session again returns the recorded household, or resumes it; if a
+    crash happened between a create and recording its ID, the meter is found
+    by its code, and the energy resource through that meter, instead of being
+    created twice. The session also keys the idempotency keys, so transient
+    failures of the creates are retried.
+    """
+
+    def __init__(
+        self,
+        meter_client: Optional[MeterClient] = None,
+        energy_resource_client: Optional[EnergyResourceClient] = None,
+        *,
+        allocator: Optional[MeterCodeAllocator] = None,
+        path: str = os.path.join('provisioning', 'households.jsonl'),
+        max_workers: int = 8,
+    ):
+        """
+        Parameters
+        ----------
+        meter_client            Client used to create meters
+        energy_resource_client  Client used to create energy resources
+        allocator               Meter code allocator (default: one over ``meter_client``)
+        path                    Journal recording the household of every session
+        max_workers             Households provisioned concurrently by provision_many
+        """
+        self.meter_client = meter_client or MeterClient()
+        self.energy_resource_client = energy_resource_client or EnergyResourceClient()
+        self.allocator = allocator or MeterCodeAllocator(self.meter_client)
+        self.path = path
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._session_locks: Dict[str, threading.Lock] = {}
+        self._households: Dict[str, Household] = {}
+        self._load()
+
+    def _load(self) -> None:
+        """Replay the journal, then compact it to one line per household"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    entry = json_codec.loads(line)
+                except ValueError:
+                    # A crash can leave the last line torn
+                    continue
+                self._households[entry['session_id']] = Household(**entry)
+        json_codec.dump_lines([asdict(h) for h in self._households.values()], self.path)
+
+    def _record(self, household: Household) -> None:
+        """Append the household's current state to the journal"""
+        with self._lock:
+            self._households[household.session_id] = household
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'ab') as f:
+                f.write(json_codec.dumps(asdict(household)) + b'\n')
+
+    def _session_lock(self, session_id: str) -> threading.Lock:
+        with self._lock:
+            return self._session_locks.setdefault(session_id, threading.Lock())
+
+    def get(self, session_id: str) -> Optional[Household]:
+        """Get the household recorded for a session"""
+        with self._lock:
+            return self._households.get(session_id)
+
+    def provision(self, session_id: str, name: str, *, type: str = "CONSUMER") -> Household:
+        """
+        Provision the meter and energy resource of a session, at most once.
+
+        Parameters
+        ----------
+        session_id  Stable identifier of the user session / household
+        name        Name of the energy resource
+        type        Type of the energy resource
+
+        Returns
+        -------
+        The provisioned household
+        """
+        with self._session_lock(session_id):
+            household = self.get(session_id)
+            resumed = household is not None
+            if household is None:
+                household = Household(session_id=session_id, code=self.allocator.allocate())
+                self._record(household)
+            if household.complete:
+                return household
+
+            if resumed:
+                # A resumed session may have created its meter or energy resource without recording it
+                existing = self.meter_client.find_meters(
+                    {"code": household.code}, page_size=1, projection='provisioning'
+                )
+                if existing:
+                    household.meter_id = int(existing[0]['id'])
+                    energy_resource = existing[0].get('energyResource')
+                    if energy_resource and household.energy_resource_id is None:
+                        household.energy_resource_id = int(energy_resource['id'])
+                    self._record(household)
+
+            if household.meter_id is None:
+                meter = self.meter_client.create_meter(
+                    code=household.code,
+                    idempotency_key=f"{session_id}:meter"
+                )
+                household.meter_id = int(meter['data']['id'])
+                self._record(household)
+
+            if household.energy_resource_id is None:
+                energy_resource = self.energy_resource_client.create_energy_resource(
+                    name=name,
+                    type=type,
+                    meter_id=household.meter_id,
+                    idempotency_key=f"{session_id}:energy_resource"
+                )
+                household.energy_resource_id = int(energy_resource['data']['id'])
+                self._record(household)
+            logger.info(
+                "Provisioned %s for session %s: meter %s, energy resource %s",
+                household.code, session_id, household.meter_id, household.energy_resource_id
+            )
+            return household
+
+    def provision_many(
+        self,
+        households: List[Tuple[str, str]],
+        *,
+        type: str = "CONSUMER"
+    ) -> Dict[str, Union[Household, Exception]]:
+        """
+        Provision many households in parallel with bounded concurrency.
+
+        Parameters
+        ----------
+        households  ``(session_id, name)`` pairs
+        type        Type of the energy resources
+
+        Returns
+        -------
+        Session ID -> provisioned Household, or the exception that failed it
+        """
+        def provision_one(entry: Tuple[str, str]) -> Union[Household, Exception]:
+            try:
+                return self.provision(entry[0], entry[1], type=type)
+            except Exception as e:
+                logger.warning("Provisioning session %s failed: %s", entry[0], e)
+                return e
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='provision') as pool:
+            results = list(pool.map(provision_one, households))
+        return {session_id: result for (session_id, _), result in zip(households, results)}
+
+
+_service: Optional[ProvisioningService] = None
+_service_lock = threading.Lock()
+
+
+def get_provisioning_service() -> ProvisioningService:
+    """Get the process-wide provisioning service, creating it on first use"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ProvisioningService()
+        return _service
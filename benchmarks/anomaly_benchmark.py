@@ -0,0 +1,113 @@
+"""
+Throughput and detection quality of the meter anomaly detector on synthetic meters.
+
+Each synthetic meter gets a daily consumption shape with gamma noise and
+half of them a PV system with cloudy days. Faults are injected at random
+hours after the warm-up: single-hour consumption spikes, stuck-at-zero
+runs and multi-day production drop-offs (on PV meters). The whole window
+is checked in batch (backfill) mode, and a subset of meters is streamed
+reading by reading to compare throughput.
+
+A fault counts as detected when an anomaly of its kind starts within its
+hours; every other anomaly is a false positive.
+
+Usage:
+    python benchmarks/anomaly_benchmark.py [--meters 200 1000] [--days 90] [--seed 0]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.analytics.anomalies import AnomalyConfig, MeterAnomalyDetector, detect_batch
+from app.analytics.solar import hourly_index
+
+STREAMED_METERS = 20
+
+
+def synthetic_meters(n: int, days: int, rng: np.random.Generator) -> tuple:
+    """Hourly (consumption, production) of ``n`` meters plus the injected faults as (meter, kind, start, end)"""
+    times = hourly_index('2025-04-01', days * 24)
+    hour = (np.arange(days * 24) % 24).astype(np.float64)
+    shape = 0.3 + 0.5 * np.exp(-((hour - 19) / 2.5) ** 2) + 0.3 * np.exp(-((hour - 8) / 1.5) ** 2)
+    consumption = shape * rng.uniform(0.5, 2.0, (n, 1)) * rng.gamma(8.0, 1 / 8.0, (n, days * 24))
+    sun = np.clip(np.sin((hour - 6) / 12 * np.pi), 0, None)
+    cloud = np.repeat(rng.beta(5, 2, (n, days)), 24, axis=1)
+    production = sun * rng.uniform(1.0, 5.0, (n, 1)) * cloud * (rng.random((n, 1)) < 0.5)
+
+    faults = []
+    warm = 14 * 24
+    for meter in range(n):
+        for hour_at in rng.integers(warm, days * 24, rng.integers(0, 3)):
+            consumption[meter, hour_at] += rng.uniform(4.0, 10.0)
+            faults.append((meter, 'spike', hour_at, hour_at + 1))
+        if rng.random() < 0.2:
+            start = int(rng.integers(warm, days * 24 - 48))
+            end = start + int(rng.integers(8, 48))
+            consumption[meter, start:end] = 0.0
+            faults.append((meter, 'zero_read', start, end))
+        if production[meter].any() and rng.random() < 0.3:
+            start = int(rng.integers(warm, days * 24 - 96))
+            end = start + int(rng.integers(72, 96))
+            production[meter, start:end] *= 0.1
+            faults.append((meter, 'production_dropoff', start, end))
+    return times, consumption, production, faults
+
+
+def score(events: list, times: np.ndarray, faults: list) -> dict:
+    hour = {t: i for i, t in enumerate(times.astype('datetime64[s]'))}
+    found = {(meter, e.kind, hour[e.timestamp]) for meter, row in enumerate(events) for e in row}
+    result = {}
+    for kind in ('spike', 'zero_read', 'production_dropoff'):
+        injected = [f for f in faults if f[1] == kind]
+        hits = {(m, k, h) for m, k, start, end in injected for h in range(start, end) if (m, k, h) in found}
+        flagged = [f for f in found if f[1] == kind]
+        detected = sum(any((m, k, h) in hits for h in range(start, end)) for m, k, start, end in injected)
+        result[kind] = (detected, len(injected), len(flagged) - len(hits))
+    return result
+
+
+def run(n: int, days: int, seed: int) -> None:
+    times, consumption, production, faults = synthetic_meters(n, days, np.random.default_rng(seed))
+    config = AnomalyConfig()
+    readings = np.stack([consumption, production], axis=-1)
+
+    detectors = [MeterAnomalyDetector(meter, config) for meter in range(n)]
+    started = time.perf_counter()
+    events = detect_batch(times, readings, detectors)
+    batch = time.perf_counter() - started
+
+    streamed = [MeterAnomalyDetector(meter, config) for meter in range(STREAMED_METERS)]
+    started = time.perf_counter()
+    for meter, detector in enumerate(streamed):
+        for i, timestamp in enumerate(times):
+            detector.update(timestamp, consumption[meter, i], production[meter, i])
+    stream = time.perf_counter() - started
+    same = all(list(a.events) == list(b.events) for a, b in zip(streamed, detectors))
+
+    readings_count = n * len(times)
+    print(f"\n{n} meters x {days} days: batch {batch:.2f}s ({readings_count / batch / 1e6:.2f}M readings/s), "
+          f"stream {STREAMED_METERS * len(times) / stream:,.0f} readings/s, "
+          f"stream matches batch: {same}")
+    print(f"{'kind':<22}{'detected':>12}{'false pos.':>12}")
+    for kind, (detected, injected, false_positives) in score(events, times, faults).items():
+        print(f"{kind:<22}{f'{detected}/{injected}':>12}{false_positives:>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--meters', type=int, nargs='+', default=[200, 1000])
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for n in args.meters:
+        run(n, args.days, args.seed)
+
+
+if __name__ == '__main__':
+    main()
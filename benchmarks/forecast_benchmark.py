@@ -0,0 +1,109 @@
+"""
+Throughput and accuracy of the batch load forecaster on synthetic meters.
+
+Each synthetic meter gets its own yearly consumption, morning/evening
+peak shape, weekend behaviour, heating/cooling seasonality, noise and
+missing-data gaps. The forecaster is fitted on the first year and
+forecasts the second, hour by hour, compared with:
+
+- weekly profile: the mean of each hour of the week (no yearly cycle)
+- seasonal naive: the same hour 52 weeks earlier
+
+Errors are WAPE (sum of absolute errors / sum of actuals) hourly and
+daily, plus the mean absolute error of the yearly energy and of the peak
+(the forecaster's calibrated ``peak_kw``; the baselines' own maximum).
+
+Usage:
+    python benchmarks/forecast_benchmark.py [--meters 500 2000] [--seed 0]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.analytics.forecasting import LoadForecaster, hour_of_week
+from app.analytics.solar import hourly_index
+
+HOURS = 8760
+
+
+def synthetic_meters(n: int, rng: np.random.Generator) -> tuple:
+    """Two years of hourly kWh for ``n`` meters (float32), with NaN gaps in the first year"""
+    times = hourly_index('2025-01-06', 2 * HOURS)
+    hour = (times - times.astype('datetime64[D]')).astype('timedelta64[h]').astype(np.float32)
+    day = ((times - times[0]) // np.timedelta64(1, 'D')).astype(np.float32)
+    weekend = (hour_of_week(times) >= 120).astype(np.float32)
+
+    col = lambda values: np.asarray(values, dtype=np.float32)[:, None]
+    morning, evening = col(rng.normal(7.5, 1.0, n)), col(rng.normal(19.5, 1.0, n))
+    shape = (0.4 + col(rng.uniform(0.2, 0.8, n)) * np.exp(-((hour - morning) / 1.5) ** 2)
+             + col(rng.uniform(0.5, 1.2, n)) * np.exp(-((hour - evening) / 2.5) ** 2))
+    shape *= 1 + col(rng.uniform(-0.1, 0.3, n)) * weekend
+    seasonal = 1 + col(rng.uniform(0.0, 0.35, n)) * np.cos(2 * np.pi * (day - col(rng.uniform(0, 365, n))) / 365.25)
+    noise = rng.gamma(20.0, 1 / 20.0, (n, len(times))).astype(np.float32)
+    loads = shape * seasonal * noise
+    loads *= col(rng.lognormal(np.log(6000), 0.4, n)) / loads[:, :HOURS].sum(axis=1, keepdims=True)
+
+    # Missing readings: a few multi-day outages per meter in the training year
+    history = loads[:, :HOURS].copy()
+    for row in range(n):
+        for start in rng.integers(0, HOURS - 96, rng.integers(0, 4)):
+            history[row, start:start + rng.integers(6, 96)] = np.nan
+    return times, history, loads[:, HOURS:]
+
+
+def errors(forecast: np.ndarray, actual: np.ndarray, peak: np.ndarray) -> dict:
+    daily_f = forecast.reshape(len(forecast), -1, 24).sum(axis=2)
+    daily_a = actual.reshape(len(actual), -1, 24).sum(axis=2)
+    return {
+        'hourly': np.abs(forecast - actual).sum() / actual.sum(),
+        'daily': np.abs(daily_f - daily_a).sum() / daily_a.sum(),
+        'yearly': np.mean(np.abs(forecast.sum(axis=1) / actual.sum(axis=1) - 1)),
+        'peak': np.mean(np.abs(peak / actual.max(axis=1) - 1)),
+    }
+
+
+def run(n: int, seed: int) -> None:
+    times, history, actual = synthetic_meters(n, np.random.default_rng(seed))
+    train, test = times[:HOURS], times[HOURS:]
+
+    started = time.perf_counter()
+    forecaster = LoadForecaster().fit(train, history)
+    fitted = time.perf_counter()
+    result = forecaster.forecast(test[0], HOURS)
+    done = time.perf_counter()
+
+    weekly = LoadForecaster(annual_harmonics=0).fit(train, history).predict(test)
+    # Same hour 52 weeks earlier keeps the weekday; gaps fall back to the weekly profile
+    naive = np.concatenate([history[:, -HOURS + 24:], history[:, -24:]], axis=1)[:, :HOURS]
+    naive = np.where(np.isfinite(naive), naive, weekly)
+
+    print(f"\n{n} meters: fit {fitted - started:.2f}s, forecast {done - fitted:.2f}s "
+          f"({n / (done - started):,.0f} meters/s, {n * HOURS / (done - started) / 1e6:.1f}M hourly values/s)")
+    print(f"{'model':<18}{'hourly WAPE':>13}{'daily WAPE':>12}{'yearly err':>12}{'peak err':>10}")
+    models = (
+        ('ridge + seasonal', result.hourly, result.peak_kw),
+        ('weekly profile', weekly, weekly.max(axis=1)),
+        ('seasonal naive', naive, naive.max(axis=1)),
+    )
+    for name, values, peak in models:
+        e = errors(values, actual, peak)
+        print(f"{name:<18}{e['hourly']:>12.1%}{e['daily']:>12.1%}{e['yearly']:>12.1%}{e['peak']:>10.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--meters', type=int, nargs='+', default=[500, 2000])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for n in args.meters:
+        run(n, args.seed)
+
+
+if __name__ == '__main__':
+    main()
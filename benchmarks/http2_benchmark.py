@@ -0,0 +1,182 @@
+"""
+HTTP/1.1 (one pooled session per journey) vs HTTP/2 (shared multiplexed
+connections) for concurrent Beckn journeys against a local mock BAP.
+
+The mock runs in its own process, replays the recorded responses of
+context_store_history after a fixed delay and counts the connections it
+accepted. Each session runs a full search / select / init / confirm / status
+journey with its own BAPClient.
+
+Requires hypercorn for the mock server (``pip install hypercorn``).
+
+Usage:
+    python benchmarks/http2_benchmark.py [--sessions 50 200 1000] [--delay-ms 20]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hypercorn.asyncio import serve
+from hypercorn.config import Config
+
+from app.beckn_apis.beckn_client import BAPClient
+from app.utils import json_codec
+from app.utils.circuit_breaker import ENDPOINT_LIMITS
+from app.utils.http2_transport import use_http2
+from app.utils.latency import latency_tracker
+
+FIXTURE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'context_store_history', 'context_store_status.json'
+)
+
+
+class MockBAP:
+    """ASGI app answering every Beckn action with its recorded response"""
+
+    def __init__(self, delay: float):
+        history = json_codec.load_file(FIXTURE)['transaction_history']
+        self.responses = {action: json_codec.dumps(response) for action, response in history.items()}
+        self.delay = delay
+        self.connections = set()
+        self.http_versions = set()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return
+        path = scope['path'].strip('/')
+        if path == '_stats':
+            body = json_codec.dumps({'connections': len(self.connections), 'versions': sorted(self.http_versions)})
+            self.connections = set()
+            self.http_versions = set()
+        else:
+            self.connections.add(tuple(scope['client']))
+            self.http_versions.add(scope['http_version'])
+            while (await receive()).get('more_body'):
+                pass
+            await asyncio.sleep(self.delay)
+            body = self.responses.get(path, b'{}')
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+
+def _serve(port: int, delay: float) -> None:
+    """Entry point of the mock server process"""
+    config = Config()
+    config.bind = [f'127.0.0.1:{port}']
+    config.backlog = 4096
+    config.keep_alive_timeout = 60
+    # Unlimited requests per connection, the benchmark is not about GOAWAY handling
+    config.keep_alive_max_requests = 10 ** 9
+    config.h2_max_concurrent_streams = 1000
+    config.loglevel = 'WARNING'
+    asyncio.run(serve(MockBAP(delay), config))
+
+
+def start_server(delay: float) -> str:
+    """Start the mock in a child process on a free port and return its URL"""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    multiprocessing.Process(target=_serve, args=(port, delay), daemon=True).start()
+    for _ in range(200):
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    else:
+        raise RuntimeError("mock BAP did not start")
+    return f'http://127.0.0.1:{port}/'
+
+
+def run_journey(client: BAPClient, latencies: list, errors: list) -> None:
+    """One full retail journey; per-request latencies and failures are appended to the lists"""
+    steps = (
+        lambda: client.search(),
+        lambda: client.select('1', '1'),
+        lambda: client.init('1', '1'),
+        lambda: client.confirm('1', '1', '1', 'Bench', '0000000000', 'bench@example.com'),
+        lambda: client.status('1'),
+    )
+    for step in steps:
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            errors.append(e)
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+def run(url: str, sessions: int, http2: bool) -> dict:
+    """Run ``sessions`` concurrent journeys and collect the results"""
+    clients = [BAPClient(domain='retail', base_url=url) for _ in range(sessions)]
+    if http2:
+        # The mock is plain http://, so h2 is sent with prior knowledge
+        for client in clients:
+            use_http2(client.session, http1=False)
+    requests.get(f'{url}_stats')
+    latencies = []
+    errors = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        for future in [pool.submit(run_journey, client, latencies, errors) for client in clients]:
+            future.result()
+    elapsed = time.perf_counter() - start
+    for client in clients:
+        client.session.close()
+    stats = requests.get(f'{url}_stats').json()
+    latencies.sort()
+    return {
+        'elapsed': elapsed,
+        'rps': len(latencies) / elapsed,
+        'errors': len(errors),
+        'p50': statistics.median(latencies) * 1000,
+        'p95': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        'connections': stats['connections'],
+        'versions': '/'.join(stats['versions']),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, nargs='+', default=[50, 200, 1000])
+    parser.add_argument('--delay-ms', type=float, default=20.0)
+    args = parser.parse_args()
+
+    # Let the bulkhead admit every session of the largest run, and keep the
+    # breaker closed so failures are counted instead of short-circuiting later runs
+    ENDPOINT_LIMITS['beckn_bap']['max_concurrent'] = max(args.sessions)
+    ENDPOINT_LIMITS['beckn_bap']['failure_threshold'] = 10 ** 9
+    # Latencies grow with the session count; don't let earlier runs shrink the timeouts
+    latency_tracker.MIN_TIMEOUT = BAPClient.DEFAULT_TIMEOUT
+
+    url = start_server(args.delay_ms / 1000)
+
+    print(f"mock BAP at {url}, {args.delay_ms:.0f} ms per response")
+    print(f"{'sessions':>9}{'transport':>11}{'http':>7}{'conns':>7}{'time s':>9}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'errors':>8}")
+    for sessions in args.sessions:
+        for http2 in (False, True):
+            r = run(url, sessions, http2)
+            print(
+                f"{sessions:>9}{'http/2' if http2 else 'http/1.1':>11}{r['versions']:>7}{r['connections']:>7}"
+                f"{r['elapsed']:>9.2f}{r['rps']:>9.0f}{r['p50']:>9.1f}{r['p95']:>9.1f}{r['errors']:>8}"
+            )
+
+
+if __name__ == '__main__':
+    main()
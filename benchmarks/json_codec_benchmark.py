@@ -0,0 +1,60 @@
+"""
+Micro-benchmark of the JSON codec against the previous stdlib code paths,
+using the recorded context_store_history fixtures.
+
+Usage:
+    python benchmarks/json_codec_benchmark.py [--repeat N]
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import json_codec
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'context_store_history')
+
+
+def _best_of(stmt, repeat: int, number: int) -> float:
+    """Best time of ``repeat`` runs, per call, in microseconds"""
+    return min(timeit.repeat(stmt, repeat=repeat, number=number)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--number', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"codec backend: {json_codec.BACKEND}")
+    print(f"{'fixture':<28}{'KB':>8}{'dump indent=2':>16}{'codec dumps':>14}{'json.loads':>13}{'codec loads':>14}")
+
+    totals = [0.0, 0.0, 0.0, 0.0]
+    for path in sorted(glob.glob(os.path.join(FIXTURES, '*.json'))):
+        with open(path, 'rb') as f:
+            raw = f.read()
+        obj = json.loads(raw)
+
+        timings = [
+            # previous _save_context_store / requests(json=...) encodings
+            _best_of(lambda: json.dumps(obj, indent=2), args.repeat, args.number),
+            _best_of(lambda: json_codec.dumps(obj), args.repeat, args.number),
+            # previous resp.json() decoding
+            _best_of(lambda: json.loads(raw), args.repeat, args.number),
+            _best_of(lambda: json_codec.loads(raw), args.repeat, args.number),
+        ]
+        totals = [t + x for t, x in zip(totals, timings)]
+        print(f"{os.path.basename(path):<28}{len(raw) / 1024:>8.1f}" + ''.join(
+            f"{t:>{w}.1f}us" for t, w in zip(timings, (14, 12, 11, 12))
+        ))
+
+    print(f"\nencode speed-up vs json.dump(indent=2): {totals[0] / totals[1]:.2f}x")
+    print(f"decode speed-up vs json.loads:           {totals[2] / totals[3]:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+import threading
+import time
+
+from app.beckn_apis.beckn_client import BAPClient
+
+
+def test_coalesced_searches_keep_each_callers_ids():
+    client = BAPClient(domain="retail")
+    sent = []
+
+    def send(url, payload, key, timeout):
+        sent.append(payload)
+        time.sleep(0.2)
+        context = dict(payload["context"])
+        return {"context": context, "responses": [{"context": dict(context), "message": {}}]}
+
+    client._send = send
+    responses = {}
+
+    def search(transaction_id):
+        responses[transaction_id] = client.search(transaction_id=transaction_id, message_id=f"{transaction_id}-m")
+
+    threads = [threading.Thread(target=search, args=(transaction_id,)) for transaction_id in ("t1", "t2")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(sent) == 1
+    for transaction_id, response in responses.items():
+        for context in (response["context"], response["responses"][0]["context"]):
+            assert context["transaction_id"] == transaction_id
+            assert context["message_id"] == f"{transaction_id}-m"
@@ -0,0 +1,42 @@
+import pytest
+
+from app.store.checkpoint_store import CheckpointStore, OrderAlreadyConfirmedError
+
+CUSTOMER = {'provider_id': 'p1', 'item_id': 'i1', 'customer_phone': '555'}
+
+
+def _send(**ids):
+    return {'responses': [{'context': {'transaction_id': ids['transaction_id']}, 'message': {'order': {'id': 'o1'}}}]}
+
+
+def _confirmed_store(tmp_path):
+    store = CheckpointStore('solar_retail', 'household-1', directory=str(tmp_path))
+    store.run_step('search', {}, _send)
+    store.run_step('init', {'provider_id': 'p1'}, _send)
+    store.run_confirm(_send, **CUSTOMER)
+    return store
+
+
+@pytest.mark.parametrize('step', ['search', 'select', 'init'])
+def test_restart_after_confirm_is_refused(tmp_path, step):
+    store = _confirmed_store(tmp_path)
+
+    with pytest.raises(OrderAlreadyConfirmedError, match='o1'):
+        store.run_step(step, {'provider_id': 'p2'}, _send)
+    assert store.is_completed('confirm')
+
+
+def test_confirm_with_other_details_is_refused(tmp_path):
+    store = _confirmed_store(tmp_path)
+
+    with pytest.raises(OrderAlreadyConfirmedError):
+        store.run_confirm(_send, **{**CUSTOMER, 'customer_phone': '556'})
+
+
+def test_same_confirm_is_replayed(tmp_path):
+    store = _confirmed_store(tmp_path)
+    sent = []
+
+    store.run_confirm(lambda **ids: sent.append(ids), **CUSTOMER)
+    assert sent == []
+    assert store.run_step('status', {'order_id': 'o1'}, _send)
@@ -0,0 +1,36 @@
+from unittest import mock
+
+from app.world_engine_apis.energy_resource_client import EnergyResourceClient
+from app.world_engine_apis.meter_client import MeterClient
+
+
+def _ok_response():
+    response = mock.Mock(content=b'{"data": {"id": 1}}', headers={}, raw=None)
+    response.raise_for_status.return_value = None
+    return response
+
+
+def test_create_meter_sends_idempotency_key():
+    client = MeterClient()
+    with mock.patch.object(client.session, 'request', return_value=_ok_response()) as request:
+        client.create_meter("M1", idempotency_key="abc")
+
+    assert request.call_args.kwargs['headers']['Idempotency-Key'] == 'abc'
+
+
+def test_create_energy_resource_sends_idempotency_key():
+    client = EnergyResourceClient()
+    with mock.patch.object(client.session, 'request', return_value=_ok_response()) as request:
+        client.create_energy_resource("R1", "CONSUMER", 1, idempotency_key="abc")
+
+    assert request.call_args.kwargs['headers']['Idempotency-Key'] == 'abc'
+
+
+def test_compressed_create_keeps_idempotency_key():
+    client = MeterClient()
+    compressed = (b'gz', {'Content-Encoding': 'gzip'})
+    with mock.patch('app.world_engine_apis.meter_client.encode_body', return_value=compressed), \
+            mock.patch.object(client.session, 'request', return_value=_ok_response()) as request:
+        client.create_meter("M1", idempotency_key="abc")
+
+    assert request.call_args.kwargs['headers'] == {'Idempotency-Key': 'abc', 'Content-Encoding': 'gzip'}
@@ -0,0 +1,43 @@
+import pytest
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from app.utils.retry import RetryBudget, RetryPolicy, call_with_retry
+
+CREATE = RetryPolicy(base_delay=0, unsent_only=True)
+
+
+def _failing(*errors):
+    calls = []
+
+    def fn():
+        calls.append(None)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return 'ok'
+    return fn, calls
+
+
+def _refused():
+    return requests.ConnectionError(MaxRetryError(None, '/', NewConnectionError(None, 'refused')))
+
+
+@pytest.mark.parametrize('error', [requests.ConnectTimeout(), _refused()])
+def test_create_is_retried_when_nothing_was_sent(error):
+    fn, calls = _failing(error)
+
+    assert call_with_retry(fn, CREATE, budget=RetryBudget()) == 'ok'
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize('error', [
+    requests.ReadTimeout(),
+    requests.ConnectionError('Connection aborted'),
+    requests.HTTPError(response=type('Response', (), {'status_code': 504})()),
+])
+def test_create_is_not_retried_once_it_may_have_been_applied(error):
+    fn, calls = _failing(error)
+
+    with pytest.raises(type(error)):
+        call_with_retry(fn, CREATE, budget=RetryBudget())
+    assert len(calls) == 1